@@ -0,0 +1,751 @@
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from config.settings import get_settings
+
+# Micro-benchmarks for the chat, auth and agent hot paths. Each scenario
+# prints its own measurements. Most run in-process against local stand-ins;
+# the MongoDB ones need MONGODB_URI to point at a server they may write to
+# (they use and then drop the "<MONGODB_DATABASE>_benchmark" database).
+#
+#     python benchmarks.py --list
+#     python benchmarks.py message-pages --lengths 100,1000,10000
+#     python benchmarks.py stream-ttfb --latency 2
+#     python benchmarks.py cache-lookup --entries 1000000
+#     python benchmarks.py semantic-lookup --entries 100000
+#     python benchmarks.py azure-client --concurrency 200
+#     python benchmarks.py login-storm --logins 100
+#     python benchmarks.py agents-available --concurrency 50
+#     python benchmarks.py logging --runs 5000
+#     python benchmarks.py tracing --runs 5000
+#     python benchmarks.py rate-limit --redis
+#
+# load_test.py covers whole-API load shedding and startup_time.py cold starts.
+
+settings = get_settings()
+
+SCENARIOS: Dict[str, Tuple[Callable, str, Tuple]] = {}
+
+def option(*flags, **kwargs) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+    return flags, kwargs
+
+def scenario(name: str, help: str, *options):
+    """Register an async benchmark under name with its command-line options"""
+    def register(func):
+        SCENARIOS[name] = (func, help, options)
+        return func
+    return register
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and max of a list of seconds, in milliseconds"""
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": ordered[-1] * 1000}
+
+def format_ms(samples: List[float]) -> str:
+    return "  ".join(f"{name}={value:8.3f}ms" for name, value in percentiles(samples).items())
+
+def int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part]
+
+@contextmanager
+def serve_in_thread(app):
+    """Serve an ASGI app with uvicorn on a free local port; yields its base URL"""
+    import uvicorn
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+@contextmanager
+def mock_azure(latency: float, chunks: int):
+    """Point the Azure OpenAI settings at load_test.py's mock endpoint"""
+    from load_test import create_mock_llm
+
+    with serve_in_thread(create_mock_llm(latency, chunks)) as base_url:
+        previous = settings.AZURE_API_BASE, settings.AZURE_API_KEY
+        settings.AZURE_API_BASE, settings.AZURE_API_KEY = base_url, "mock"
+        try:
+            yield base_url
+        finally:
+            settings.AZURE_API_BASE, settings.AZURE_API_KEY = previous
+
+async def call_asgi(app, path: str, headers: List[Tuple[bytes, bytes]] = ()) -> int:
+    """Send one GET straight to an ASGI app, without a client or sockets; returns the status"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": list(headers), "client": ("127.0.0.1", 50000), "server": ("test", 80)
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+async def time_asgi(app, path: str, runs: int, headers: List[Tuple[bytes, bytes]] = ()) -> List[float]:
+    """Durations of runs sequential call_asgi requests, after a few warm-up calls"""
+    for _ in range(10):
+        await call_asgi(app, path, headers)
+    durations = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        await call_asgi(app, path, headers)
+        durations.append(time.perf_counter() - started_at)
+    return durations
+
+async def benchmark_db():
+    from core.database.mongodb import create_mongo_client
+
+    client = create_mongo_client()
+    return client, client[f"{settings.MONGODB_DATABASE}_benchmark"]
+
+async def measure_peak(coro_factory: Callable, runs: int) -> Tuple[List[float], int]:
+    """Durations of runs calls and the largest Python allocation peak of any of them"""
+    durations, peak = [], 0
+    for _ in range(runs):
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        await coro_factory()
+        durations.append(time.perf_counter() - started_at)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return durations, peak
+
+@scenario(
+    "message-pages",
+    "Memory and latency of reading the newest page of messages as sessions grow (needs MongoDB)",
+    option("--lengths", type=int_list, default=[100, 1000, 10000], help="Session lengths in messages"),
+    option("--limit", type=int, default=50, help="Page size"),
+    option("--runs", type=int, default=20)
+)
+async def message_pages(args):
+    from services.chat.models import ChatMessage
+    from services.chat.storage import MessageStore
+    from services.chat.storage.message_store import STORAGE_COLLECTION, STORAGE_EMBEDDED
+
+    client, db = await benchmark_db()
+    store = MessageStore(db)
+    await store.messages.create_index([("session_id", 1), ("seq", 1)], unique=True)
+    text = "Current stock of hot rolled coil by sales office and product form. " * 3
+    try:
+        for length in args.lengths:
+            for storage in (STORAGE_EMBEDDED, STORAGE_COLLECTION):
+                session = {"_id": f"{storage}-{length}", "message_storage": storage}
+                await store.sessions.insert_one(session)
+                for start in range(0, length, 1000):
+                    batch = [ChatMessage(text=text, isUser=i % 2 == 0) for i in range(start, min(length, start + 1000))]
+                    await store.append_messages(session, batch)
+
+            async def full_document():
+                # What the endpoint did before: load everything, slice in Python
+                session = await store.sessions.find_one({"_id": f"{STORAGE_EMBEDDED}-{length}"})
+                return session["messages"][-args.limit:]
+
+            def paged(storage):
+                async def read():
+                    session = await store.sessions.find_one(
+                        {"_id": f"{storage}-{length}"}, MessageStore.page_projection(limit=args.limit)
+                    )
+                    return await store.get_message_page(session, limit=args.limit)
+                return read
+
+            for name, read in (
+                ("full document", full_document),
+                ("embedded page", paged(STORAGE_EMBEDDED)),
+                ("collection page", paged(STORAGE_COLLECTION))
+            ):
+                durations, peak = await measure_peak(read, args.runs)
+                print(f"{length:>6} messages  {name:<16} peak={peak / 1024:9.1f}KiB  {format_ms(durations)}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+@scenario(
+    "stream-ttfb",
+    "Time to the first answer text with and without streaming, against a mock Azure OpenAI endpoint",
+    option("--latency", type=float, default=2.0, help="Seconds the mock takes per completion"),
+    option("--chunks", type=int, default=20, help="Deltas per streamed completion"),
+    option("--requests", type=int, default=10)
+)
+async def stream_ttfb(args):
+    from services.ai.azure_client import close_azure_client
+    from services.chat.ai_service import AIService
+
+    # A follow-up question, so neither path is answered from the response cache
+    history = [{"text": "What is our stock in Mumbai?", "isUser": True}]
+    with mock_azure(args.latency, args.chunks):
+        service = AIService()
+        try:
+            blocking, first_delta, streamed = [], [], []
+            for _ in range(args.requests):
+                started_at = time.perf_counter()
+                await service.get_ai_response(f"And in Delhi? {uuid.uuid4()}", history, session_id="benchmark")
+                blocking.append(time.perf_counter() - started_at)
+
+                started_at = time.perf_counter()
+                async for event in service.stream_ai_response(f"And in Delhi? {uuid.uuid4()}", history, session_id="benchmark"):
+                    if event["type"] == "delta" and len(first_delta) < len(streamed) + 1:
+                        first_delta.append(time.perf_counter() - started_at)
+                streamed.append(time.perf_counter() - started_at)
+        finally:
+            await close_azure_client()
+
+    print(f"mock completion {args.latency}s in {args.chunks} deltas, {args.requests} requests each")
+    print(f"get_ai_response, full answer     {format_ms(blocking)}")
+    print(f"stream_ai_response, first delta  {format_ms(first_delta)}")
+    print(f"stream_ai_response, done         {format_ms(streamed)}")
+
+@scenario(
+    "cache-lookup",
+    "Response cache lookups by hashed key as the chat_cache collection grows (needs MongoDB)",
+    option("--entries", type=int, default=1_000_000, help="Cached responses to fill in"),
+    option("--runs", type=int, default=1000, help="Hit and miss lookups by key"),
+    option("--scan-runs", type=int, default=5, help="Lookups by raw message text, which no index covers")
+)
+async def cache_lookup(args):
+    import random
+
+    from core.database import mongodb
+    from services.chat.cache.backends import MongoCacheBackend
+    from services.chat.cache.keys import build_cache_key
+
+    client, db = await benchmark_db()
+    mongodb.mongo_db = mongodb.MongoDatabase(db)
+    collection = db.chat_cache
+    backend = MongoCacheBackend()
+    response = {"text": "Hot rolled coil stock is 2375 tonnes in Mumbai.", "next_question": []}
+    try:
+        await collection.create_index("key", unique=True, partialFilterExpression={"key": {"$exists": True}})
+        for start in range(0, args.entries, 10000):
+            await collection.insert_many([
+                {"key": build_cache_key(f"question {i}"), "message": f"question {i}", "response": response,
+                 "created_at": datetime.utcnow()}
+                for i in range(start, min(args.entries, start + 10000))
+            ], ordered=False)
+
+        async def timed(lookup, count):
+            durations = []
+            for _ in range(count):
+                started_at = time.perf_counter()
+                await lookup()
+                durations.append(time.perf_counter() - started_at)
+            return durations
+
+        async def hit():
+            return await backend.get(build_cache_key(f"question {random.randrange(args.entries)}"))
+
+        async def miss():
+            return await backend.get(build_cache_key(f"unasked {uuid.uuid4()}"))
+
+        async def scan():
+            # How entries were found before keys were hashed and indexed
+            return await collection.find_one({"message": f"question {random.randrange(args.entries)}"}, {"response": 1})
+
+        print(f"{args.entries} cached responses")
+        print(f"hit by hashed key          {format_ms(await timed(hit, args.runs))}")
+        print(f"miss by hashed key         {format_ms(await timed(miss, args.runs))}")
+        print(f"hit by unindexed text      {format_ms(await timed(scan, args.scan_runs))}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+@scenario(
+    "semantic-lookup",
+    "Semantic cache search latency and persistence with a full index",
+    option("--entries", type=int, default=100_000, help="Indexed questions"),
+    option("--namespaces", type=int, default=50, help="Users/modules the questions are spread over"),
+    option("--dim", type=int, default=512, help="Embedding dimension"),
+    option("--runs", type=int, default=1000)
+)
+async def semantic_lookup(args):
+    import os
+    import random
+    import tempfile
+
+    from services.chat.cache.semantic import HashingEmbedder, SemanticIndex
+
+    offices = ["Mumbai", "Delhi", "Chennai", "Kolkata", "Pune", "Jamshedpur"]
+    products = ["hot rolled coil", "CR coil", "galvanized sheet", "wire rod", "TMT bar", "plate"]
+    metrics = ["stock", "blocked quantity", "open orders", "dispatch plan", "forecast", "lead time"]
+
+    def question(i: int) -> str:
+        return f"What is the {metrics[i % 6]} of {products[i // 6 % 6]} in {offices[i // 36 % 6]} for week {i // 216}"
+
+    index = SemanticIndex(HashingEmbedder(args.dim), args.entries, 0.85)
+    started_at = time.perf_counter()
+    for i in range(args.entries):
+        index.add(question(i), f"ns{i % args.namespaces}", f"key{i}")
+    fill = time.perf_counter() - started_at
+
+    def timed(lookup):
+        durations = []
+        for _ in range(args.runs):
+            i = random.randrange(args.entries)
+            started_at = time.perf_counter()
+            lookup(i)
+            durations.append(time.perf_counter() - started_at)
+        return durations
+
+    hits = []
+    near_duplicate = timed(lambda i: hits.append(index.search(question(i).lower() + "?", f"ns{i % args.namespaces}")))
+    other_namespace = timed(lambda i: index.search(question(i), "unknown user"))
+    embed_only = timed(lambda i: index.embedder.embed([question(i)]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "semantic.npz")
+        started_at = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - started_at
+        size = os.path.getsize(path)
+        started_at = time.perf_counter()
+        SemanticIndex(HashingEmbedder(args.dim), args.entries, 0.85).load(path)
+        loaded = time.perf_counter() - started_at
+
+    print(f"{args.entries} questions in {args.namespaces} namespaces, dim {args.dim}: "
+          f"filled in {fill:.1f}s, matrix {index._vectors.nbytes / 2**20:.0f}MiB")
+    print(f"near-duplicate search     {format_ms(near_duplicate)}  ({sum(hit is not None for hit in hits)}/{len(hits)} hits)")
+    print(f"unknown namespace search  {format_ms(other_namespace)}")
+    print(f"embedding alone           {format_ms(embed_only)}")
+    print(f"save {saved * 1000:.0f}ms ({size / 2**20:.0f}MiB), load {loaded * 1000:.0f}ms")
+
+@scenario(
+    "azure-client",
+    "Completion latency with the shared pooled Azure OpenAI client vs a new client per request",
+    option("--concurrency", type=int, default=200),
+    option("--requests", type=int, default=2000),
+    option("--latency", type=float, default=0.05, help="Seconds the mock takes per completion")
+)
+async def azure_client(args):
+    import httpx
+
+    from services.ai.azure_client import AzureOpenAIClient
+
+    deployment = settings.AZURE_DEPLOYMENT_NAME
+    payload = {"messages": [{"role": "user", "content": "What is our stock in Mumbai?"}]}
+
+    async def run(complete):
+        gate = asyncio.Semaphore(args.concurrency)
+        durations = []
+
+        async def one():
+            async with gate:
+                started_at = time.perf_counter()
+                await complete()
+                durations.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        return durations, args.requests / (time.perf_counter() - started_at)
+
+    async def per_request():
+        # How azure_openai.py called the API before the shared client
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            response = await client.post(AzureOpenAIClient._endpoint(deployment), headers=AzureOpenAIClient._headers(), json=payload)
+            response.raise_for_status()
+
+    with mock_azure(args.latency, 1):
+        results = {"new client per request": await run(per_request)}
+        for cap in (settings.AZURE_MAX_CONCURRENCY_PER_DEPLOYMENT, args.concurrency):
+            previous = settings.AZURE_MAX_CONCURRENCY_PER_DEPLOYMENT
+            settings.AZURE_MAX_CONCURRENCY_PER_DEPLOYMENT = cap
+            shared = AzureOpenAIClient()
+            try:
+                results[f"shared client, cap {cap}"] = await run(lambda: shared.chat_completion(deployment, payload))
+            finally:
+                settings.AZURE_MAX_CONCURRENCY_PER_DEPLOYMENT = previous
+                await shared.aclose()
+
+    print(f"{args.requests} completions at concurrency {args.concurrency}, mock latency {args.latency * 1000:.0f}ms (plain HTTP)")
+    for name, (durations, throughput) in results.items():
+        print(f"{name:<26} {format_ms(durations)}  {throughput:7.1f} req/s")
+
+@scenario(
+    "login-storm",
+    "Latency of an unrelated endpoint while a burst of logins is verified inline vs on the password pool",
+    option("--logins", type=int, default=100),
+    option("--rounds", type=int, default=settings.AUTH_BCRYPT_ROUNDS, help="bcrypt cost"),
+    option("--max-pending", type=int, default=settings.AUTH_HASH_MAX_PENDING, help="Queued logins before the pool answers 503"),
+    option("--interval", type=float, default=0.01, help="Seconds between probes of the unrelated endpoint")
+)
+async def login_storm(args):
+    import httpx
+    from fastapi import FastAPI, HTTPException
+    from passlib.context import CryptContext
+
+    from core.security.password_pool import PasswordHashPool, PasswordPoolFullError
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=args.rounds)
+    hashed = context.hash("correct horse")
+    pool = PasswordHashPool(max_pending=args.max_pending)
+    app = FastAPI()
+
+    @app.post("/inline")
+    async def inline():
+        # How logins were checked before the password pool
+        return {"ok": context.verify("correct horse", hashed)}
+
+    @app.post("/pool")
+    async def pooled():
+        try:
+            return {"ok": await pool.run(context.verify, "correct horse", hashed)}
+        except PasswordPoolFullError:
+            raise HTTPException(status_code=503)
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    async def storm(client, path):
+        logins = asyncio.gather(*(client.post(path) for _ in range(args.logins)))
+        probes = []
+        started_at = time.perf_counter()
+        while True:
+            # Measured from when the probe was due, so time the event loop spent
+            # blocked before it could even be sent counts against it
+            due_at = time.perf_counter() + args.interval
+            await asyncio.sleep(args.interval)
+            await client.get("/ping")
+            probes.append(time.perf_counter() - due_at)
+            if logins.done():
+                break
+        statuses = [response.status_code for response in await logins]
+        return probes, time.perf_counter() - started_at, statuses
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        try:
+            results = {path: await storm(client, path) for path in ("/inline", "/pool")}
+        finally:
+            pool.shutdown()
+
+    print(f"{args.logins} concurrent logins, bcrypt cost {args.rounds}, "
+          f"pool of {pool.max_workers} workers rejecting beyond {pool.max_pending} pending")
+    for path, (probes, elapsed, statuses) in results.items():
+        outcome = ", ".join(f"{status}: {statuses.count(status)}" for status in sorted(set(statuses)))
+        print(f"{path:<8} /ping {format_ms(probes)}  (n={len(probes)}, storm {elapsed:.1f}s, logins {outcome})")
+
+@scenario(
+    "agents-available",
+    "Concurrent agent list reads through a sync vs an async SQL session, on a local SQLite copy",
+    option("--agents", type=int, default=50, help="Agents in the catalog"),
+    option("--concurrency", type=int, default=50),
+    option("--requests", type=int, default=1000),
+    option("--latency", type=float, default=0.005, help="Seconds each query waits inside the driver, standing in for the MSSQL round-trip")
+)
+async def agents_available(args):
+    import os
+    import tempfile
+
+    import httpx
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import Session, sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    from services.agents.models import Agent
+    from services.agents.repository import AgentRepository
+    from services.agents.schemas import AgentResponse
+
+    def wait(_):
+        time.sleep(args.latency)
+        return 0
+
+    def add_wait(dbapi_connection, _):
+        # Runs wherever the driver runs: on the event loop for pysqlite, on
+        # aiosqlite's own thread for the async engine
+        dbapi_connection.create_function("network_wait", 1, wait)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "agents.db")
+        # Pools as large as the concurrency: with fewer connections the sync path
+        # deadlocks, its handlers blocking the loop while they wait for connections
+        # that only the loop can return
+        pool = dict(pool_size=args.concurrency, max_overflow=0)
+        sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, **pool)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool, **pool)
+        event.listen(sync_engine, "connect", add_wait)
+        event.listen(async_engine.sync_engine, "connect", add_wait)
+
+        # The mapped "agents" name is a view that waits once per query before reading the table
+        with sync_engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE agents_data (id INTEGER PRIMARY KEY, name VARCHAR(100), description TEXT, "
+                "status VARCHAR(20), icon VARCHAR(50), confidence FLOAT, compatibility VARCHAR(20), "
+                "type VARCHAR(50), created_at DATETIME, updated_at DATETIME, last_updated VARCHAR(20))"
+            ))
+            conn.execute(text(
+                "CREATE VIEW agents AS SELECT * FROM agents_data WHERE (SELECT network_wait(1)) = 0"
+            ))
+            conn.execute(
+                text(
+                    "INSERT INTO agents_data (name, description, status, icon, confidence, compatibility, type, last_updated) "
+                    "VALUES (:name, 'Forecasts dispatch and stock levels', 'active', 'chart', 91.5, 'high', 'analytical', '2024-03-01')"
+                ),
+                [{"name": f"Agent {i}"} for i in range(args.agents)]
+            )
+
+        sync_sessions = sessionmaker(bind=sync_engine)
+        async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        def get_sync_db():
+            db = sync_sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def get_async_session():
+            async with async_sessions() as db:
+                yield db
+
+        app = FastAPI()
+
+        @app.get("/sync", response_model=List[AgentResponse])
+        async def sync_agents(db: Session = Depends(get_sync_db)):
+            # How /agents/available read the catalog before the async session
+            return db.query(Agent).all()
+
+        @app.get("/async", response_model=List[AgentResponse])
+        async def async_agents(db: AsyncSession = Depends(get_async_session)):
+            return await AgentRepository(db).list_agents()
+
+        async def run(client, path):
+            gate = asyncio.Semaphore(args.concurrency)
+            durations = []
+
+            async def one():
+                async with gate:
+                    started_at = time.perf_counter()
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    durations.append(time.perf_counter() - started_at)
+
+            started_at = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(args.requests)))
+            return durations, args.requests / (time.perf_counter() - started_at)
+
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                results = {path: await run(client, path) for path in ("/sync", "/async")}
+        finally:
+            sync_engine.dispose()
+            await async_engine.dispose()
+
+    print(f"{args.requests} reads of {args.agents} agents at concurrency {args.concurrency}, "
+          f"{args.latency * 1000:.0f}ms per query in the driver")
+    for path, (durations, throughput) in results.items():
+        print(f"{path:<7} {format_ms(durations)}  {throughput:7.1f} req/s")
+
+@scenario(
+    "logging",
+    "Request overhead of the log records a chat turn emits, with logging off, queued and written inline",
+    option("--runs", type=int, default=5000)
+)
+async def logging_overhead(args):
+    import contextlib
+    import logging
+    import os
+    import sys
+
+    from fastapi import FastAPI
+
+    from utils import logger as log_module
+    from utils.logger import JsonFormatter, SessionLogger, UserLogger
+
+    app = FastAPI()
+
+    @app.get("/chat")
+    async def chat_turn():
+        # The records of a chat turn answered by the local data pipeline
+        UserLogger.log("1", "route", "💬 New message in session 3f2a9c1e...")
+        UserLogger.log("1", "message", "📝 Message: What is the HR coil stock in Mumbai?...")
+        SessionLogger.log("3f2a9c1e", "message", "Processing new request from user 1")
+        SessionLogger.log("3f2a9c1e", "cache", "Checking cache for response")
+        SessionLogger.log("3f2a9c1e", "cache_miss", "No cached response found")
+        SessionLogger.log("3f2a9c1e", "queue", "Request enqueued with key: 9b1c44d0...")
+        SessionLogger.log("3f2a9c1e", "process", "Waiting for response generation")
+        SessionLogger.log("3f2a9c1e", "process", "Detected data request, generating SQL query")
+        for step, message in enumerate(["Generating SQL query", "Executing query", "Generating summary", "Preparing response", "Complete"]):
+            SessionLogger.progress(step * 25, 100, message, "3f2a9c1e")
+        SessionLogger.log("3f2a9c1e", "success", "Response generated successfully", "success")
+        logging.getLogger("services.chat.processing.message_processor").info(
+            "Processed response: %s", {"text": "SELECT * FROM inventory", "table_data": {"records": [{}] * 3}}
+        )
+        SessionLogger.log("3f2a9c1e", "success", "Response successfully generated", "success")
+        UserLogger.log("1", "success", "✅ Message processed successfully", "success")
+        return {}
+
+    root = logging.getLogger()
+    previous = root.handlers, root.level
+    results = {}
+    # Records are written to /dev/null so the terminal's speed does not count
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            root.handlers = []
+            root.setLevel(logging.WARNING)
+            results["off (LOG_LEVEL=WARNING)"] = await time_asgi(app, "/chat", args.runs)
+
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(JsonFormatter())
+            root.handlers = [handler]
+            root.setLevel(logging.INFO)
+            results["JSON written inline"] = await time_asgi(app, "/chat", args.runs)
+
+            log_module.setup_logging()
+            results["JSON through the queue"] = await time_asgi(app, "/chat", args.runs)
+        finally:
+            log_module.shutdown_logging()
+            root.handlers = previous[0]
+            root.setLevel(previous[1])
+
+    print(f"{args.runs} requests emitting 17 records each (progress and cache_miss sampled at "
+          f"{settings.LOG_SAMPLE_RATES.get('progress', 1.0)}/{settings.LOG_SAMPLE_RATES.get('cache_miss', 1.0)} when queued)")
+    for name, durations in results.items():
+        print(f"{name:<25} {format_ms(durations)}")
+
+@scenario(
+    "tracing",
+    "Request overhead of a 12-span chat trace with tracing off, tail-sampled and exporting every trace",
+    option("--runs", type=int, default=5000)
+)
+async def tracing_overhead(args):
+    import os
+    import tempfile
+
+    from fastapi import FastAPI
+
+    from core import tracing
+    from core.tracing import TracingMiddleware, span
+
+    app = FastAPI()
+
+    @app.get("/chat")
+    async def chat_turn():
+        # The spans of a chat turn answered by the local data pipeline
+        with span("total"):
+            for stage in ("cache_lookup", "queue_wait", "semaphore_wait", "executor_wait"):
+                with span(stage):
+                    pass
+            with span("processing"):
+                with span("message_processor.generate", request_type="data"):
+                    pass
+            for stage in ("cache_store", "mongo_read", "mongo_write", "context_build", "serialize"):
+                with span(stage):
+                    pass
+        return {}
+
+    traced = TracingMiddleware(app)
+    previous = settings.TRACE_EXPORT_PATH, settings.TRACE_SAMPLE_RATE
+    results, exported = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        modes = [("off", "", previous[1]),
+                 (f"tail-sampled ({previous[1]:g})", os.path.join(directory, "sampled.jsonl"), previous[1]),
+                 ("every trace exported", os.path.join(directory, "all.jsonl"), 1.0)]
+        try:
+            for name, path, rate in modes:
+                settings.TRACE_EXPORT_PATH, settings.TRACE_SAMPLE_RATE = path, rate
+                tracing.TraceExporter._instance = None
+                results[name] = await time_asgi(traced, "/chat", args.runs)
+                exporter = tracing.TraceExporter.get_instance()
+                exporter.shutdown()
+                exported[name] = exporter.exported
+        finally:
+            settings.TRACE_EXPORT_PATH, settings.TRACE_SAMPLE_RATE = previous
+            tracing.TraceExporter._instance = None
+
+    print(f"{args.runs} requests with 12 spans each, exported to a local file")
+    for name, durations in results.items():
+        print(f"{name:<26} {format_ms(durations)}  ({exported[name]} traces exported)")
+
+@scenario(
+    "rate-limit",
+    "Request overhead of the API rate limiter, off and with the in-process (and optionally Redis) buckets",
+    option("--runs", type=int, default=5000),
+    option("--redis", action="store_true", help="Also measure the Redis store at REDIS_URL")
+)
+async def rate_limit_overhead(args):
+    from fastapi import FastAPI
+
+    from core.security import rate_limit
+    from core.security.auth import create_access_token
+    from core.security.rate_limit import Bucket, MemoryBucketStore, RateLimiter, RateLimitMiddleware, RedisBucketStore
+
+    app = FastAPI()
+
+    @app.get(f"{settings.API_PREFIX}/ping")
+    async def ping():
+        return {}
+
+    limited = RateLimitMiddleware(app)
+    path = f"{settings.API_PREFIX}/ping"
+    bearer = [(b"authorization", f"Bearer {create_access_token({'sub': 'planner'})}".encode())]
+
+    def install(store, enabled: bool = True) -> RateLimiter:
+        limiter = RateLimiter(store)
+        limiter.enabled = enabled
+        # Large enough that no request is rejected during the run
+        limiter.buckets["api"] = Bucket("api", 10 ** 9)
+        RateLimiter._instance = limiter
+        return limiter
+
+    results = {}
+    try:
+        install(MemoryBucketStore(), enabled=False)
+        results["off"] = await time_asgi(limited, path, args.runs)
+        install(MemoryBucketStore())
+        results["memory, anonymous"] = await time_asgi(limited, path, args.runs)
+        results["memory, bearer token"] = await time_asgi(limited, path, args.runs, bearer)
+        if args.redis:
+            limiter = install(RedisBucketStore(prefix=f"rate_limit_benchmark:{uuid.uuid4()}:"))
+            results["redis, bearer token"] = await time_asgi(limited, path, args.runs, bearer)
+            await limiter.store.client.aclose()
+    finally:
+        rate_limit.RateLimiter._instance = None
+
+    print(f"{args.runs} sequential requests")
+    for name, durations in results.items():
+        print(f"{name:<22} {format_ms(durations)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the chat, auth and agent hot paths")
+    parser.add_argument("--list", action="store_true", help="List the scenarios")
+    commands = parser.add_subparsers(dest="scenario")
+    for name, (_, help, options) in SCENARIOS.items():
+        command = commands.add_parser(name, help=help)
+        for flags, kwargs in options:
+            command.add_argument(*flags, **kwargs)
+
+    args = parser.parse_args()
+    if args.list or not args.scenario:
+        for name, (_, help, _) in SCENARIOS.items():
+            print(f"{name:<20} {help}")
+    else:
+        asyncio.run(SCENARIOS[args.scenario][0](args))
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import os
+
+from config.settings import get_settings
+from core.database.mssql import Base, async_engine, close_async_engine
+# Register the SQL models on Base.metadata
+import services.agents.models  # noqa: F401
+import services.auth.models  # noqa: F401
+
+settings = get_settings()
+
+STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+def create_static_dirs():
+    """Create the directories served under /assets"""
+    os.makedirs(os.path.join(STATIC_PATH, "assets"), exist_ok=True)
+    print(f"Static files directory ready: {STATIC_PATH}")
+
+async def create_sql_schema():
+    """Create missing MSSQL tables and indexes (should be done via migrations in production)"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    print(f"SQL schema ready: {', '.join(sorted(Base.metadata.tables))}")
+
+async def bootstrap(skip_sql: bool, with_mongo: bool):
+    """
+    Prepare databases and directories before the API workers start
+
+    Run once per deployment, e.g. as a release step or init container,
+    rather than from every worker at import time.
+    """
+    create_static_dirs()
+    if not skip_sql:
+        try:
+            await create_sql_schema()
+        finally:
+            await close_async_engine()
+    if with_mongo:
+        from init_mongodb import init_mongodb
+        await init_mongodb()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One-shot setup of databases and directories for the API")
+    parser.add_argument("--skip-sql", action="store_true", help="Do not create the MSSQL schema")
+    parser.add_argument("--with-mongo", action="store_true", help="Also create MongoDB indexes and predefined users")
+    args = parser.parse_args()
+    asyncio.run(bootstrap(args.skip_sql, args.with_mongo))
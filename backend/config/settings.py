@@ -1,5 +1,6 @@
 
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -10,6 +11,31 @@ class Settings(BaseSettings):
     API_PREFIX: str = "/api/v1"
     DEBUG: bool = False
     ENVIRONMENT: str = "production"
+    # Comma-separated planning modules to mount (e.g. "demand_planning,logistics"); empty mounts all
+    ENABLED_MODULES: str = ""
+    READINESS_TIMEOUT: float = 2.0  # Seconds each dependency gets to answer a readiness check
+    READINESS_CACHE_TTL: float = 2.0  # Seconds a readiness result is reused
+    # Comma-separated dependencies (e.g. "mssql") /ready reports but does not require
+    READINESS_OPTIONAL_CHECKS: str = ""
+    
+    # Metrics
+    METRICS_ENABLED: bool = True  # Serve Prometheus metrics at /metrics
+    METRICS_GAUGE_INTERVAL: float = 5.0  # Seconds between gauge refreshes in each worker
+    
+    # Tracing: sampled traces are written when an export path or OTLP endpoint is set
+    TRACE_EXPORT_PATH: str = ""  # File receiving one OTLP/JSON trace per line
+    TRACE_OTLP_ENDPOINT: str = ""  # OTLP/HTTP JSON endpoint, e.g. http://collector:4318/v1/traces
+    TRACE_SERVICE_NAME: str = "steel-copilot-api"
+    TRACE_SAMPLE_RATE: float = 0.01  # Fraction of ordinary requests kept
+    TRACE_SLOW_PERCENTILE: float = 99.0  # Requests at or above this latency percentile are always kept
+    TRACE_SLOW_WINDOW: int = 1000  # Recent requests the percentile is computed over
+    TRACE_EXPORT_QUEUE_SIZE: int = 1000
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" lines or "text"
+    # Fraction of info/debug records kept per event type; warnings and errors are always kept
+    LOG_SAMPLE_RATES: Dict[str, float] = {"cache_hit": 0.1, "cache_miss": 0.1, "progress": 0.1}
     
     # MSSQL Database settings
     MSSQL_SERVER: str = "localhost"
@@ -17,6 +43,11 @@ class Settings(BaseSettings):
     MSSQL_USERNAME: str = "sa"
     MSSQL_PASSWORD: str = ""
     MSSQL_DRIVER: str = "ODBC Driver 17 for SQL Server"
+    MSSQL_ASYNC_DATABASE_URL: str = ""  # Overrides the mssql+aioodbc URL built from the settings above
+    MSSQL_POOL_SIZE: int = 10
+    MSSQL_MAX_OVERFLOW: int = 20
+    MSSQL_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    MSSQL_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
     
     # MongoDB settings
     MONGODB_URI: str = "mongodb://localhost:27017"
@@ -24,21 +55,115 @@ class Settings(BaseSettings):
     MONGODB_USER_COLLECTION: str = "users"
     MONGODB_CHAT_COLLECTION: str = "chat_sessions"
     MONGODB_MESSAGE_COLLECTION: str = "chat_messages"
+    # Pool and consistency settings of the single client each worker shares
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: int = 0  # 0 keeps idle connections open
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 0  # 0 for no limit
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 0  # Max wait for a free pooled connection, 0 for no limit
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_WRITE_CONCERN: str = ""  # e.g. "majority" or "1"; empty uses the server default
+    # Per-collection overrides, e.g. {"chat_cache": {"read_preference": "secondaryPreferred", "w": "1"}}
+    MONGODB_COLLECTION_OPTIONS: Dict[str, Dict[str, str]] = {}
+    
+    # Chat message storage: "embedded" keeps messages inside the session document,
+    # "collection" stores one document per message in MONGODB_MESSAGE_COLLECTION
+    CHAT_MESSAGE_STORAGE: str = "embedded"
+    CHAT_CONTEXT_MESSAGES: int = 20  # Recent messages loaded as conversation history
+    CHAT_PREVIEW_MESSAGES: int = 5  # Messages denormalized onto the session for the sidebar
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 3000  # Prompt tokens for deployments not listed below
+    CHAT_CONTEXT_TOKEN_BUDGETS: Dict[str, int] = {}  # Per-deployment overrides, e.g. {"gpt-4": 6000}
+    CHAT_CONTEXT_RESERVED_TOKENS: int = 800  # Kept free for the system prompt and the new message
+    CHAT_SUMMARY_MODE: str = "extractive"  # "extractive" or "llm"
+    CHAT_SUMMARY_MAX_TOKENS: int = 400
     
     # Authentication
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production!
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_PRINCIPAL_CACHE_TTL: float = 30.0  # Seconds a resolved user is reused for the same token (0 disables)
+    AUTH_PRINCIPAL_CACHE_MAX: int = 10000
+    AUTH_BCRYPT_ROUNDS: int = 12  # Existing hashes with fewer rounds are upgraded on login
+    AUTH_HASH_WORKERS: int = 2  # Threads dedicated to bcrypt
+    AUTH_HASH_MAX_PENDING: int = 32  # Queued password checks before logins get 503
+    AUTH_HASH_RETRY_AFTER: int = 2  # Retry-After seconds sent with those 503 responses
     
     # Azure OpenAI
     AZURE_API_KEY: str = ""
     AZURE_API_BASE: str = ""
     AZURE_API_VERSION: str = "2023-05-15"
     AZURE_DEPLOYMENT_NAME: str = "gpt-4"
+    AZURE_HTTP2: bool = True
+    AZURE_MAX_CONNECTIONS: int = 100
+    AZURE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    AZURE_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle pooled connection is kept open
+    AZURE_TIMEOUT: float = 60.0
+    AZURE_CONNECT_TIMEOUT: float = 5.0
+    AZURE_MAX_RETRIES: int = 3  # Retries on 429/5xx and connection errors
+    AZURE_RETRY_BACKOFF_BASE: float = 0.5  # Seconds, doubled per attempt with full jitter
+    AZURE_RETRY_BACKOFF_MAX: float = 20.0  # Upper bound on any single wait, including Retry-After
+    AZURE_MAX_CONCURRENCY_PER_DEPLOYMENT: int = 32
+    
+    # Chat request queue
+    CHAT_QUEUE_MAX_DEPTH: int = 1000  # Pending requests per worker before answering 429
+    CHAT_QUEUE_RESULT_TTL: float = 60.0  # Seconds an uncollected result is kept
+    CHAT_QUEUE_RETRY_AFTER: int = 5  # Retry-After seconds sent with 429 responses
+    
+    # Adaptive limit on concurrent LLM generations per worker; requests over it get a 503
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_INITIAL_LIMIT: int = 20
+    ADMISSION_MIN_LIMIT: int = 2
+    ADMISSION_MAX_LIMIT: int = 200
+    ADMISSION_LATENCY_TOLERANCE: float = 1.5  # Recent/baseline latency ratio tolerated before the limit shrinks
+    ADMISSION_LONG_WINDOW: int = 100  # Generations the baseline latency averages over
+    ADMISSION_BACKOFF: float = 0.9  # Limit multiplier applied when a generation fails or times out
+    ADMISSION_ADMIN_RESERVE: float = 0.2  # Share of the limit only admins may use
+    ADMISSION_MAX_RETRY_AFTER: int = 30  # Upper bound of the Retry-After seconds sent with 503 responses
+    
+    # Shared thread pool for chat message processing (0 = min(32, cpu_count * 5))
+    CHAT_WORKER_POOL_SIZE: int = 0
+    
+    # Per-process chat session state
+    CHAT_SESSION_TTL: float = 1800.0  # Seconds of inactivity before a session is reaped
+    CHAT_SESSION_MAX: int = 1000  # Sessions held before least recently used ones are evicted
+    CHAT_SESSION_REAP_INTERVAL: float = 60.0
+    
+    # Response cache: in-process LRU in front of a shared "mongo" or "redis" backend
+    RESPONSE_CACHE_BACKEND: str = "mongo"
+    RESPONSE_CACHE_TTL: int = 86400  # Seconds
+    RESPONSE_CACHE_VERSION: int = 1  # Bump to invalidate every cached response, e.g. after a prompt change
+    RESPONSE_CACHE_L1_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_L1_MAX_BYTES: int = 16 * 1024 * 1024
+    REDIS_URL: str = "redis://redis:6379/0"
+    
+    # Semantic response cache: serves near-duplicate questions from the cache
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_EMBEDDER: str = "hashing"
+    SEMANTIC_CACHE_DIM: int = 512
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85  # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 20000
+    SEMANTIC_CACHE_PATH: str = ""  # .npz file the index is loaded from; every worker merges its rows into it on shutdown
+    
+    # Agent catalog cache
+    AGENT_CATALOG_POLL_INTERVAL: float = 5.0  # Seconds between checks for changes made by other workers
+    
+    # Streaming
+    ENABLE_STREAMING: bool = True
+    STREAMING_CHUNK_SIZE: int = 10  # Words per chunk when the answer is not streamed by the model
     
     # Security
     ALLOWED_ORIGINS: str = "*"  # Comma-separated list of allowed origins
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" shares buckets across workers and replicas; "memory" is per worker
+    RATE_LIMIT_PER_MINUTE: int = 60  # API requests per user (or per address when anonymous)
+    RATE_LIMIT_BURST: int = 0  # Requests allowed at once; 0 means RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_LLM_PER_MINUTE: int = 10  # Chat answers per user, charged on top of the API limit
+    RATE_LIMIT_LLM_BURST: int = 3
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 10000  # Clients tracked by the in-process buckets
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.1  # Seconds before a Redis check falls back to per-worker buckets
+    RATE_LIMIT_REDIS_RETRY: float = 5.0  # Seconds before Redis is tried again after a failure
     SSL_ENABLED: bool = False
     
     class Config:
@@ -1,27 +1,189 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
 
 import motor.motor_asyncio
+from pymongo import WriteConcern, monitoring
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
 from config.settings import get_settings
+from core.metrics import MONGO_CHECKOUT_WAIT_SECONDS
 
 settings = get_settings()
 mongo_client = None
 mongo_db = None
 
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters for the shared client
+
+    PyMongo emits pool events from the thread running the operation, so the
+    time between check-out started and checked out is the wait for a free
+    connection. A growing wait means MONGODB_MAX_POOL_SIZE is too small for
+    the load.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait_seconds = 0.0
+        self.checked_out = 0
+        self.connections = 0
+        self.pool_clears = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait = time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+        MONGO_CHECKOUT_WAIT_SECONDS.observe(wait)
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.checkout_wait_seconds += wait
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_pool_size": settings.MONGODB_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGODB_MIN_POOL_SIZE,
+            "connections": self.connections,
+            "checked_out": self.checked_out,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "avg_checkout_wait_ms": round(self.checkout_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_checkout_wait_ms": round(self.max_checkout_wait_seconds * 1000, 3),
+            "pool_clears": self.pool_clears
+        }
+
+pool_metrics = PoolMetrics()
+
+def _read_preference(name: str):
+    return make_read_preference(read_pref_mode_from_name(name), None)
+
+def _w(value: str):
+    # Write concern is a node count ("1") or a mode name ("majority")
+    return int(value) if value.isdigit() else value
+
+def _ms(value: int) -> Optional[int]:
+    # 0 in settings means "no limit", which PyMongo spells None
+    return value or None
+
+def create_mongo_client(**overrides) -> motor.motor_asyncio.AsyncIOMotorClient:
+    """
+    Create a Motor client with the pool, timeout and consistency settings
+
+    The API holds one client per worker (see connect_to_mongo); scripts such
+    as init_mongodb.py create their own with this function.
+    """
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": _ms(settings.MONGODB_MAX_IDLE_TIME_MS),
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": _ms(settings.MONGODB_SOCKET_TIMEOUT_MS),
+        "waitQueueTimeoutMS": _ms(settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS),
+        "readPreference": settings.MONGODB_READ_PREFERENCE,
+        "event_listeners": [pool_metrics]
+    }
+    if settings.MONGODB_WRITE_CONCERN:
+        options["w"] = _w(settings.MONGODB_WRITE_CONCERN)
+    options.update(overrides)
+    return motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URI, **options)
+
+class MongoDatabase:
+    """
+    Database handle that applies MONGODB_COLLECTION_OPTIONS
+
+    Collections are reached as ``db[name]`` or ``db.name`` like on a Motor
+    database, but come back with their configured read preference and write
+    concern. Everything else is passed through to the Motor database.
+    """
+
+    def __init__(self, database: motor.motor_asyncio.AsyncIOMotorDatabase):
+        self.database = database
+        self._collections: Dict[str, motor.motor_asyncio.AsyncIOMotorCollection] = {}
+
+    def __getitem__(self, name: str) -> motor.motor_asyncio.AsyncIOMotorCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            options = settings.MONGODB_COLLECTION_OPTIONS.get(name, {})
+            kwargs = {}
+            if options.get("read_preference"):
+                kwargs["read_preference"] = _read_preference(options["read_preference"])
+            if options.get("w"):
+                kwargs["write_concern"] = WriteConcern(w=_w(str(options["w"])))
+            collection = self.database.get_collection(name, **kwargs)
+            self._collections[name] = collection
+        return collection
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.database, name)
+        if isinstance(attr, motor.motor_asyncio.AsyncIOMotorCollection):
+            return self[name]
+        return attr
+
 async def connect_to_mongo():
     """
     Connect to MongoDB and initialize global client and database variables
+
+    The client connects lazily and reconnects on its own, so an unreachable
+    server is reported here and by /ready instead of failing start-up.
     """
     global mongo_client, mongo_db
+    # Connect to MongoDB using URI from settings
+    mongo_client = create_mongo_client()
+    mongo_db = MongoDatabase(mongo_client[settings.MONGODB_DATABASE])
+
     try:
-        # Connect to MongoDB using URI from settings
-        mongo_client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URI)
-        mongo_db = mongo_client[settings.MONGODB_DATABASE]
-        
-        # Test connection by getting server info
-        await mongo_client.admin.command('ping')
+        # Test connection without holding up start-up for the full server selection timeout
+        await ping_mongo(settings.READINESS_TIMEOUT)
         print(f"✅ Connected to MongoDB: {settings.MONGODB_DATABASE}")
     except Exception as e:
-        print(f"❌ Failed to connect to MongoDB: {str(e)}")
-        raise
+        print(f"❌ MongoDB not reachable yet: {str(e) or type(e).__name__}")
+
+async def ping_mongo(timeout: float):
+    """Round-trip to the MongoDB server, raising if it does not answer within timeout seconds"""
+    if mongo_client is None:
+        raise Exception("MongoDB connection not initialized")
+    await asyncio.wait_for(mongo_client.admin.command('ping'), timeout)
 
 async def close_mongo_connection():
     """
@@ -35,10 +197,14 @@ async def close_mongo_connection():
 def get_mongo_db():
     """
     Get MongoDB database instance
-    
+
     Returns:
-        Database: MongoDB database instance
+        MongoDatabase: MongoDB database instance
     """
     if mongo_db is None:
         raise Exception("MongoDB connection not initialized")
     return mongo_db
+
+def get_mongo_stats() -> Dict[str, Any]:
+    """Connection pool counters of the shared client"""
+    return pool_metrics.stats()
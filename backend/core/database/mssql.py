@@ -1,5 +1,7 @@
+import asyncio
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config.settings import get_settings
@@ -13,14 +15,40 @@ SQLALCHEMY_DATABASE_URL = (
     f"driver={settings.MSSQL_DRIVER}"
 )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=settings.DEBUG)
+# Same database through aioodbc, unless overridden (e.g. sqlite+aiosqlite:///./dev.db for local runs)
+SQLALCHEMY_ASYNC_DATABASE_URL = settings.MSSQL_ASYNC_DATABASE_URL or (
+    f"mssql+aioodbc://{settings.MSSQL_USERNAME}:{settings.MSSQL_PASSWORD}@"
+    f"{settings.MSSQL_SERVER}/{settings.MSSQL_DATABASE}?"
+    f"driver={settings.MSSQL_DRIVER}"
+)
+
+def _pool_options(url: str) -> dict:
+    """Connection pool settings shared by the sync and async engines"""
+    options = {"pool_pre_ping": True, "pool_recycle": settings.MSSQL_POOL_RECYCLE}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.MSSQL_POOL_SIZE,
+            max_overflow=settings.MSSQL_MAX_OVERFLOW,
+            pool_timeout=settings.MSSQL_POOL_TIMEOUT
+        )
+    return options
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=settings.DEBUG, **_pool_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    SQLALCHEMY_ASYNC_DATABASE_URL,
+    echo=settings.DEBUG,
+    **_pool_options(SQLALCHEMY_ASYNC_DATABASE_URL)
+)
+# Objects stay usable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     """
     Dependency function to get a DB session
-    
+
     Yields:
         Session: SQLAlchemy database session
     """
@@ -29,3 +57,27 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    Dependency function to get an async DB session
+
+    Use this from async route handlers so database round-trips do not
+    block the event loop.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def ping_mssql(timeout: float):
+    """Round-trip to the SQL server, raising if it does not answer within timeout seconds"""
+    async def _ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    await asyncio.wait_for(_ping(), timeout)
+
+async def close_async_engine():
+    """Dispose of the async connection pool on shutdown"""
+    await async_engine.dispose()
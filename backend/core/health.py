@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.settings import get_settings
+from core.database.mongodb import ping_mongo
+from core.database.mssql import ping_mssql
+
+settings = get_settings()
+
+class Readiness:
+    """
+    Tracks whether this worker can serve traffic
+
+    A worker is ready once its lifespan start-up has finished and every
+    dependency answers within READINESS_TIMEOUT. Checks run concurrently
+    and the result is reused for READINESS_CACHE_TTL seconds, so frequent
+    probes from the orchestrator do not turn into database load.
+    Dependencies listed in READINESS_OPTIONAL_CHECKS are still checked and
+    reported, but a failure does not make the worker unready.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.started = False
+        self.checks: Dict[str, Callable[[float], Awaitable[Any]]] = {
+            "mongodb": ping_mongo,
+            "mssql": ping_mssql
+        }
+        self.optional = {name.strip() for name in settings.READINESS_OPTIONAL_CHECKS.split(",") if name.strip()}
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def mark_started(self):
+        self.started = True
+
+    def mark_stopping(self):
+        """Report not ready while the worker drains on shutdown"""
+        self.started = False
+        self._result = None
+
+    async def _run_check(self, check: Callable[[float], Awaitable[Any]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await check(settings.READINESS_TIMEOUT)
+            status = {"status": "ok"}
+        except asyncio.TimeoutError:
+            status = {"status": "error", "error": "timeout"}
+        except Exception as e:
+            # /ready is unauthenticated, so only the error type is reported
+            self.logger.warning(f"Readiness check failed: {e}")
+            status = {"status": "error", "error": type(e).__name__}
+        status["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return status
+
+    async def check(self) -> Dict[str, Any]:
+        """Return the per-dependency status, running the checks if the cached result is stale"""
+        if self._result is not None and time.monotonic() - self._checked_at < settings.READINESS_CACHE_TTL:
+            return self._result
+
+        async with self._lock:
+            # Another probe may have refreshed the result while we waited
+            if self._result is not None and time.monotonic() - self._checked_at < settings.READINESS_CACHE_TTL:
+                return self._result
+
+            names = list(self.checks)
+            results = await asyncio.gather(*(self._run_check(self.checks[name]) for name in names))
+            checks = dict(zip(names, results))
+            for name in self.optional & checks.keys():
+                checks[name]["optional"] = True
+            checks["startup"] = {"status": "ok" if self.started else "error"}
+            result = {
+                "ready": all(status["status"] == "ok" or status.get("optional") for status in checks.values()),
+                "checks": checks
+            }
+            if self.started:
+                self._result = result
+                self._checked_at = time.monotonic()
+            return result
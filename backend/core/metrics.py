@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+from config.settings import get_settings
+from core.tracing import add_span, span
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Under gunicorn every worker writes its samples to files in this directory
+# and /metrics merges them, whichever worker answers the scrape
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+if MULTIPROCESS:
+    # gunicorn.conf.py creates it for the server, but one-off scripts
+    # (bootstrap.py, migrations) import this module without gunicorn
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# Chat stages take from under a millisecond (cache lookups) to tens of seconds (LLM calls)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CHAT_STAGES = [
+    "total",           # AIService.get_ai_response end to end
+    "cache_lookup",    # Exact and semantic cache lookups
+    "prompt_build",    # Fitting the conversation into the token budget
+    "queue_wait",      # Enqueued until the processor picked the request up
+    "semaphore_wait",  # Waiting for the session's in-flight slot
+    "executor_wait",   # Waiting for a worker pool slot
+    "processing",      # Running on the worker pool
+    "llm",             # Azure OpenAI completion
+    "cache_store",     # Writing the response to the cache
+    "mongo_write"      # Persisting chat messages
+]
+
+CHAT_STAGE_SECONDS = Histogram(
+    "chat_stage_duration_seconds",
+    "Time spent in each stage of a chat request",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+CHAT_CACHE_LOOKUPS = Counter(
+    "chat_cache_lookups_total",
+    "Chat response cache lookups",
+    ["result"]
+)
+CHAT_ADMISSION_REJECTIONS = Counter(
+    "chat_admission_rejections_total",
+    "Chat requests answered 503 because the LLM concurrency limit was reached",
+    ["lane"]
+)
+MONGO_CHECKOUT_WAIT_SECONDS = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time waiting for a MongoDB connection from the pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+# Summed over live workers in multiprocess mode
+CHAT_QUEUE_DEPTH = Gauge("chat_queue_depth", "Chat requests enqueued but not yet processed", multiprocess_mode="livesum")
+EXECUTOR_ACTIVE = Gauge("chat_executor_active_workers", "Worker pool threads busy with chat processing", multiprocess_mode="livesum")
+EXECUTOR_QUEUE_DEPTH = Gauge("chat_executor_queue_depth", "Chat requests waiting for a worker pool thread", multiprocess_mode="livesum")
+EXECUTOR_MAX_WORKERS = Gauge("chat_executor_max_workers", "Worker pool size", multiprocess_mode="livesum")
+SESSIONS_ACTIVE = Gauge("chat_sessions_active", "Chat sessions with in-memory state", multiprocess_mode="livesum")
+ADMISSION_LIMIT = Gauge("chat_admission_limit", "Adaptive limit on concurrent LLM generations", multiprocess_mode="livesum")
+ADMISSION_INFLIGHT = Gauge("chat_admission_inflight", "LLM generations in progress", multiprocess_mode="livesum")
+
+# Label children bound on first use, so the hot path skips the label lookup;
+# in multiprocess mode binding one opens its sample file, so nothing is bound at import
+_stage_children: Dict[str, Histogram] = {}
+_cache_children: Dict[str, Counter] = {}
+
+# Gauge and the callable returning its current value; registered by the owning modules
+_gauge_sources: List[Tuple[Gauge, Callable[[], float]]] = []
+
+def _stage_child(stage: str) -> Histogram:
+    child = _stage_children.get(stage)
+    if child is None:
+        if stage not in CHAT_STAGES:
+            raise KeyError(f"Unknown chat stage: {stage}")
+        child = _stage_children[stage] = CHAT_STAGE_SECONDS.labels(stage)
+    return child
+
+def observe_stage(stage: str, seconds: float, **attributes):
+    """Record how long a chat stage took, and add it to the current trace"""
+    _stage_child(stage).observe(seconds)
+    add_span(f"chat.{stage}", seconds, **attributes)
+
+@contextmanager
+def time_stage(stage: str, **attributes):
+    """Time the enclosed block as a chat stage and as a span of the current trace"""
+    with span(f"chat.{stage}", **attributes) as stage_span:
+        start = time.perf_counter()
+        try:
+            yield stage_span
+        finally:
+            _stage_child(stage).observe(time.perf_counter() - start)
+
+def count_cache_lookup(hit: bool):
+    result = "hit" if hit else "miss"
+    child = _cache_children.get(result)
+    if child is None:
+        child = _cache_children[result] = CHAT_CACHE_LOOKUPS.labels(result)
+    child.inc()
+
+def register_gauge(gauge: Gauge, source: Callable[[], float]):
+    """Keep a gauge in sync with a value owned by another component"""
+    _gauge_sources.append((gauge, source))
+
+def update_gauges():
+    for gauge, source in _gauge_sources:
+        try:
+            gauge.set(source())
+        except Exception as e:
+            logger.warning(f"Could not update gauge {gauge._name}: {e}")
+
+async def run_gauge_updater(interval: float = 0):
+    """
+    Refresh the gauges of this worker periodically
+
+    In multiprocess mode the scrape is answered by one worker only, so each
+    worker publishes its own values on a timer rather than on scrape.
+    """
+    interval = interval or settings.METRICS_GAUGE_INTERVAL
+    while True:
+        update_gauges()
+        await asyncio.sleep(interval)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition-format body and content type for /metrics"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        update_gauges()
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,21 +1,30 @@
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from config.settings import get_settings
-from core.database.mssql import get_db
+from core.database.mssql import get_async_db
 from core.database.mongodb import get_mongo_db
 from services.auth.models import User
+from core.security.password_pool import PasswordHashPool
+from core.security.principal_cache import PrincipalCache
 
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below the configured cost are flagged by verify_and_update and upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.AUTH_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.AUTH_BCRYPT_ROUNDS
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_PREFIX}/auth/token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -26,6 +35,25 @@ def get_password_hash(password: str) -> str:
     """Generate a password hash"""
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    """Generate a password hash on the password hashing pool"""
+    return await PasswordHashPool.get_instance().run(pwd_context.hash, password, reject_when_full=False)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a login password on the password hashing pool
+    
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matched, and a new hash
+        to store when the existing one uses outdated cost parameters
+    
+    Raises:
+        PasswordPoolFullError: If too many logins are already being checked
+    """
+    return await PasswordHashPool.get_instance().run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -44,12 +72,15 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo_db)
 ) -> Union[User, Dict[str, Any]]:
     """
     Get the current authenticated user from JWT token
     
+    Resolved users are kept in the PrincipalCache for a few seconds, so
+    bursts of requests with the same token skip decoding and the user lookup.
+    
     Args:
         token: JWT token
         db: SQL Database session
@@ -67,6 +98,11 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    principal_cache = PrincipalCache.get_instance()
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
@@ -76,16 +112,22 @@ async def get_current_user(
         raise credentials_exception
         
     # Try to fetch user from MongoDB first (primary datastore)
+    principal_cache.record_lookup("mongo")
     mongo_user = await mongo_db.users.find_one({"username": username})
     if mongo_user:
         # Return MongoDB user dict
-        return mongo_user
+        principal_cache.set(token, username, mongo_user, payload.get("exp"))
+        return dict(mongo_user)
             
     # If not found in MongoDB, try SQL database
-    sql_user = db.query(User).filter(User.username == username).first()
+    principal_cache.record_lookup("sql")
+    sql_user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if sql_user is None:
         raise credentials_exception
-        
+    
+    # Detach so the cached instance does not keep this request's session alive
+    db.expunge(sql_user)
+    principal_cache.set(token, username, sql_user, payload.get("exp"))
     return sql_user
 
 async def get_current_active_user(current_user: Union[User, Dict[str, Any]] = Depends(get_current_user)) -> Union[User, Dict[str, Any]]:
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from config.settings import get_settings
+
+settings = get_settings()
+
+class PasswordPoolFullError(Exception):
+    """Raised when too many password checks are already waiting"""
+
+    def __init__(self, pending: int, retry_after: int):
+        super().__init__(f"Password hashing pool is full ({pending} pending)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+class PasswordHashPool:
+    """
+    Dedicated, bounded thread pool for bcrypt
+
+    bcrypt spends a few hundred milliseconds of CPU per call with the GIL
+    released, so running it here keeps the event loop responsive during a
+    burst of logins. The pool is separate from the default executor so a
+    login storm cannot starve other offloaded work, and logins are rejected
+    once AUTH_HASH_MAX_PENDING calls are queued instead of piling up.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, max_workers: int = 0, max_pending: int = 0):
+        self.max_workers = max_workers or settings.AUTH_HASH_WORKERS
+        self.max_pending = max_pending or settings.AUTH_HASH_MAX_PENDING
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def pending(self) -> int:
+        """Calls queued or running on the pool"""
+        return self._pending
+
+    async def run(self, func: Callable[..., Any], *args, reject_when_full: bool = True) -> Any:
+        """
+        Run a hashing function on the pool
+
+        Args:
+            func: Blocking function to run
+            reject_when_full: Raise PasswordPoolFullError instead of queueing
+                when the pool is saturated; used for logins, while admin
+                operations such as creating users simply wait their turn
+        """
+        if reject_when_full and self._pending >= self.max_pending:
+            self._rejected += 1
+            self.logger.warning(f"Rejecting password check, {self._pending} already pending")
+            raise PasswordPoolFullError(self._pending, settings.AUTH_HASH_RETRY_AFTER)
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
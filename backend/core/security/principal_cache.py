@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from config.settings import get_settings
+
+settings = get_settings()
+
+class PrincipalCache:
+    """
+    Short-lived, per-process cache of resolved users keyed by access token
+
+    A hit skips both JWT decoding and the user lookup in MongoDB/MSSQL.
+    Entries never outlive the token's own expiry. Changes made through
+    MongoDBUserService invalidate the affected user in this process; other
+    worker processes pick the change up once AUTH_PRINCIPAL_CACHE_TTL
+    expires, which bounds how long a revoked permission can linger.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = settings.AUTH_PRINCIPAL_CACHE_TTL if ttl is None else ttl
+        self.max_entries = settings.AUTH_PRINCIPAL_CACHE_MAX if max_entries is None else max_entries
+        # token -> (username, user, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, Any, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._mongo_lookups = 0
+        self._sql_lookups = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, token: str) -> Optional[Any]:
+        """Return the cached user for a token, or None"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry[2] <= time.monotonic():
+            self._remove(token)
+            self._misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self._hits += 1
+        user = entry[1]
+        # Hand out copies of MongoDB documents so a request cannot alter the cached one
+        return dict(user) if isinstance(user, dict) else user
+
+    def set(self, token: str, username: str, user: Any, token_expires_at: Optional[float] = None):
+        """Cache a resolved user; token_expires_at is the token's "exp" as a Unix timestamp"""
+        if not self.enabled:
+            return
+        ttl = self.ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+            if ttl <= 0:
+                return
+        self._remove(token)
+        self._entries[token] = (username, user, time.monotonic() + ttl)
+        self._tokens_by_user.setdefault(username, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def record_lookup(self, source: str):
+        """Count a user lookup that reached the database ("mongo" or "sql")"""
+        if source == "mongo":
+            self._mongo_lookups += 1
+        else:
+            self._sql_lookups += 1
+
+    def invalidate_user(self, username: str):
+        """Drop every cached token of a user, e.g. after their permissions change"""
+        tokens = self._tokens_by_user.pop(username, set())
+        for token in tokens:
+            self._entries.pop(token, None)
+        self._invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and the database lookups it avoided"""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "db_lookups_avoided": self._hits,
+            "mongo_lookups": self._mongo_lookups,
+            "sql_lookups": self._sql_lookups,
+            "invalidations": self._invalidations
+        }
@@ -0,0 +1,265 @@
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from jose import JWTError, jwt
+
+from config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Atomic token bucket: refill from the elapsed time, then take ``cost`` tokens.
+# Uses the Redis clock so workers and replicas agree on elapsed time. Returns
+# the seconds until enough tokens are available, 0 when the request is allowed.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+class RateLimitedError(Exception):
+    """Raised when a client has used up a rate limit bucket"""
+
+    def __init__(self, bucket: str, retry_after: int):
+        super().__init__(f"Rate limit exceeded for {bucket} requests")
+        self.bucket = bucket
+        self.retry_after = retry_after
+
+class Bucket:
+    """Token bucket parameters: burst capacity and refill rate in tokens per second"""
+
+    def __init__(self, name: str, per_minute: int, burst: int = 0):
+        self.name = name
+        self.capacity = float(burst or per_minute)
+        self.rate = per_minute / 60.0
+
+class MemoryBucketStore:
+    """
+    Token buckets held in this process
+
+    Limits apply per worker, so this is meant for tests, local development
+    and as the fallback while Redis is unreachable. The least recently used
+    buckets are dropped beyond max_keys.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 0):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MEMORY_MAX_KEYS
+        # key -> [tokens, last refill time]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def take(self, key: str, bucket: Bucket, cost: float) -> float:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        if state is None:
+            state = [bucket.capacity, now]
+            self._buckets[key] = state
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            state[0] = min(bucket.capacity, state[0] + (now - state[1]) * bucket.rate)
+            state[1] = now
+        if state[0] >= cost:
+            state[0] -= cost
+            return 0.0
+        return (cost - state[0]) / bucket.rate
+
+class RedisBucketStore:
+    """
+    Token buckets shared by every worker and replica through Redis
+
+    Each check is a single round trip running _TOKEN_BUCKET_LUA. Any client
+    exposing the redis.asyncio register_script interface can be passed in.
+    """
+
+    name = "redis"
+
+    def __init__(self, client=None, prefix: str = "rate_limit:"):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+                socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT
+            )
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    async def take(self, key: str, bucket: Bucket, cost: float) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[bucket.capacity, bucket.rate, cost])
+        return float(wait)
+
+class RateLimiter:
+    """
+    Per-client token buckets
+
+    Two buckets are defined: "api" for every request under API_PREFIX
+    (RATE_LIMIT_PER_MINUTE) and a much smaller "llm" bucket for requests
+    that generate a chat answer (RATE_LIMIT_LLM_PER_MINUTE). Clients are
+    identified by the JWT subject, falling back to the remote address for
+    anonymous requests. With RATE_LIMIT_BACKEND=redis the buckets are
+    shared across workers and replicas; if Redis fails, this worker keeps
+    limiting with its own buckets and tries Redis again after
+    RATE_LIMIT_REDIS_RETRY seconds.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, store=None):
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.buckets = {
+            "api": Bucket("api", settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST),
+            "llm": Bucket("llm", settings.RATE_LIMIT_LLM_PER_MINUTE, settings.RATE_LIMIT_LLM_BURST)
+        }
+        if store is None:
+            store = RedisBucketStore() if settings.RATE_LIMIT_BACKEND.lower() == "redis" else MemoryBucketStore()
+        self.store = store
+        self._fallback = MemoryBucketStore()
+        self._store_healthy = True
+        self._store_retry_at = 0.0
+        self._allowed = {name: 0 for name in self.buckets}
+        self._limited = {name: 0 for name in self.buckets}
+        self._store_errors = 0
+        # token -> (subject, expires_at); decoded tokens are cached like in PrincipalCache
+        self._subjects: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    async def check(self, key: str, bucket_name: str, cost: float = 1.0):
+        """Take cost tokens from the client's bucket, raising RateLimitedError if there are not enough"""
+        if not self.enabled:
+            return
+        bucket = self.buckets[bucket_name]
+        bucket_key = f"{bucket_name}:{key}"
+        if self._store_healthy or time.monotonic() >= self._store_retry_at:
+            try:
+                wait = await self.store.take(bucket_key, bucket, cost)
+                if not self._store_healthy:
+                    self._store_healthy = True
+                    logger.info(f"Rate limit store {self.store.name} is back")
+            except Exception as e:
+                self._store_errors += 1
+                self._store_retry_at = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY
+                if self._store_healthy:
+                    self._store_healthy = False
+                    logger.warning(f"Rate limit store {self.store.name} failed, limiting per worker: {e}")
+                wait = await self._fallback.take(bucket_key, bucket, cost)
+        else:
+            wait = await self._fallback.take(bucket_key, bucket, cost)
+
+        if wait > 0:
+            self._limited[bucket_name] += 1
+            raise RateLimitedError(bucket_name, max(1, math.ceil(wait)))
+        self._allowed[bucket_name] += 1
+
+    def token_key(self, token: str) -> Optional[str]:
+        """Client key for a bearer token, or None if the token is not valid"""
+        entry = self._subjects.get(token)
+        if entry is not None and entry[1] > time.time():
+            return entry[0]
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        subject = payload.get("sub")
+        if subject is None:
+            return None
+        key = f"user:{subject}"
+        self._subjects[token] = (key, payload.get("exp") or time.time() + 60)
+        if len(self._subjects) > settings.RATE_LIMIT_MEMORY_MAX_KEYS:
+            self._subjects.popitem(last=False)
+        return key
+
+    def client_key(self, scope) -> str:
+        """Client key for an ASGI request: the JWT subject if authenticated, else the remote address"""
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    key = self.token_key(token)
+                    if key is not None:
+                        return key
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": self.store.name,
+            "store_healthy": self._store_healthy,
+            "store_errors": self._store_errors,
+            "buckets": {
+                name: {
+                    "per_minute": round(bucket.rate * 60),
+                    "burst": int(bucket.capacity),
+                    "allowed": self._allowed[name],
+                    "limited": self._limited[name]
+                }
+                for name, bucket in self.buckets.items()
+            }
+        }
+
+async def limit_llm_requests(request: Request):
+    """Route dependency charging the caller's "llm" bucket"""
+    limiter = RateLimiter.get_instance()
+    await limiter.check(limiter.client_key(request.scope), "llm")
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware charging the "api" bucket for every HTTP request under API_PREFIX
+
+    Health checks, metrics and static files are not limited. Rejected
+    requests get a 429 with Retry-After.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limiter = RateLimiter.get_instance()
+        if scope["type"] != "http" or not limiter.enabled or not scope["path"].startswith(settings.API_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.check(limiter.client_key(scope), "api")
+        except RateLimitedError as e:
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", str(e.retry_after).encode())]
+            })
+            await send({
+                "type": "http.response.body",
+                "body": json.dumps({"detail": "Too many requests. Please retry shortly."}).encode()
+            })
+            return
+        await self.app(scope, receive, send)
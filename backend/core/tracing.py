@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+class Span:
+    """A timed, attributed unit of work within a trace"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None, start_ns: int = 0):
+        self.trace = trace
+        self.name = name
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: Any):
+        self.error = str(error) or type(error).__name__
+
+    def end(self, end_ns: int = 0):
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.add(self)
+
+class _NoopSpan:
+    """Stands in for a span when no trace is active, so callers need no checks"""
+
+    trace = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: Any):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """Spans of one request, collected until the root span ends"""
+
+    def __init__(self):
+        self.trace_id = "%032x" % random.getrandbits(128)
+        self.spans: List[Span] = []
+        self.closed = False
+
+    def add(self, span: Span):
+        # Work that outlives the request (e.g. a shared generation) is not exported
+        if not self.closed:
+            self.spans.append(span)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span():
+    """The innermost active span, or a no-op span outside a trace"""
+    return _current_span.get() or NOOP_SPAN
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the enclosed block as a child of the current span
+
+    Does nothing outside a trace. The context is carried into tasks created
+    with asyncio.create_task automatically, and into executor threads by
+    running the job under contextvars.copy_context().
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+def add_span(name: str, seconds: float, **attributes):
+    """Record a child span for a wait that was measured rather than wrapped"""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    end_ns = time.time_ns()
+    Span(parent.trace, name, parent.span_id, attributes=attributes, start_ns=end_ns - int(seconds * 1e9)).end(end_ns)
+
+class TailSampler:
+    """
+    Decides which finished traces are exported
+
+    Errors and traces at or above the TRACE_SLOW_PERCENTILE of recent
+    durations are always kept; the rest are kept with probability
+    TRACE_SAMPLE_RATE. The threshold is recomputed every 100 traces from
+    the last TRACE_SLOW_WINDOW durations.
+    """
+
+    def __init__(self, percentile: float = 0, window: int = 0, rate: Optional[float] = None):
+        self.percentile = percentile or settings.TRACE_SLOW_PERCENTILE
+        self.rate = settings.TRACE_SAMPLE_RATE if rate is None else rate
+        self._durations: Deque[int] = deque(maxlen=window or settings.TRACE_SLOW_WINDOW)
+        self._threshold_ns = 0
+        self._since_update = 0
+
+    def keep(self, duration_ns: int, error: bool) -> bool:
+        self._durations.append(duration_ns)
+        self._since_update += 1
+        if self._since_update >= 100 or not self._threshold_ns:
+            self._update_threshold()
+        return error or duration_ns >= self._threshold_ns or random.random() < self.rate
+
+    def _update_threshold(self):
+        self._since_update = 0
+        durations = sorted(self._durations)
+        index = min(len(durations) - 1, int(len(durations) * self.percentile / 100))
+        self._threshold_ns = durations[index]
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+def to_otlp(trace: Trace) -> Dict[str, Any]:
+    """Encode a trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for item in trace.spans:
+        encoded = {
+            "traceId": trace.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": item.kind,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": _otlp_attributes(item.attributes),
+            "status": {"code": STATUS_ERROR, "message": item.error} if item.error else {"code": STATUS_UNSET}
+        }
+        if item.parent_id:
+            encoded["parentSpanId"] = item.parent_id
+        spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": settings.TRACE_SERVICE_NAME, "process.pid": os.getpid()})},
+            "scopeSpans": [{"scope": {"name": "core.tracing"}, "spans": spans}]
+        }]
+    }
+
+class TraceExporter:
+    """
+    Writes sampled traces from a background thread
+
+    Each trace is appended to TRACE_EXPORT_PATH as one OTLP/JSON line and/or
+    POSTed to the OTLP/HTTP endpoint TRACE_OTLP_ENDPOINT (e.g.
+    http://collector:4318/v1/traces). Traces are dropped rather than queued
+    without bound when the sink falls behind.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.enabled = bool(settings.TRACE_EXPORT_PATH or settings.TRACE_OTLP_ENDPOINT)
+        self.sampler = TailSampler()
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=settings.TRACE_EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def submit(self, trace: Trace, duration_ns: int, error: bool):
+        """Hand a finished trace to the sampler and, if kept, to the export thread"""
+        if not self.sampler.keep(duration_ns, error):
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        client = None
+        if settings.TRACE_OTLP_ENDPOINT:
+            import httpx
+            client = httpx.Client(timeout=5.0)
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                break
+            try:
+                payload = to_otlp(trace)
+                if settings.TRACE_EXPORT_PATH:
+                    with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as sink:
+                        sink.write(json.dumps(payload) + "\n")
+                if client is not None:
+                    client.post(settings.TRACE_OTLP_ENDPOINT, json=payload)
+                self.exported += 1
+            except Exception as e:
+                self.dropped += 1
+                logger.warning(f"Trace export failed: {e}")
+        if client is not None:
+            client.close()
+
+    def shutdown(self):
+        """Flush queued traces and stop the export thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "slow_threshold_ms": round(self.sampler._threshold_ns / 1e6, 3),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize()
+        }
+
+@contextmanager
+def start_trace(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """
+    Open a root span for a unit of work (an HTTP request, a WebSocket message)
+
+    On exit the trace is offered to the tail sampler. Does nothing when no
+    export sink is configured or a trace is already active.
+    """
+    exporter = TraceExporter.get_instance()
+    if not exporter.enabled or _current_span.get() is not None:
+        yield NOOP_SPAN
+        return
+
+    trace = Trace()
+    root = Span(trace, name, None, kind=kind, attributes=attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+        trace.closed = True
+        exporter.submit(trace, root.end_ns - root.start_ns, any(item.error for item in trace.spans))
+
+class TracingMiddleware:
+    """
+    ASGI middleware tracing every HTTP request
+
+    The root span covers the whole response, streaming bodies included, and
+    the trace ID is returned in the X-Trace-Id header. The span is named after
+    the matched route template ("GET /api/chat/sessions/{session_id}") so
+    requests group by endpoint; the concrete path is kept in http.target.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TraceExporter.get_instance().enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with start_trace(scope["method"], kind=SPAN_KIND_SERVER,
+                         **{"http.method": scope["method"], "http.target": scope["path"]}) as root:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    root.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        root.record_error(f"HTTP {status_code}")
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", root.trace.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                # The router records the matched route in the scope; unmatched paths keep the bare method
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f'{scope["method"]} {route}'
+                    root.set_attribute("http.route", route)
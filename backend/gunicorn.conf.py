@@ -0,0 +1,19 @@
+import glob
+import os
+
+# Loaded automatically by gunicorn from the working directory; the Dockerfile
+# command line still sets workers, bind address and timeout.
+
+def on_starting(server):
+    """Drop metric files left behind by a previous run"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+def child_exit(server, worker):
+    """Stop counting a dead worker's live gauges"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
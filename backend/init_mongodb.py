@@ -1,16 +1,37 @@
 
 import asyncio
-import motor.motor_asyncio
 from datetime import datetime
 from core.security.auth import get_password_hash
 from config.settings import get_settings
+from core.database.mongodb import create_mongo_client
 
 settings = get_settings()
 
+async def drop_index_if_exists(collection, name: str):
+    """Drop an index created by an earlier version of this script"""
+    if name in await collection.index_information():
+        await collection.drop_index(name)
+        print(f"Dropped index {name} on {collection.name}")
+
+async def ensure_ttl_index(collection, field: str, seconds: int):
+    """
+    Create a TTL index on field, replacing one with a different expiry
+
+    create_index fails with IndexOptionsConflict when an index on the same
+    key already exists with other options, e.g. after RESPONSE_CACHE_TTL
+    changed or on databases indexed before the TTL was introduced.
+    """
+    name = f"{field}_1"
+    existing = (await collection.index_information()).get(name)
+    if existing is not None and existing.get("expireAfterSeconds") != seconds:
+        await collection.drop_index(name)
+        print(f"Dropped index {name} on {collection.name} to change its expiry to {seconds}s")
+    await collection.create_index(field, expireAfterSeconds=seconds)
+
 async def init_mongodb():
     """Initialize MongoDB with predefined users and collections."""
     print(f"Connecting to MongoDB at: {settings.MONGODB_URI}")
-    client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URI)
+    client = create_mongo_client()
     db = client[settings.MONGODB_DATABASE]
     
     # Create indexes for various collections
@@ -21,11 +42,25 @@ async def init_mongodb():
     await user_collection.create_index("username", unique=True)
     await user_collection.create_index("email", unique=True)
     
-    # Chat sessions collection
+    # Chat sessions collection: the session list sorts on (updated_at, _id) for its cursor
     chat_collection = db[settings.MONGODB_CHAT_COLLECTION]
-    await chat_collection.create_index([("user_id", 1), ("updated_at", -1)])
-    await chat_collection.create_index([("user_id", 1), ("module", 1), ("updated_at", -1)])
-    await chat_collection.create_index([("user_id", 1), ("agent_id", 1), ("updated_at", -1)])
+    await chat_collection.create_index([("user_id", 1), ("updated_at", -1), ("_id", -1)])
+    await chat_collection.create_index([("user_id", 1), ("module", 1), ("updated_at", -1), ("_id", -1)])
+    await chat_collection.create_index([("user_id", 1), ("agent_id", 1), ("updated_at", -1), ("_id", -1)])
+    # Superseded by the indexes above, which also cover the _id tie-break
+    for name in ("user_id_1_updated_at_-1", "user_id_1_module_1_updated_at_-1", "user_id_1_agent_id_1_updated_at_-1"):
+        await drop_index_if_exists(chat_collection, name)
+    
+    # Chat messages collection (one document per message, see CHAT_MESSAGE_STORAGE)
+    message_collection = db[settings.MONGODB_MESSAGE_COLLECTION]
+    await message_collection.create_index([("session_id", 1), ("seq", 1)], unique=True)
+    
+    # Response cache collection: hashed key lookups and automatic expiry
+    cache_collection = db.chat_cache
+    await cache_collection.create_index(
+        "key", unique=True, partialFilterExpression={"key": {"$exists": True}}
+    )
+    await ensure_ttl_index(cache_collection, "created_at", settings.RESPONSE_CACHE_TTL)
     
     # Check if users already exist
     count = await user_collection.count_documents({})
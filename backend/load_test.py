@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+# Load-shedding scenario for the chat endpoints.
+#
+# 1. Start a mock Azure OpenAI server that answers slowly:
+#        python load_test.py mock-llm --latency 20 --port 9000
+# 2. Run the API against it, e.g. with
+#        AZURE_API_BASE=http://localhost:9000 AZURE_API_KEY=mock RATE_LIMIT_ENABLED=false
+#    (the per-user rate limit would otherwise reject the burst before admission control sees it)
+# 3. Drive chat load while probing cheap endpoints:
+#        python load_test.py run --base-url http://localhost:8000 --token <user JWT> --admin-token <admin JWT>
+#
+# With admission control, chat requests beyond the adaptive limit come back as
+# fast 503s with Retry-After, admin chat keeps being served, and the probes of
+# non-chat endpoints stay fast. Run with ADMISSION_ENABLED=false to compare.
+
+def create_mock_llm(latency: float, chunks: int):
+    """Azure OpenAI chat completions endpoint taking ``latency`` seconds per answer"""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        words = [f"word{i} " for i in range(chunks)]
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {"choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(words)}}]}
+
+        async def events():
+            for word in words:
+                await asyncio.sleep(latency / chunks)
+                yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': word}}]})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+class Results:
+    """Status codes and latencies per request kind"""
+
+    def __init__(self):
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.retry_after: Counter = Counter()
+
+    def record(self, kind: str, status: object, seconds: float, retry_after: Optional[str] = None):
+        self.statuses[kind][status] += 1
+        self.latencies[kind].append(seconds)
+        if retry_after is not None:
+            self.retry_after[retry_after] += 1
+
+    def report(self):
+        for kind in sorted(self.statuses):
+            latencies = sorted(self.latencies[kind])
+            p50 = statistics.median(latencies)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses[kind].items(), key=str))
+            print(f"{kind:<12} n={len(latencies):<5} p50={p50 * 1000:8.1f}ms p95={p95 * 1000:8.1f}ms  [{statuses}]")
+        if self.retry_after:
+            print(f"Retry-After values: {dict(self.retry_after)}")
+
+async def create_session(client: httpx.AsyncClient, token: str) -> str:
+    response = await client.post(
+        "/api/v1/chat/sessions",
+        json={"module": "load-test"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    response.raise_for_status()
+    return response.json()["session_id"]
+
+async def chat_loop(client: httpx.AsyncClient, kind: str, token: str, session_id: str, deadline: float, results: Results):
+    """Send uncached questions back to back until the deadline"""
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.monotonic() < deadline:
+        started_at = time.perf_counter()
+        try:
+            response = await client.post(
+                f"/api/v1/chat/{session_id}/send",
+                json={"text": f"Load test question {uuid.uuid4()}"},
+                headers=headers
+            )
+            results.record(kind, response.status_code, time.perf_counter() - started_at, response.headers.get("Retry-After"))
+            if response.status_code in (429, 503):
+                await asyncio.sleep(0.5)
+        except httpx.HTTPError as e:
+            results.record(kind, type(e).__name__, time.perf_counter() - started_at)
+
+async def probe_loop(client: httpx.AsyncClient, kind: str, path: str, headers: Dict[str, str], interval: float,
+                     deadline: float, results: Results):
+    """Hit a cheap endpoint at a steady rate to see whether it is starved"""
+    while time.monotonic() < deadline:
+        started_at = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            results.record(kind, response.status_code, time.perf_counter() - started_at)
+        except httpx.HTTPError as e:
+            results.record(kind, type(e).__name__, time.perf_counter() - started_at)
+        await asyncio.sleep(interval)
+
+async def run(args):
+    results = Results()
+    limits = httpx.Limits(max_connections=args.concurrency + 20)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        session_id = await create_session(client, args.token)
+        admin_session_id = await create_session(client, args.admin_token) if args.admin_token else None
+        deadline = time.monotonic() + args.duration
+
+        tasks = [
+            chat_loop(client, "chat", args.token, session_id, deadline, results)
+            for _ in range(args.concurrency)
+        ]
+        tasks.append(probe_loop(client, "health", "/", {}, args.probe_interval, deadline, results))
+        tasks.append(probe_loop(
+            client, "sessions", "/api/v1/chat/sessions",
+            {"Authorization": f"Bearer {args.token}"}, args.probe_interval, deadline, results
+        ))
+        if admin_session_id:
+            tasks.append(chat_loop(client, "admin_chat", args.admin_token, admin_session_id, deadline, results))
+            tasks.append(probe_loop(
+                client, "stats", "/api/v1/chat/stats",
+                {"Authorization": f"Bearer {args.admin_token}"}, args.probe_interval, deadline, results
+            ))
+        await asyncio.gather(*tasks)
+
+        results.report()
+        if args.admin_token:
+            stats = await client.get("/api/v1/chat/stats", headers={"Authorization": f"Bearer {args.admin_token}"})
+            if stats.status_code == 200:
+                print(f"Admission: {json.dumps(stats.json().get('admission'), indent=2)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chat load-shedding scenario against a slow mock LLM")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mock = commands.add_parser("mock-llm", help="Serve a slow mock Azure OpenAI endpoint")
+    mock.add_argument("--latency", type=float, default=20.0, help="Seconds per completion")
+    mock.add_argument("--chunks", type=int, default=20, help="Words per completion")
+    mock.add_argument("--port", type=int, default=9000)
+
+    load = commands.add_parser("run", help="Drive chat load and probe cheap endpoints")
+    load.add_argument("--base-url", default="http://localhost:8000")
+    load.add_argument("--token", required=True, help="Access token of a regular user")
+    load.add_argument("--admin-token", help="Access token of an admin, to check the admin lane")
+    load.add_argument("--concurrency", type=int, default=100, help="Concurrent chat senders")
+    load.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    load.add_argument("--probe-interval", type=float, default=0.5)
+    load.add_argument("--timeout", type=float, default=130.0)
+
+    args = parser.parse_args()
+    if args.command == "mock-llm":
+        import uvicorn
+        uvicorn.run(create_mock_llm(args.latency, args.chunks), host="0.0.0.0", port=args.port, log_level="warning")
+    else:
+        asyncio.run(run(args))
@@ -1,51 +1,68 @@
 
+import asyncio
 import os
 import uvicorn
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 
 from config.settings import get_settings
 from core.database.mongodb import close_mongo_connection, connect_to_mongo
-from core.database.mssql import engine, SessionLocal, Base
-from services.auth.mongodb_routes import router as auth_router  # Updated to use MongoDB routes
-from services.chat.routes import router as chat_router
-from services.demand_planning.routes import router as demand_planning_router
-from services.supply_planning.routes import router as supply_planning_router
-from services.order_promising.routes import router as order_promising_router
-from services.factory_planning.routes import router as factory_planning_router
-from services.inventory_optimization.routes import router as inventory_optimization_router
-from services.inventory_liquidation.routes import router as inventory_liquidation_router
-from services.logistics.routes import router as logistics_router
-from services.risk_management.routes import router as risk_management_router
-from services.analytics.routes import router as analytics_router
-from services.agents.routes import router as agents_router
+from core.database.mssql import close_async_engine
+from core.health import Readiness
+from core.metrics import render_metrics, run_gauge_updater
+from core.security.password_pool import PasswordHashPool, PasswordPoolFullError
+from core.security.rate_limit import RateLimitedError, RateLimitMiddleware
+from core.tracing import TraceExporter, TracingMiddleware
+from services.agents.catalog import AgentCatalog
+from services.ai.azure_client import close_azure_client, start_azure_client
+from services.chat.queue import AdmissionRejectedError, QueueFullError
+from services.chat.session import SessionManager
+from services.registry import include_service_routers
+from utils.logger import setup_logging, shutdown_logging
 
 settings = get_settings()
 
-# Set up rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# JSON logs written from a background thread
+setup_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_logging()
     # Connect to MongoDB on startup
     await connect_to_mongo()
+    # Pooled HTTP client shared by all Azure OpenAI calls
+    await start_azure_client()
+    # Reap idle chat session state in the background
+    session_reaper = asyncio.create_task(SessionManager.get_instance().run_reaper())
+    # Pick up agent catalog changes made by other workers
+    catalog_watcher = asyncio.create_task(AgentCatalog.get_instance().run_version_watcher())
+    # Publish this worker's queue, pool and session gauges
+    gauge_updater = asyncio.create_task(run_gauge_updater()) if settings.METRICS_ENABLED else None
+    Readiness.get_instance().mark_started()
     yield
+    Readiness.get_instance().mark_stopping()
+    session_reaper.cancel()
+    catalog_watcher.cancel()
+    if gauge_updater:
+        gauge_updater.cancel()
+    # Persist the semantic cache index so it survives restarts
+    if settings.SEMANTIC_CACHE_ENABLED:
+        from services.chat.ai_service import get_ai_service
+        get_ai_service().cache_service.save_semantic_index()
+    await close_azure_client()
+    PasswordHashPool.get_instance().shutdown(wait=False)
+    await close_async_engine()
     # Close MongoDB connection on shutdown
     await close_mongo_connection()
+    # Flush sampled traces before the process exits
+    TraceExporter.get_instance().shutdown()
+    shutdown_logging()
 
-# Create tables in MSSQL (should be done via migrations in production)
-Base.metadata.create_all(bind=engine)
-
-# Setup static files path
+# Tables and the static directory are created by bootstrap.py, not by each worker
 static_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
-if not os.path.exists(static_path):
-    os.makedirs(static_path)
-    os.makedirs(os.path.join(static_path, "assets"), exist_ok=True)
 
 app = FastAPI(
     title="EY Steel Ecosystem Co-Pilot API",
@@ -56,9 +73,44 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None  # Disable redoc in production
 )
 
-# Add rate limiter middleware
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError):
+    """Answer with 429 when a user has used up their chat answers for now"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many chat requests. Please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    """Answer with 429 when the chat request queue applies backpressure"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many chat requests in progress. Please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(AdmissionRejectedError)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejectedError):
+    """Answer with 503 when the worker is at its limit of concurrent chat generations"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The assistant is busy. Please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(PasswordPoolFullError)
+async def password_pool_full_handler(request: Request, exc: PasswordPoolFullError):
+    """Answer with 503 when too many logins are waiting for password verification"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in attempts in progress. Please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Per-user rate limits; added before CORS so rejections still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
 
 # Configure CORS with allowed origins from settings
 app.add_middleware(
@@ -70,29 +122,33 @@ app.add_middleware(
     max_age=86400,  # 24 hours cache for preflight requests
 )
 
+# Trace requests when TRACE_EXPORT_PATH or TRACE_OTLP_ENDPOINT is set; added last so it wraps CORS too
+app.add_middleware(TracingMiddleware)
+
 # Mount static files
-app.mount("/assets", StaticFiles(directory=os.path.join(static_path, "assets"), html=True), name="assets")
-
-# Include routers from different microservices
-app.include_router(auth_router, prefix=f"{settings.API_PREFIX}/auth", tags=["Authentication"])
-app.include_router(chat_router, prefix=f"{settings.API_PREFIX}/chat", tags=["Chat"])
-app.include_router(demand_planning_router, prefix=f"{settings.API_PREFIX}/demand-planning", tags=["Demand Planning"])
-app.include_router(supply_planning_router, prefix=f"{settings.API_PREFIX}/supply-planning", tags=["Supply Planning"])
-app.include_router(order_promising_router, prefix=f"{settings.API_PREFIX}/order-promising", tags=["Order Promising"])
-app.include_router(factory_planning_router, prefix=f"{settings.API_PREFIX}/factory-planning", tags=["Factory Planning"])
-app.include_router(inventory_optimization_router, prefix=f"{settings.API_PREFIX}/inventory-optimization", tags=["Inventory Optimization"])
-app.include_router(inventory_liquidation_router, prefix=f"{settings.API_PREFIX}/inventory-liquidation", tags=["Inventory Liquidation"])
-app.include_router(logistics_router, prefix=f"{settings.API_PREFIX}/logistics", tags=["Logistics"])
-app.include_router(risk_management_router, prefix=f"{settings.API_PREFIX}/risk-management", tags=["Risk Management"])
-app.include_router(analytics_router, prefix=f"{settings.API_PREFIX}/analytics", tags=["Analytics"])
-app.include_router(agents_router, prefix=f"{settings.API_PREFIX}/agents", tags=["AI Agents"])
+app.mount("/assets", StaticFiles(directory=os.path.join(static_path, "assets"), html=True, check_dir=False), name="assets")
+
+# Include routers of the core services and the planning modules enabled in ENABLED_MODULES
+include_service_routers(app)
 
 @app.get("/", tags=["Health Check"])
-@limiter.limit("10/minute")
 async def health_check(request: Request):
     """Health check endpoint to verify the API is running"""
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/ready", tags=["Health Check"])
+async def readiness_check():
+    """Readiness endpoint reporting each dependency; answers 503 until the worker can serve traffic"""
+    result = await Readiness.get_instance().check()
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics, merged across gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set"""
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+from pymongo.errors import BulkWriteError
+
+from config.settings import get_settings
+from core.database.mongodb import create_mongo_client
+
+settings = get_settings()
+
+# Error code MongoDB reports for unique index violations
+DUPLICATE_KEY_ERROR = 11000
+
+async def migrate_session(sessions, messages, session_id: str) -> int:
+    """
+    Move the embedded messages of one session into the message collection.
+
+    Returns the number of messages moved, or -1 if the session changed while it
+    was being copied and has to be retried.
+    """
+    session = await sessions.find_one({"_id": session_id}, {"messages": 1})
+    if session is None:
+        return 0
+
+    # Sessions created without messages, or with a null field, have nothing to copy
+    # but still need the guard to match whatever the field holds right now
+    if "messages" not in session:
+        embedded, unchanged = [], {"$exists": False}
+    elif isinstance(session["messages"], list):
+        embedded, unchanged = session["messages"], {"$size": len(session["messages"])}
+    else:
+        embedded, unchanged = [], {"$eq": session["messages"]}
+
+    docs = [
+        {
+            "session_id": session_id,
+            "seq": seq,
+            "text": msg["text"],
+            "isUser": msg["isUser"],
+            "timestamp": msg["timestamp"]
+        }
+        for seq, msg in enumerate(embedded)
+    ]
+
+    if docs:
+        try:
+            await messages.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Messages copied by an interrupted earlier run are already present
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+
+    # Only switch the layout if no message was appended in the meantime
+    result = await sessions.update_one(
+        {
+            "_id": session_id,
+            "message_storage": {"$ne": "collection"},
+            "messages": unchanged
+        },
+        {
+            "$set": {
+                "message_storage": "collection",
+                "message_count": len(embedded),
+                "preview": embedded[-settings.CHAT_PREVIEW_MESSAGES:],
+                "last_message_at": embedded[-1]["timestamp"] if embedded else None
+            },
+            "$unset": {"messages": ""}
+        }
+    )
+    return len(embedded) if result.modified_count else -1
+
+async def migrate_chat_messages(batch_size: int, max_retries: int = 3):
+    """Backfill MONGODB_MESSAGE_COLLECTION from sessions with embedded messages."""
+    print(f"Connecting to MongoDB at: {settings.MONGODB_URI}")
+    client = create_mongo_client()
+    db = client[settings.MONGODB_DATABASE]
+    sessions = db[settings.MONGODB_CHAT_COLLECTION]
+    messages = db[settings.MONGODB_MESSAGE_COLLECTION]
+
+    await messages.create_index([("session_id", 1), ("seq", 1)], unique=True)
+
+    pending = {"message_storage": {"$ne": "collection"}}
+    total = await sessions.count_documents(pending)
+    print(f"Found {total} sessions with embedded messages.")
+
+    migrated_sessions = 0
+    migrated_messages = 0
+    while True:
+        # Re-query each batch: migrated sessions drop out of the filter
+        batch = await sessions.find(pending, {"_id": 1}).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        skipped = 0
+        for doc in batch:
+            for _ in range(max_retries):
+                moved = await migrate_session(sessions, messages, doc["_id"])
+                if moved >= 0:
+                    migrated_sessions += 1
+                    migrated_messages += moved
+                    break
+            else:
+                skipped += 1
+                print(f"Session {doc['_id']} kept changing, will retry on the next run.")
+
+        print(f"Migrated {migrated_sessions}/{total} sessions ({migrated_messages} messages).")
+        if skipped == len(batch):
+            break
+
+    client.close()
+    print("Chat message migration finished.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move embedded chat messages into their own collection")
+    parser.add_argument("--batch-size", type=int, default=100, help="Sessions migrated per batch")
+    args = parser.parse_args()
+    asyncio.run(migrate_chat_messages(args.batch_size))
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from pymongo import ReturnDocument
+
+from config.settings import get_settings
+from core.database.mongodb import get_mongo_db
+from services.agents.repository import AgentRepository
+from services.agents.schemas import AgentResponse
+
+settings = get_settings()
+
+# Document in the app_state collection holding the shared catalog version
+CATALOG_STATE_ID = "agent_catalog"
+
+class CatalogSnapshot:
+    """Immutable, pre-serialized view of the agent catalog"""
+
+    def __init__(self, agents: list, version: int):
+        records = [jsonable_encoder(AgentResponse.model_validate(agent)) for agent in agents]
+        self.version = version
+        self.body = json.dumps(records).encode("utf-8")
+        # Content-based, so every worker hands out the same ETag for the same catalog
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.agents: Dict[int, bytes] = {
+            record["id"]: json.dumps(record).encode("utf-8") for record in records
+        }
+
+class AgentCatalog:
+    """
+    Process-wide read-through cache of the agents table
+
+    The catalog only changes when an admin creates an agent, so reads are
+    served from a snapshot built once and kept until invalidated. The
+    worker handling the change invalidates its own snapshot and bumps a
+    version counter in MongoDB; the other workers poll that counter every
+    AGENT_CATALOG_POLL_INTERVAL seconds and drop their snapshot when it moves.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.logger = logging.getLogger(__name__)
+
+    async def get_snapshot(self, agents: AgentRepository) -> CatalogSnapshot:
+        """Return the current snapshot, loading it from the database on first use"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        async with self._lock:
+            # Another request may have loaded it while we waited
+            if self._snapshot is None:
+                version = self._version
+                snapshot = CatalogSnapshot(await agents.list_agents(), version)
+                # Keep it only if no invalidation happened during the load
+                if version == self._version:
+                    self._snapshot = snapshot
+                self.loads += 1
+            else:
+                snapshot = self._snapshot
+                self.hits += 1
+        return snapshot
+
+    def invalidate(self, version: Optional[int] = None):
+        """Drop the local snapshot, recording the shared version that caused it"""
+        self._version = self._version + 1 if version is None else version
+        self._snapshot = None
+
+    async def notify_changed(self):
+        """Invalidate this worker's snapshot and signal the other workers"""
+        try:
+            state = await get_mongo_db().app_state.find_one_and_update(
+                {"_id": CATALOG_STATE_ID},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            self.invalidate(state["version"])
+        except Exception as e:
+            self.logger.error(f"Could not publish agent catalog change: {e}")
+            self.invalidate()
+
+    async def _shared_version(self) -> int:
+        state = await get_mongo_db().app_state.find_one({"_id": CATALOG_STATE_ID}, {"version": 1})
+        return state["version"] if state else 0
+
+    async def run_version_watcher(self, interval: float = 0):
+        """Poll the shared version and invalidate when another worker changed the catalog"""
+        interval = interval or settings.AGENT_CATALOG_POLL_INTERVAL
+        while True:
+            try:
+                version = await self._shared_version()
+                if version != self._version:
+                    self.invalidate(version)
+            except Exception as e:
+                self.logger.error(f"Agent catalog version check failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "cached": self._snapshot is not None,
+            "agents": len(self._snapshot.agents) if self._snapshot else 0,
+            "hits": self.hits,
+            "loads": self.loads
+        }
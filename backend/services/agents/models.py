@@ -1,5 +1,5 @@
 
-from sqlalchemy import Boolean, Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Text, Float, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from core.database.mssql import Base
 
@@ -22,6 +22,10 @@ class Agent(Base):
 class UserAgent(Base):
     """Mapping between users and their deployed agents"""
     __tablename__ = "user_agents"
+    __table_args__ = (
+        # Serves both "agents of a user" and "does this user have this agent" lookups
+        Index("ix_user_agents_user_id_agent_id", "user_id", "agent_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -0,0 +1,84 @@
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import Depends
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database.mssql import get_async_db
+from services.agents.models import Agent, UserAgent
+
+class AgentRepository:
+    """
+    Database access for agents and their deployments
+
+    Each method is a single round-trip: lookups that need both the agent
+    and the user's deployment of it are answered by one joined query.
+    """
+
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
+        self.db = db
+
+    async def list_agents(self) -> Sequence[Agent]:
+        """All agents in the catalog"""
+        result = await self.db.execute(select(Agent))
+        return result.scalars().all()
+
+    async def list_deployed_agents(self, user_id: int, allowed_agent_ids: Optional[List[int]] = None) -> Sequence[Agent]:
+        """
+        Agents deployed by a user
+
+        Args:
+            user_id: SQL user ID
+            allowed_agent_ids: Restrict the result to these agents (None for no restriction)
+        """
+        query = (
+            select(Agent)
+            .join(UserAgent, UserAgent.agent_id == Agent.id)
+            .where(UserAgent.user_id == user_id)
+        )
+        if allowed_agent_ids is not None:
+            query = query.where(Agent.id.in_(allowed_agent_ids))
+        result = await self.db.execute(query)
+        return result.scalars().unique().all()
+
+    async def get_agent(self, agent_id: int) -> Optional[Agent]:
+        return await self.db.get(Agent, agent_id)
+
+    async def get_agent_with_deployment(self, agent_id: int, user_id: int) -> Tuple[Optional[Agent], Optional[UserAgent]]:
+        """Return an agent together with the user's deployment of it, if any"""
+        result = await self.db.execute(
+            select(Agent, UserAgent)
+            .outerjoin(UserAgent, and_(UserAgent.agent_id == Agent.id, UserAgent.user_id == user_id))
+            .where(Agent.id == agent_id)
+            .limit(1)
+        )
+        row = result.first()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    async def get_deployment(self, user_id: int, agent_id: int) -> Optional[UserAgent]:
+        result = await self.db.execute(
+            select(UserAgent).where(UserAgent.user_id == user_id, UserAgent.agent_id == agent_id).limit(1)
+        )
+        return result.scalars().first()
+
+    async def add_deployment(self, user_id: int, agent_id: int) -> UserAgent:
+        user_agent = UserAgent(user_id=user_id, agent_id=agent_id)
+        self.db.add(user_agent)
+        await self.db.commit()
+        return user_agent
+
+    async def remove_deployment(self, user_agent: UserAgent):
+        await self.db.delete(user_agent)
+        await self.db.commit()
+
+    async def create_agent(self, agent: Agent, deploy_for_user_id: Optional[int] = None) -> Agent:
+        """Create an agent, optionally deploying it for a user in the same transaction"""
+        self.db.add(agent)
+        if deploy_for_user_id is not None:
+            # Flush to get the generated ID without a separate commit
+            await self.db.flush()
+            self.db.add(UserAgent(user_id=deploy_for_user_id, agent_id=agent.id))
+        await self.db.commit()
+        return agent
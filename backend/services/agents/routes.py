@@ -1,28 +1,38 @@
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
-from core.database.mssql import get_db
 from core.security.auth import get_current_active_user, get_admin_user, has_agent_access
-from services.agents.models import Agent, UserAgent
+from services.agents.catalog import AgentCatalog
+from services.agents.models import Agent
+from services.agents.repository import AgentRepository
 from services.agents.schemas import AgentCreate, AgentResponse, AgentAnalytics, AgentRecommendation
 from services.auth.models import User
 
 router = APIRouter()
 
+def _catalog_response(request: Request, body: bytes, etag: str) -> Response:
+    """Answer with the pre-serialized catalog body, or 304 if the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/available", response_model=List[AgentResponse])
-async def get_available_agents(db: Session = Depends(get_db)):
+async def get_available_agents(request: Request, agents: AgentRepository = Depends()):
     """
     Get all available agents that users can add to their account
+    
+    Served from the in-memory catalog; send the returned ETag in
+    If-None-Match to get a 304 when nothing changed.
     """
-    agents = db.query(Agent).all()
-    return agents
+    snapshot = await AgentCatalog.get_instance().get_snapshot(agents)
+    return _catalog_response(request, snapshot.body, snapshot.etag)
 
 @router.get("/deployed", response_model=List[AgentResponse])
 async def get_user_agents(
-    db: Session = Depends(get_db),
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -30,33 +40,22 @@ async def get_user_agents(
     """
     # Admin can see all agents
     if current_user.role == "admin":
-        user_agents = db.query(UserAgent).filter(UserAgent.user_id == current_user.id).all()
-        agent_ids = [ua.agent_id for ua in user_agents]
-        agents = db.query(Agent).filter(Agent.id.in_(agent_ids)).all()
-        return agents
+        return await agents.list_deployed_agents(current_user.id)
     
     # Regular users can only see their allowed agents
-    allowed_agent_ids = current_user.allowed_agents
-    user_agents = db.query(UserAgent).filter(
-        UserAgent.user_id == current_user.id,
-        UserAgent.agent_id.in_(allowed_agent_ids)
-    ).all()
-    
-    agent_ids = [ua.agent_id for ua in user_agents]
-    agents = db.query(Agent).filter(Agent.id.in_(agent_ids)).all()
-    return agents
+    return await agents.list_deployed_agents(current_user.id, current_user.allowed_agents)
 
 @router.post("/add", status_code=status.HTTP_201_CREATED)
 async def add_agent_to_user(
     agent_id: int,
-    db: Session = Depends(get_db),
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Add an agent to the current user's deployed agents
     """
-    # Check if agent exists
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    # Check if agent exists and whether the user already has it
+    agent, existing = await agents.get_agent_with_deployment(agent_id, current_user.id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,11 +70,6 @@ async def add_agent_to_user(
         )
     
     # Check if user already has this agent
-    existing = db.query(UserAgent).filter(
-        UserAgent.user_id == current_user.id,
-        UserAgent.agent_id == agent_id
-    ).first()
-    
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -83,25 +77,20 @@ async def add_agent_to_user(
         )
     
     # Add agent to user
-    user_agent = UserAgent(user_id=current_user.id, agent_id=agent_id)
-    db.add(user_agent)
-    db.commit()
+    await agents.add_deployment(current_user.id, agent_id)
     
     return {"success": True, "message": "Agent added successfully"}
 
 @router.delete("/remove/{agent_id}", status_code=status.HTTP_200_OK)
 async def remove_agent_from_user(
     agent_id: int,
-    db: Session = Depends(get_db),
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Remove an agent from the current user's deployed agents
     """
-    user_agent = db.query(UserAgent).filter(
-        UserAgent.user_id == current_user.id,
-        UserAgent.agent_id == agent_id
-    ).first()
+    user_agent = await agents.get_deployment(current_user.id, agent_id)
     
     if not user_agent:
         raise HTTPException(
@@ -109,21 +98,24 @@ async def remove_agent_from_user(
             detail="Agent not found in user's deployed agents"
         )
     
-    db.delete(user_agent)
-    db.commit()
+    await agents.remove_deployment(user_agent)
     
     return {"success": True, "message": "Agent removed successfully"}
 
 @router.get("/details/{agent_id}", response_model=AgentResponse)
 async def get_agent_details(
     agent_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get detailed information about an agent
+    
+    Served from the in-memory catalog and tagged with the catalog's ETag.
     """
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    snapshot = await AgentCatalog.get_instance().get_snapshot(agents)
+    agent = snapshot.agents.get(agent_id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -137,12 +129,12 @@ async def get_agent_details(
             detail="You don't have permission to view this agent"
         )
     
-    return agent
+    return _catalog_response(request, agent, snapshot.etag)
 
 @router.post("/create", response_model=AgentResponse, status_code=status.HTTP_201_CREATED)
 async def create_custom_agent(
     agent_data: AgentCreate,
-    db: Session = Depends(get_db),
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_admin_user)  # Only admins can create agents
 ):
     """
@@ -162,28 +154,25 @@ async def create_custom_agent(
         last_updated=datetime.now().strftime("%Y-%m-%d")
     )
     
-    db.add(new_agent)
-    db.commit()
-    db.refresh(new_agent)
-    
     # Automatically add to user's agents
-    user_agent = UserAgent(user_id=current_user.id, agent_id=new_agent.id)
-    db.add(user_agent)
-    db.commit()
+    new_agent = await agents.create_agent(new_agent, deploy_for_user_id=current_user.id)
+    
+    # Refresh the cached catalog here and in the other workers
+    await AgentCatalog.get_instance().notify_changed()
     
     return new_agent
 
 @router.get("/{agent_id}/analytics", response_model=AgentAnalytics)
 async def get_agent_analytics(
     agent_id: int,
-    db: Session = Depends(get_db),
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get analytics data for an agent
     """
     # Check if agent exists and belongs to user
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent, user_agent = await agents.get_agent_with_deployment(agent_id, current_user.id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -197,11 +186,6 @@ async def get_agent_analytics(
             detail="You don't have permission to view this agent's analytics"
         )
     
-    user_agent = db.query(UserAgent).filter(
-        UserAgent.user_id == current_user.id,
-        UserAgent.agent_id == agent_id
-    ).first()
-    
     if not user_agent and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -220,14 +204,14 @@ async def get_agent_analytics(
 @router.get("/{agent_id}/recommendations", response_model=List[AgentRecommendation])
 async def get_agent_recommendations(
     agent_id: int,
-    db: Session = Depends(get_db),
+    agents: AgentRepository = Depends(),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get recommendations from an agent
     """
     # Check if agent exists and belongs to user
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent, user_agent = await agents.get_agent_with_deployment(agent_id, current_user.id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -241,11 +225,6 @@ async def get_agent_recommendations(
             detail="You don't have permission to view this agent's recommendations"
         )
     
-    user_agent = db.query(UserAgent).filter(
-        UserAgent.user_id == current_user.id,
-        UserAgent.agent_id == agent_id
-    ).first()
-    
     if not user_agent and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
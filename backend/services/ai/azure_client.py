@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from config.settings import get_settings
+from core.tracing import span
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class AzureOpenAIError(Exception):
+    """Error response from Azure OpenAI"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(f"Azure OpenAI API Error: {status_code}, {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in RETRYABLE_STATUS_CODES
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, AzureOpenAIError):
+        return exc.retryable
+    # Connection failures, resets and timeouts
+    return isinstance(exc, httpx.TransportError)
+
+class _RetryAfterWait:
+    """Jittered exponential backoff that defers to the server's Retry-After when given"""
+
+    def __init__(self, multiplier: float, maximum: float):
+        self.maximum = maximum
+        self.backoff = wait_random_exponential(multiplier=multiplier, max=maximum)
+
+    def __call__(self, retry_state) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(exc, AzureOpenAIError) and exc.retry_after is not None:
+            return min(exc.retry_after, self.maximum)
+        return self.backoff(retry_state)
+
+class AzureOpenAIClient:
+    """
+    Long-lived HTTP client for Azure OpenAI
+
+    One pooled httpx.AsyncClient (HTTP/2, keep-alive) is shared by every
+    call so chat turns reuse warm connections instead of paying a TCP and
+    TLS handshake each time. Requests are retried on 429/5xx and transport
+    errors with jittered exponential backoff, and the number of in-flight
+    requests per deployment is capped.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client or self._create_client()
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._max_per_deployment = settings.AZURE_MAX_CONCURRENCY_PER_DEPLOYMENT
+        self._retrying = dict(
+            stop=stop_after_attempt(settings.AZURE_MAX_RETRIES + 1),
+            wait=_RetryAfterWait(settings.AZURE_RETRY_BACKOFF_BASE, settings.AZURE_RETRY_BACKOFF_MAX),
+            retry=retry_if_exception(_is_retryable),
+            before_sleep=self._log_retry,
+            reraise=True
+        )
+
+    @staticmethod
+    def _create_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.AZURE_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.AZURE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AZURE_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.AZURE_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.AZURE_TIMEOUT, connect=settings.AZURE_CONNECT_TIMEOUT)
+        )
+
+    @staticmethod
+    def _log_retry(retry_state):
+        exc = retry_state.outcome.exception()
+        logger.warning(
+            f"Azure OpenAI request failed ({exc}), retrying in "
+            f"{retry_state.next_action.sleep:.2f}s (attempt {retry_state.attempt_number})"
+        )
+
+    @asynccontextmanager
+    async def _slot(self, deployment: str):
+        """Hold one of the deployment's concurrency slots, counting it while held"""
+        limiter = self._limiters.get(deployment)
+        if limiter is None:
+            limiter = self._limiters[deployment] = asyncio.Semaphore(self._max_per_deployment)
+        async with limiter:
+            self._in_flight[deployment] = self._in_flight.get(deployment, 0) + 1
+            try:
+                yield
+            finally:
+                self._in_flight[deployment] -= 1
+
+    @staticmethod
+    def _endpoint(deployment: str) -> str:
+        return (
+            f"{settings.AZURE_API_BASE}/openai/deployments/{deployment}/chat/completions"
+            f"?api-version={settings.AZURE_API_VERSION}"
+        )
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        return {"api-key": settings.AZURE_API_KEY}
+
+    @staticmethod
+    def _error_from(response: httpx.Response) -> AzureOpenAIError:
+        # Gateways and proxies answer with HTML pages or other JSON shapes, not just Azure's error object
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        error = body.get("error") if isinstance(body, dict) else None
+        if isinstance(error, dict) and error.get("message"):
+            detail = str(error["message"])
+        else:
+            detail = response.text or "Unknown error"
+        return AzureOpenAIError(
+            response.status_code,
+            detail,
+            parse_retry_after(response.headers.get("Retry-After"))
+        )
+
+    @staticmethod
+    def _span(deployment: str, attempt, stream: bool = False):
+        # One span per HTTP attempt, so retries and their back-off gaps show up in the trace
+        return span(
+            "azure_openai.chat_completion",
+            deployment=deployment,
+            attempt=attempt.retry_state.attempt_number,
+            stream=stream
+        )
+
+    async def chat_completion(self, deployment: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a chat completion and return the decoded JSON body"""
+        async with self._slot(deployment):
+            async for attempt in AsyncRetrying(**self._retrying):
+                with attempt, self._span(deployment, attempt) as request_span:
+                    response = await self._client.post(
+                        self._endpoint(deployment),
+                        headers=self._headers(),
+                        json=payload
+                    )
+                    request_span.set_attribute("http.status_code", response.status_code)
+                    if response.status_code != 200:
+                        raise self._error_from(response)
+            return response.json()
+
+    @asynccontextmanager
+    async def stream_chat_completion(
+        self,
+        deployment: str,
+        payload: Dict[str, Any]
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Open a streaming chat completion
+
+        Only establishing the stream is retried; once the response body is
+        being read, failures propagate to the caller.
+        """
+        async with self._slot(deployment):
+            async for attempt in AsyncRetrying(**self._retrying):
+                with attempt, self._span(deployment, attempt, stream=True) as request_span:
+                    request = self._client.build_request(
+                        "POST",
+                        self._endpoint(deployment),
+                        headers=self._headers(),
+                        json=payload
+                    )
+                    response = await self._client.send(request, stream=True)
+                    request_span.set_attribute("http.status_code", response.status_code)
+                    if response.status_code != 200:
+                        await response.aread()
+                        await response.aclose()
+                        raise self._error_from(response)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """In-flight requests per deployment"""
+        return {
+            "max_concurrency_per_deployment": self._max_per_deployment,
+            "in_flight": dict(self._in_flight)
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+_azure_client: Optional[AzureOpenAIClient] = None
+
+def get_azure_client() -> AzureOpenAIClient:
+    """Return the shared client, creating it on first use outside the app lifespan"""
+    global _azure_client
+    if _azure_client is None:
+        _azure_client = AzureOpenAIClient()
+    return _azure_client
+
+async def start_azure_client():
+    """Create the shared client; called from the FastAPI lifespan"""
+    get_azure_client()
+
+async def close_azure_client():
+    """Close the shared client and its pooled connections"""
+    global _azure_client
+    if _azure_client is not None:
+        await _azure_client.aclose()
+        _azure_client = None
@@ -1,10 +1,8 @@
-
-import os
 import json
-import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from pydantic import BaseModel
 from config.settings import get_settings
+from .azure_client import get_azure_client
 
 settings = get_settings()
 
@@ -20,6 +18,20 @@ class AzureOpenAIRequest(BaseModel):
     frequency_penalty: float = 0
     presence_penalty: float = 0
     stop: Optional[List[str]] = None
+    stream: bool = False
+
+def is_azure_configured() -> bool:
+    """Whether Azure OpenAI credentials are available for live generation"""
+    return bool(settings.AZURE_API_BASE and settings.AZURE_API_KEY and settings.AZURE_DEPLOYMENT_NAME)
+
+def _resolve_deployment(deployment_name: Optional[str]) -> str:
+    """Return the deployment to call, validating the Azure configuration"""
+    # Use provided deployment name or default from settings
+    deployment = deployment_name or settings.AZURE_DEPLOYMENT_NAME
+    
+    if not settings.AZURE_API_BASE or not settings.AZURE_API_KEY or not settings.AZURE_API_VERSION or not deployment:
+        raise ValueError("Azure OpenAI configuration is missing. Check environment variables.")
+    return deployment
 
 async def get_completion_from_azure(
     messages: List[Dict[str, str]], 
@@ -30,6 +42,9 @@ async def get_completion_from_azure(
     """
     Get completion from Azure OpenAI
     
+    Requests go through the shared pooled client, which retries 429/5xx
+    responses; an AzureOpenAIError is raised once retries are exhausted.
+    
     Args:
         messages: List of message dictionaries with 'role' and 'content'
         deployment_name: Optional Azure deployment name to override default
@@ -39,52 +54,48 @@ async def get_completion_from_azure(
     Returns:
         str: Generated response text
     """
-    api_base = settings.AZURE_API_BASE
-    api_key = settings.AZURE_API_KEY
-    api_version = settings.AZURE_API_VERSION
+    deployment = _resolve_deployment(deployment_name)
+    payload = AzureOpenAIRequest(messages=messages, temperature=temperature, max_tokens=max_tokens)
     
-    # Use provided deployment name or default from settings
-    deployment = deployment_name or settings.AZURE_DEPLOYMENT_NAME
-    
-    if not api_base or not api_key or not api_version or not deployment:
-        raise ValueError("Azure OpenAI configuration is missing. Check environment variables.")
+    result = await get_azure_client().chat_completion(deployment, payload.model_dump())
+    return result["choices"][0]["message"]["content"]
+
+async def stream_completion_from_azure(
+    messages: List[Dict[str, str]], 
+    deployment_name: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 800
+) -> AsyncIterator[str]:
+    """
+    Stream a completion from Azure OpenAI, yielding content deltas as they arrive
     
-    # Format messages for the API
-    formatted_messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+    Errors are raised rather than replaced by a fallback text, since part of
+    the answer may already have been sent. Closing the generator early
+    releases the upstream stream.
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": api_key
-        }
-        
-        endpoint = f"{api_base}/openai/deployments/{deployment}/chat/completions?api-version={api_version}"
-        
-        payload = {
-            "messages": formatted_messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "top_p": 0.95,
-            "frequency_penalty": 0,
-            "presence_penalty": 0,
-            "stop": None
-        }
+    Args:
+        messages: List of message dictionaries with 'role' and 'content'
+        deployment_name: Optional Azure deployment name to override default
+        temperature: Temperature for text generation (0-1)
+        max_tokens: Maximum tokens to generate
         
-        try:
-            response = await client.post(
-                endpoint,
-                headers=headers,
-                content=json.dumps(payload)
-            )
-            
-            if response.status_code != 200:
-                error_detail = response.json().get("error", {}).get("message", "Unknown error")
-                raise Exception(f"Azure OpenAI API Error: {response.status_code}, {error_detail}")
+    Yields:
+        str: Pieces of the generated response text
+    """
+    deployment = _resolve_deployment(deployment_name)
+    payload = AzureOpenAIRequest(messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True)
+    
+    async with get_azure_client().stream_chat_completion(deployment, payload.model_dump()) as response:
+        # Server-sent events: one "data: {...}" line per chunk, terminated by [DONE]
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
             
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        
-        except Exception as e:
-            # Log the error and return a fallback response
-            print(f"Error calling Azure OpenAI API: {str(e)}")
-            return "I apologize, but I'm unable to process your request at the moment. Please try again later."
+            chunk = json.loads(data)
+            for choice in chunk.get("choices", []):
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
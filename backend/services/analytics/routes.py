@@ -0,0 +1,39 @@
+
+from fastapi import APIRouter, Depends
+
+from core.security.auth import get_current_active_user
+from services.auth.models import User
+
+router = APIRouter()
+
+@router.get("/reports")
+async def get_reports(current_user: User = Depends(get_current_active_user)):
+    """
+    Get available analytics reports
+    """
+    return {
+        "reports": [
+            {"id": 1, "name": "Monthly S&OP Summary", "category": "Planning", "lastRun": "2023-12-01", "format": "pdf"},
+            {"id": 2, "name": "Forecast Accuracy by Product", "category": "Demand", "lastRun": "2023-11-30", "format": "xlsx"},
+            {"id": 3, "name": "Mill Utilization", "category": "Production", "lastRun": "2023-11-30", "format": "xlsx"},
+            {"id": 4, "name": "Carrier Scorecard", "category": "Logistics", "lastRun": "2023-11-27", "format": "pdf"}
+        ]
+    }
+
+@router.get("/dashboards")
+async def get_dashboards(current_user: User = Depends(get_current_active_user)):
+    """
+    Get key performance indicators for the dashboards
+    """
+    # Mock KPIs - in a real implementation, these would be aggregated from the planning modules
+    return {
+        "kpis": [
+            {"name": "Forecast Accuracy", "value": 92.5, "unit": "%", "trend": "up"},
+            {"name": "On-Time Delivery", "value": 90.8, "unit": "%", "trend": "stable"},
+            {"name": "Inventory Turns", "value": 7.4, "unit": "x", "trend": "up"},
+            {"name": "Mill Utilization", "value": 84.3, "unit": "%", "trend": "down"},
+            {"name": "Cost per Ton Shipped", "value": 19.6, "unit": "USD", "trend": "down"}
+        ],
+        "period": "2023-11",
+        "lastUpdated": "2023-12-01"
+    }
@@ -6,9 +6,12 @@ from datetime import timedelta
 
 from config.settings import get_settings
 from core.security.auth import (
+    get_admin_user,
     get_current_active_user,
     create_access_token
 )
+from core.security.password_pool import PasswordHashPool
+from core.security.principal_cache import PrincipalCache
 from services.auth.mongodb_service import MongoDBUserService
 from services.auth.mongodb_models import MongoUser
 from services.auth.schemas import UserCreate, UserResponse, Token, LoginForm
@@ -197,3 +200,13 @@ async def update_user_permissions(
         )
         
     return {"detail": f"Permissions updated for user '{username}'"}
+
+@router.get("/principal-cache/stats")
+async def get_principal_cache_stats(current_user: Dict[str, Any] = Depends(get_admin_user)):
+    """
+    Get authentication cache and password hashing statistics for this worker process - admin only endpoint
+    """
+    return {
+        **PrincipalCache.get_instance().stats(),
+        "password_hashing": PasswordHashPool.get_instance().stats()
+    }
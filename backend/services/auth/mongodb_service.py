@@ -5,7 +5,8 @@ from fastapi import Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from core.database.mongodb import get_mongo_db
-from core.security.auth import get_password_hash, verify_password
+from core.security.auth import hash_password, verify_and_update_password
+from core.security.principal_cache import PrincipalCache
 from services.auth.mongodb_models import MongoUser
 
 class MongoDBUserService:
@@ -26,7 +27,7 @@ class MongoDBUserService:
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user"""
         # Hash the password
-        user_data["hashed_password"] = get_password_hash(user_data.pop("password"))
+        user_data["hashed_password"] = await hash_password(user_data.pop("password"))
         
         # Add timestamps
         user_data["created_at"] = datetime.utcnow()
@@ -45,13 +46,15 @@ class MongoDBUserService:
         
         # If password is being updated, hash it
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await hash_password(update_data.pop("password"))
         
         # Update the user
         await self.collection.update_one(
             {"username": username},
             {"$set": update_data}
         )
+        # Cached logins must not keep serving the old role or permissions
+        PrincipalCache.get_instance().invalidate_user(username)
         
         # Get the updated user
         return await self.get_user_by_username(username)
@@ -59,6 +62,7 @@ class MongoDBUserService:
     async def delete_user(self, username: str) -> bool:
         """Delete a user"""
         result = await self.collection.delete_one({"username": username})
+        PrincipalCache.get_instance().invalidate_user(username)
         return result.deleted_count > 0
     
     async def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
@@ -68,8 +72,14 @@ class MongoDBUserService:
         if not user:
             return None
             
-        if not verify_password(password, user["hashed_password"]):
+        verified, new_hash = await verify_and_update_password(password, user["hashed_password"])
+        if not verified:
             return None
+        
+        # Upgrade hashes created with older cost parameters while the plain password is at hand
+        if new_hash:
+            await self.collection.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+            user["hashed_password"] = new_hash
             
         return user
     
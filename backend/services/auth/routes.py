@@ -4,16 +4,17 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.settings import get_settings
-from core.database.mssql import get_db
+from core.database.mssql import get_async_db
 from core.database.mongodb import get_mongo_db
 from core.security.auth import (
     get_current_active_user,
     create_access_token,
-    get_password_hash,
-    verify_password
+    hash_password,
+    verify_and_update_password
 )
 from services.auth.models import User
 from services.auth.mongodb_models import MongoUser
@@ -23,12 +24,12 @@ settings = get_settings()
 router = APIRouter()
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db), mongo_db=Depends(get_mongo_db)):
+async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db), mongo_db=Depends(get_mongo_db)):
     """
     Create a new user - only accessible to admins
     """
     # Check if user already exists in SQL database
-    db_user = db.query(User).filter(User.username == user_data.username).first()
+    db_user = (await db.execute(select(User).where(User.username == user_data.username))).scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,7 +37,7 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db), mong
         )
     
     # Check if email already exists
-    db_email = db.query(User).filter(User.email == user_data.email).first()
+    db_email = (await db.execute(select(User).where(User.email == user_data.email))).scalars().first()
     if db_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -44,7 +45,7 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db), mong
         )
     
     # Create new user in SQL database
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     db_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -55,8 +56,8 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db), mong
         allowed_agents=user_data.allowed_agents
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create user in MongoDB as well
     mongo_user = MongoUser(
@@ -74,12 +75,12 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db), mong
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: LoginForm, db: Session = Depends(get_db), mongo_db=Depends(get_mongo_db)):
+async def login(form_data: LoginForm, db: AsyncSession = Depends(get_async_db), mongo_db=Depends(get_mongo_db)):
     """
     Authenticate a user and return a JWT token
     """
     # Try to find user in SQL database
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = (await db.execute(select(User).where(User.username == form_data.username))).scalars().first()
     
     # If not found in SQL, check MongoDB
     if not user:
@@ -92,12 +93,15 @@ async def login(form_data: LoginForm, db: Session = Depends(get_db), mongo_db=De
             )
         
         # If user exists in MongoDB but not in SQL, verify password against MongoDB
-        if not verify_password(form_data.password, mongo_user["hashed_password"]):
+        verified, new_hash = await verify_and_update_password(form_data.password, mongo_user["hashed_password"])
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        if new_hash:
+            await mongo_db.users.update_one({"_id": mongo_user["_id"]}, {"$set": {"hashed_password": new_hash}})
             
         # User authenticated successfully from MongoDB
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -108,12 +112,16 @@ async def login(form_data: LoginForm, db: Session = Depends(get_db), mongo_db=De
         return {"access_token": access_token, "token_type": "bearer", "user_role": mongo_user["role"]}
     
     # User found in SQL, verify password
-    if not verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     
     # SQL user authenticated successfully
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -126,14 +134,14 @@ async def login(form_data: LoginForm, db: Session = Depends(get_db), mongo_db=De
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()], 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     mongo_db=Depends(get_mongo_db)
 ):
     """
     OAuth2 compatible token endpoint
     """
     # First check SQL database
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = (await db.execute(select(User).where(User.username == form_data.username))).scalars().first()
     
     # If not in SQL, check MongoDB
     if not user:
@@ -146,12 +154,15 @@ async def login_for_access_token(
             )
         
         # Verify password against MongoDB
-        if not verify_password(form_data.password, mongo_user["hashed_password"]):
+        verified, new_hash = await verify_and_update_password(form_data.password, mongo_user["hashed_password"])
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        if new_hash:
+            await mongo_db.users.update_one({"_id": mongo_user["_id"]}, {"$set": {"hashed_password": new_hash}})
             
         # MongoDB user authenticated successfully
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -162,12 +173,16 @@ async def login_for_access_token(
         return {"access_token": access_token, "token_type": "bearer", "user_role": mongo_user["role"]}
     
     # SQL user found, verify password
-    if not verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     
     # SQL user authenticated successfully
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,39 +1,68 @@
 
 import asyncio
 import logging
+import re
+import time
 import uuid
-from typing import Dict, List, Optional, Any, Union
+from typing import AsyncIterator, Dict, List, Optional, Any, Union
 
 from config.settings import get_settings
-from services.ai.azure_openai import get_completion_from_azure
+from core.metrics import (
+    ADMISSION_INFLIGHT,
+    ADMISSION_LIMIT,
+    CHAT_QUEUE_DEPTH,
+    EXECUTOR_ACTIVE,
+    EXECUTOR_MAX_WORKERS,
+    EXECUTOR_QUEUE_DEPTH,
+    SESSIONS_ACTIVE,
+    count_cache_lookup,
+    observe_stage,
+    register_gauge,
+    time_stage
+)
+from services.ai.azure_openai import is_azure_configured, stream_completion_from_azure
 
 # Import our new microservices
-from .utils.logger import SessionLogger
+from utils.logger import SessionLogger
 from .cache.cache_service import CacheService
-from .queue.request_queue import RequestQueue
+from .cache.keys import build_cache_key, build_cache_namespace
+from .context import ContextBuilder, ConversationContext
+from .queue import AdmissionController, AdmissionRejectedError, QueueFullError, RequestQueue
 from .session.session_manager import SessionManager
 from .processing.message_processor import MessageProcessor
 from .response.response_formatter import ResponseFormatter
+from .utils.prompt_generator import PromptQuestion
 
 settings = get_settings()
 
 class AIService:
-    # Class variable for thread pools
-    _processing_pools = {}
-    
     def __init__(self):
         # Initialize services
         self.cache_service = CacheService()
         self.request_queue = RequestQueue()
+        self.admission = AdmissionController.get_instance()
         self.session_manager = SessionManager.get_instance()
         self.message_processor = MessageProcessor(self.session_manager, self.cache_service)
         self.response_formatter = ResponseFormatter()
+        self.context_builder = ContextBuilder()
+        self._register_gauges()
         
         # Configure Azure OpenAI settings
         self._configure_environment()
         
         logging.info("AI Service initialized successfully")
     
+    def _register_gauges(self):
+        """Publish queue, worker pool and session occupancy as metrics"""
+        worker_pool = self.message_processor.worker_pool
+        register_gauge(CHAT_QUEUE_DEPTH, lambda: self.request_queue.depth)
+        register_gauge(EXECUTOR_ACTIVE, lambda: worker_pool.stats()["active_workers"])
+        register_gauge(EXECUTOR_QUEUE_DEPTH, lambda: worker_pool.stats()["queue_depth"])
+        register_gauge(EXECUTOR_MAX_WORKERS, lambda: worker_pool.max_workers)
+        register_gauge(SESSIONS_ACTIVE, lambda: self.session_manager.stats()["active_sessions"])
+        register_gauge(ADMISSION_LIMIT, lambda: int(self.admission.limit))
+        register_gauge(ADMISSION_INFLIGHT, lambda: self.admission.inflight)
+    
     def _configure_environment(self):
         """Configure environment variables and settings"""
         # In a real implementation, this would set up environment variables
@@ -47,68 +76,262 @@ class AIService:
         module: Optional[str] = None, 
         agent_id: Optional[int] = None,
         user_id: str = "anonymous",
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        context_summary: Optional[str] = None,
+        priority: str = "user"
     ) -> Dict[str, Any]:
-        """Get AI response asynchronously with context management"""
+        """
+        Get AI response asynchronously with context management
+        
+        conversation_history should already be narrowed by prepare_context();
+        the prompt is trimmed to the deployment's token budget regardless.
+        Cache misses need a generation slot in the priority lane ("user" or
+        "admin") and raise AdmissionRejectedError when none is free.
+        """
         # Generate session ID if not provided
         if not session_id:
             session_id = str(uuid.uuid4())
             
-        try:
-            SessionLogger.log(session_id, 'message', f'Processing new request from user {user_id[:6] if len(user_id) >= 6 else user_id}')
+        with time_stage("total", module=module, agent_id=agent_id) as request_span:
+            try:
+                SessionLogger.log(session_id, 'message', f'Processing new request from user {user_id[:6] if len(user_id) >= 6 else user_id}')
             
-            # Check cache
-            SessionLogger.log(session_id, 'cache', 'Checking cache for response')
-            cache_key = f"{message}_{module}_{agent_id}"
-            cached_response = await self.cache_service.get_cached_response(cache_key)
-            if cached_response:
-                SessionLogger.log(session_id, 'cache_hit', 'Response found in cache')
-                return self.response_formatter.ensure_valid_response(cached_response)
-            SessionLogger.log(session_id, 'cache_miss', 'No cached response found')
+                # Check cache; answers that depend on earlier turns are never cached
+                cache_key = self._cache_key(message, conversation_history, module, agent_id, context_summary)
+                request_span.set_attribute("cache.hit", False)
+                if cache_key:
+                    SessionLogger.log(session_id, 'cache', 'Checking cache for response')
+                    with time_stage("cache_lookup"):
+                        cached_response = await self._get_cached_response(message, module, agent_id, cache_key, user_id)
+                    count_cache_lookup(bool(cached_response))
+                    request_span.set_attribute("cache.hit", bool(cached_response))
+                    if cached_response:
+                        SessionLogger.log(session_id, 'cache_hit', 'Response found in cache')
+                        return self.response_formatter.ensure_valid_response(cached_response)
+                    SessionLogger.log(session_id, 'cache_miss', 'No cached response found')
 
-            # Prepare current user info
-            current_user = {'user_id': user_id}
+                # Prepare current user info
+                current_user = {'user_id': user_id}
+                with time_stage("prompt_build"):
+                    prompt = self._build_prompt(message, conversation_history, module, agent_id, context_summary)
             
-            # Enqueue request
-            request_key = await self.request_queue.enqueue_request(session_id, user_id, message)
-            SessionLogger.log(session_id, 'queue', f'Request enqueued with key: {request_key[:8]}...')
+                async def generate():
+                    # Only the generation is limited; the slot is held until the generation has stopped
+                    async with self.admission.admit(priority):
+                        # Enqueue request
+                        request_key = await self.request_queue.enqueue_request(session_id, user_id, message)
+                        SessionLogger.log(session_id, 'queue', f'Request enqueued with key: {request_key[:8]}...')
+                
+                        # Start processing asynchronously; the processor caches successful responses
+                        task = asyncio.create_task(
+                            self.request_queue.process_request(
+                                request_key,
+                                self.message_processor.process_request,
+                                user_id,
+                                session_id,
+                                message,
+                                current_user,
+                                cache_key=cache_key,
+                                prompt=prompt
+                            )
+                        )
+
+                        SessionLogger.log(session_id, 'process', 'Waiting for response generation')
+                        try:
+                            # Wait for the result with timeout
+                            return await self.request_queue.get_result(request_key, timeout=120.0)
+                        except BaseException:
+                            # Timed out or the caller went away: stop generating, and only
+                            # give the slot back once the generation has actually ended
+                            task.cancel()
+                            await asyncio.wait([task])
+                            raise
             
-            # Start processing asynchronously
-            asyncio.create_task(
-                self.request_queue.process_request(
-                    request_key,
-                    self.message_processor.process_request,
-                    user_id,
-                    session_id,
-                    message,
-                    current_user
-                )
-            )
-
-            SessionLogger.log(session_id, 'process', 'Waiting for response generation')
-            # Wait for the result with timeout
-            response = await self.request_queue.get_result(request_key, timeout=120.0)
-            SessionLogger.log(session_id, 'success', 'Response successfully generated', 'success')
+                if cache_key:
+                    # Concurrent identical questions share one generation
+                    response = await self.cache_service.single_flight(cache_key, generate)
+                    self.cache_service.index_question(message, build_cache_namespace(module, agent_id, user_id=user_id), cache_key)
+                else:
+                    response = await generate()
+                SessionLogger.log(session_id, 'success', 'Response successfully generated', 'success')
             
-            # Return the validated response
-            return self.response_formatter.ensure_valid_response(response)
-
-        except Exception as e:
-            SessionLogger.log(session_id, 'error', f'AI Service error: {str(e)}', 'error')
-            logging.error(f"Error in get_ai_response: {str(e)}")
-            return self.response_formatter.ensure_valid_response({
-                "text": "I'm sorry, I couldn't process your request at the moment. Please try again later.",
-                "next_question": [
-                    "Can you help me with demand planning?",
-                    "What are the best practices for inventory management?",
-                    "How can I optimize my supply chain?"
-                ]
-            })
+                # Return the validated response
+                return self.response_formatter.ensure_valid_response(response)
+
+            except (QueueFullError, AdmissionRejectedError) as e:
+                SessionLogger.log(session_id, 'error', f'Rejecting request: {str(e)}', 'error')
+                raise
+            except Exception as e:
+                SessionLogger.log(session_id, 'error', f'AI Service error: {str(e)}', 'error')
+                logging.error(f"Error in get_ai_response: {str(e)}")
+                return self.response_formatter.ensure_valid_response({
+                    "text": "I'm sorry, I couldn't process your request at the moment. Please try again later.",
+                    "next_question": [
+                        "Can you help me with demand planning?",
+                        "What are the best practices for inventory management?",
+                        "How can I optimize my supply chain?"
+                    ]
+                })
+
+    async def stream_ai_response(
+        self, 
+        message: str, 
+        conversation_history: List[Dict[str, Any]], 
+        module: Optional[str] = None, 
+        agent_id: Optional[int] = None,
+        user_id: str = "anonymous",
+        session_id: Optional[str] = None,
+        context_summary: Optional[str] = None,
+        priority: str = "user"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an AI response as it is generated
+        
+        Yields {"type": "delta", "text": ...} events followed by a single
+        {"type": "done", "response": ...} event carrying the complete, validated
+        response. When Azure OpenAI is configured its token stream is forwarded
+        directly; otherwise the regular pipeline answer is sent in word chunks.
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        SessionLogger.log(session_id, 'message', 'Processing new streaming request')
+        
+        cache_key = self._cache_key(message, conversation_history, module, agent_id, context_summary)
+        if cache_key:
+            with time_stage("cache_lookup"):
+                cached_response = await self._get_cached_response(message, module, agent_id, cache_key, user_id)
+            count_cache_lookup(bool(cached_response))
+            if cached_response:
+                SessionLogger.log(session_id, 'cache_hit', 'Response found in cache')
+                response = self.response_formatter.ensure_valid_response(cached_response)
+                yield {"type": "delta", "text": response["text"]}
+                yield {"type": "done", "response": response}
+                return
+        
+        if is_azure_configured():
+            parts = []
+            started_at = time.perf_counter()
+            try:
+                async with self.admission.admit(priority):
+                    async for delta in stream_completion_from_azure(
+                        self._build_prompt(message, conversation_history, module, agent_id, context_summary)
+                    ):
+                        parts.append(delta)
+                        yield {"type": "delta", "text": delta}
+            except AdmissionRejectedError:
+                raise
+            except Exception as e:
+                # Part of the answer already reached the client, so there is nothing to fall back to
+                if parts:
+                    raise
+                SessionLogger.log(session_id, 'error', f'Azure streaming failed, falling back: {str(e)}', 'error')
+            
+            if parts:
+                observe_stage("llm", time.perf_counter() - started_at)
+                response = self.response_formatter.ensure_valid_response({
+                    "text": "".join(parts),
+                    "next_question": PromptQuestion.get_similar_question(message, "default")
+                })
+                if cache_key:
+                    await self.cache_service.set_cached_response(cache_key, response)
+                    self.cache_service.index_question(message, build_cache_namespace(module, agent_id, user_id=user_id), cache_key)
+                SessionLogger.log(session_id, 'success', 'Streamed response completed', 'success')
+                yield {"type": "done", "response": response}
+                return
+        
+        response = await self.get_ai_response(
+            message=message,
+            conversation_history=conversation_history,
+            module=module,
+            agent_id=agent_id,
+            user_id=user_id,
+            session_id=session_id,
+            context_summary=context_summary,
+            priority=priority
+        )
+        for chunk in self._chunk_words(response["text"], settings.STREAMING_CHUNK_SIZE):
+            yield {"type": "delta", "text": chunk}
+        yield {"type": "done", "response": response}
+
+    @staticmethod
+    def _cache_key(
+        message: str,
+        conversation_history: List[Dict[str, Any]],
+        module: Optional[str],
+        agent_id: Optional[int],
+        context_summary: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Response cache key for a message, or None if its answer must not be cached
+
+        The key only covers the message and its module/agent, so only answers
+        to the first question of a conversation are shared. Assistant turns
+        before it (the welcome message every session starts with) follow from
+        the module/agent; once the user has asked something or there is a
+        summary, the answer depends on whose conversation it is.
+        """
+        if context_summary or any(turn.get("isUser") for turn in conversation_history):
+            return None
+        return build_cache_key(message, module, agent_id)
+
+    async def _get_cached_response(
+        self, 
+        message: str, 
+        module: Optional[str], 
+        agent_id: Optional[int], 
+        cache_key: str,
+        user_id: str = "anonymous"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up an exact cache hit, then a semantically similar question of the same user
+
+        Only called for context-free first questions (see _cache_key).
+        """
+        cached_response = await self.cache_service.get_cached_response(cache_key)
+        if cached_response:
+            return cached_response
+        return await self.cache_service.get_similar_response(message, build_cache_namespace(module, agent_id, user_id=user_id))
+
+    async def prepare_context(
+        self, 
+        conversation_history: List[Dict[str, Any]], 
+        context_summary: Optional[Dict[str, Any]] = None
+    ) -> ConversationContext:
+        """Pick the recent turns to send and fold older ones into the session's running summary"""
+        return await self.context_builder.prepare(conversation_history, context_summary)
+
+    def _build_prompt(
+        self, 
+        message: str, 
+        conversation_history: List[Dict[str, Any]], 
+        module: Optional[str], 
+        agent_id: Optional[int],
+        context_summary: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build the chat completion messages for a user message within the token budget"""
+        focus = f"the {module} module" if module else (f"AI agent {agent_id}" if agent_id else "steel operations")
+        system_prompt = f"You are the EY Steel Ecosystem Co-Pilot, assisting with {focus}. Answer concisely."
+        return self.context_builder.fit(system_prompt, conversation_history, message, context_summary)
+
+    @staticmethod
+    def _chunk_words(text: str, chunk_size: int) -> List[str]:
+        """Split text into chunks of chunk_size words, keeping the original whitespace"""
+        words = re.findall(r"\S+\s*", text)
+        if not words:
+            return [text] if text else []
+        chunk_size = max(1, chunk_size)
+        return ["".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
 
     async def cleanup_session(self, session_id: str):
         """Clean up session resources"""
         await self.message_processor.cleanup_session(session_id)
 
+    def ensure_capacity(self, priority: str = "user"):
+        """Raise QueueFullError or AdmissionRejectedError if a new chat request would be rejected"""
+        self.request_queue.ensure_capacity()
+        self.admission.ensure_capacity(priority)
+
 # Create a singleton instance for the application
 _ai_service_instance = None
 
@@ -122,7 +345,11 @@ async def get_ai_response(
     message: str, 
     conversation_history: List[Dict[str, Any]], 
     module: Optional[str] = None, 
-    agent_id: Optional[int] = None
+    agent_id: Optional[int] = None,
+    user_id: str = "anonymous",
+    session_id: Optional[str] = None,
+    context_summary: Optional[str] = None,
+    priority: str = "user"
 ) -> Dict[str, Any]:
     """
     Get an AI response to a user message using the AIService
@@ -132,30 +359,63 @@ async def get_ai_response(
         conversation_history: Previous messages in the conversation
         module: Optional module context
         agent_id: Optional AI agent ID
+        user_id: ID of the user asking
+        session_id: Chat session ID; per-session worker and state are keyed by it
+        context_summary: Optional summary of turns older than conversation_history
+        priority: Admission lane, "admin" or "user"
         
     Returns:
         Dict: AI response with text, table_data (if applicable), and other fields
     """
     service = get_ai_service()
-    
-    # Generate a session ID if one doesn't exist in the conversation history
-    session_id = None
-    if conversation_history and len(conversation_history) > 0:
-        session_id = conversation_history[0].get("session_id")
-    
-    if not session_id:
-        session_id = str(uuid.uuid4())
-    
-    # Get user ID from conversation if available
-    user_id = "anonymous"
-    
     response = await service.get_ai_response(
         message=message,
         conversation_history=conversation_history,
         module=module,
         agent_id=agent_id,
         user_id=user_id,
-        session_id=session_id
+        session_id=session_id,
+        context_summary=context_summary,
+        priority=priority
     )
     
     return response
+
+async def stream_ai_response(
+    message: str, 
+    conversation_history: List[Dict[str, Any]], 
+    module: Optional[str] = None, 
+    agent_id: Optional[int] = None,
+    user_id: str = "anonymous",
+    session_id: Optional[str] = None,
+    context_summary: Optional[str] = None,
+    priority: str = "user"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream an AI response to a user message using the AIService
+    
+    Args:
+        message: The user's message
+        conversation_history: Previous messages in the conversation
+        module: Optional module context
+        agent_id: Optional AI agent ID
+        user_id: ID of the user asking
+        session_id: Chat session ID; per-session worker and state are keyed by it
+        context_summary: Optional summary of turns older than conversation_history
+        priority: Admission lane, "admin" or "user"
+        
+    Yields:
+        Dict: "delta" events with text pieces, then one "done" event with the full response
+    """
+    service = get_ai_service()
+    async for event in service.stream_ai_response(
+        message=message,
+        conversation_history=conversation_history,
+        module=module,
+        agent_id=agent_id,
+        user_id=user_id,
+        session_id=session_id,
+        context_summary=context_summary,
+        priority=priority
+    ):
+        yield event
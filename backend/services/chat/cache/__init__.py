@@ -1,4 +1,10 @@
 
 from .cache_service import CacheService
+from .backends import CacheBackend, MongoCacheBackend, RedisCacheBackend, create_cache_backend
+from .keys import build_cache_key, build_cache_namespace, normalize_message
+from .lru import LRUCache
 
-__all__ = ['CacheService']
+__all__ = [
+    'CacheService', 'CacheBackend', 'MongoCacheBackend', 'RedisCacheBackend', 'create_cache_backend',
+    'build_cache_key', 'build_cache_namespace', 'normalize_message', 'LRUCache'
+]
@@ -0,0 +1,103 @@
+
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from core.database.mongodb import get_mongo_db
+from config.settings import get_settings
+
+settings = get_settings()
+
+class CacheBackend(ABC):
+    """Shared response store used behind the in-process LRU"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, response: Dict[str, Any], ttl: int) -> None:
+        ...
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """The cached response and its remaining seconds to live (None when unknown)"""
+        return await self.get(key), None
+
+class MongoCacheBackend(CacheBackend):
+    """
+    Cache entries stored as documents in a MongoDB collection
+
+    Lookups use the unique index on ``key`` and expiry is handled by the TTL
+    index on ``created_at`` (both created by init_mongodb.py), so the TTL
+    passed to set is not stored per document.
+    """
+
+    def __init__(self, collection_name: str = "chat_cache"):
+        self.collection_name = collection_name
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        collection = get_mongo_db()[self.collection_name]
+        cached_item = await collection.find_one({"key": key}, {"response": 1})
+        return cached_item.get("response") if cached_item else None
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        collection = get_mongo_db()[self.collection_name]
+        cached_item = await collection.find_one({"key": key}, {"response": 1, "created_at": 1})
+        if not cached_item:
+            return None, None
+        created_at = cached_item.get("created_at")
+        if created_at is None:
+            return cached_item.get("response"), None
+        # The TTL monitor deletes expired documents only about once a minute
+        age = (datetime.utcnow() - created_at).total_seconds()
+        return cached_item.get("response"), settings.RESPONSE_CACHE_TTL - age
+
+    async def set(self, key: str, response: Dict[str, Any], ttl: int) -> None:
+        collection = get_mongo_db()[self.collection_name]
+        await collection.update_one(
+            {"key": key},
+            {"$set": {"key": key, "response": response, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache entries stored as JSON strings in Redis with a native expiry
+
+    Any client exposing the redis.asyncio get/set interface can be passed in,
+    e.g. a fakeredis client in tests.
+    """
+
+    def __init__(self, client=None, prefix: str = "chat_cache:"):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(settings.REDIS_URL)
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        # One round trip for the value and its expiry
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(self.prefix + key)
+            pipe.pttl(self.prefix + key)
+            raw, pttl = await pipe.execute()
+        if not raw:
+            return None, None
+        return json.loads(raw), pttl / 1000 if pttl >= 0 else None
+
+    async def set(self, key: str, response: Dict[str, Any], ttl: int) -> None:
+        await self.client.set(self.prefix + key, json.dumps(response, default=str), ex=ttl)
+
+def create_cache_backend(name: Optional[str] = None) -> CacheBackend:
+    """Build the shared cache backend selected by RESPONSE_CACHE_BACKEND"""
+    name = (name or settings.RESPONSE_CACHE_BACKEND).lower()
+    if name == "redis":
+        return RedisCacheBackend()
+    if name == "mongo":
+        return MongoCacheBackend()
+    raise ValueError(f"Unknown response cache backend: {name}")
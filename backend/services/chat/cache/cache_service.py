@@ -1,75 +1,187 @@
 
-from typing import Optional, Dict, Any
+import asyncio
+import time
+from typing import Optional, Dict, Any, Awaitable, Callable
 import logging
-from datetime import datetime
-from backend.database.mongodb import MongoDB
-from backend.utils.logger import SessionLogger
+from utils.logger import SessionLogger
+from config.settings import get_settings
+from core.database.mongodb import get_mongo_db
+
+from .backends import CacheBackend, create_cache_backend
+from .lru import LRUCache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 class CacheService:
-    def __init__(self):
+    """
+    Two-tier response cache: an in-process LRU in front of a shared backend.
+
+    Concurrent requests for the same key share a single generation through
+    single_flight, and hit/miss/latency counters are kept for monitoring.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, semantic_index=None):
         self.cache_collection = "chat_cache"
+        self.backend = backend or create_cache_backend()
+        self.semantic_index = semantic_index
+        if semantic_index is None and settings.SEMANTIC_CACHE_ENABLED:
+            # Imported lazily so numpy is only needed when the semantic tier is on
+            from .semantic import create_semantic_index
+            self.semantic_index = create_semantic_index()
+        self.local = LRUCache(
+            max_entries=settings.RESPONSE_CACHE_L1_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_L1_MAX_BYTES,
+            ttl=settings.RESPONSE_CACHE_TTL
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._counters = {
+            "local_hits": 0,
+            "backend_hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "single_flight_joins": 0,
+            "semantic_hits": 0,
+            "backend_lookups": 0,
+            "backend_lookup_seconds": 0.0
+        }
 
     async def get_cached_response(self, message: str) -> Optional[Dict[str, Any]]:
         """Get cached response for a message"""
+        response = self.local.get(message)
+        if response is not None:
+            self._counters["local_hits"] += 1
+            return response
+
+        started = time.perf_counter()
         try:
-            SessionLogger.log('CACHE', 'cache', 'Checking cache storage')
-            cache_collection = await MongoDB.get_collection(self.cache_collection)
-            # Use text as key to find cached response
-            cached_item = await cache_collection.find_one({"message": message})
-            
-            if cached_item:
-                SessionLogger.log('CACHE', 'cache_hit', f'Found cached response for: {message[:30]}...')
-                return cached_item.get("response")
-            SessionLogger.log('CACHE', 'cache_miss', f'No cache found for: {message[:30]}...')
-            return None
-            
+            response, ttl = await self.backend.get_with_ttl(message)
         except Exception as e:
+            self._counters["errors"] += 1
             SessionLogger.log('CACHE', 'error', f'Cache retrieval error: {str(e)}', 'error')
             return None
+        finally:
+            self._counters["backend_lookups"] += 1
+            self._counters["backend_lookup_seconds"] += time.perf_counter() - started
+
+        if response:
+            self._counters["backend_hits"] += 1
+            self.local.set(message, response, ttl)
+            SessionLogger.log('CACHE', 'cache_hit', f'Found cached response for: {message[:30]}...')
+            return response
+
+        self._counters["misses"] += 1
+        SessionLogger.log('CACHE', 'cache_miss', f'No cache found for: {message[:30]}...')
+        return None
 
     async def set_cached_response(self, message: str, response: Dict[str, Any]) -> None:
         """Cache a response for a message"""
+        self.local.set(message, response)
         try:
-            cache_collection = await MongoDB.get_collection(self.cache_collection)
-            
-            # Create cache document with timestamp
-            cache_document = {
-                "message": message,
-                "response": response,
-                "created_at": datetime.utcnow()
-            }
-            
-            # Upsert the cache entry
-            result = await cache_collection.update_one(
-                {"message": message},
-                {"$set": cache_document},
-                upsert=True
-            )
-            
-            logging.info(f"Cache {'updated' if result.modified_count else 'inserted'} for message: {message[:50]}...")
-            
+            await self.backend.set(message, response, settings.RESPONSE_CACHE_TTL)
+            logger.info(f"Cache stored for message: {message[:50]}...")
         except Exception as e:
-            logging.error(f"Cache storage error: {e}")
+            self._counters["errors"] += 1
+            logger.error(f"Cache storage error: {e}")
             # Don't raise the exception - let the application continue even if caching fails
 
+    async def get_similar_response(self, message: str, namespace: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached response of a previously answered, similarly worded question
+
+        Returns None when the semantic tier is disabled, nothing in the namespace
+        is similar enough, or the matching entry has expired from the cache.
+        """
+        if self.semantic_index is None:
+            return None
+
+        try:
+            cache_key = self.semantic_index.search(message, namespace)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Semantic cache lookup error: {e}")
+            return None
+        if cache_key is None:
+            return None
+
+        response = await self.get_cached_response(cache_key)
+        if response:
+            self._counters["semantic_hits"] += 1
+        return response
+
+    def index_question(self, message: str, namespace: str, cache_key: str) -> None:
+        """Make a question answered under cache_key findable by similarity"""
+        if self.semantic_index is None:
+            return
+        try:
+            self.semantic_index.add(message, namespace, cache_key)
+        except Exception as e:
+            logger.error(f"Semantic cache indexing error: {e}")
+
+    def save_semantic_index(self) -> None:
+        """Persist the semantic index if persistence is configured"""
+        if self.semantic_index is None or not settings.SEMANTIC_CACHE_PATH:
+            return
+        try:
+            self.semantic_index.save(settings.SEMANTIC_CACHE_PATH)
+        except Exception as e:
+            logger.error(f"Could not save semantic cache index: {e}")
+
+    async def single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory once for all concurrent callers with the same key
+
+        The factory runs in a task owned by the cache rather than by the first
+        caller, so a caller that is cancelled (e.g. its client disconnected)
+        neither cancels the generation nor passes the cancellation on to the
+        callers still waiting. Every caller shares its result or exception.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["single_flight_joins"] += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_flight(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache counters and local tier occupancy"""
+        lookups = self._counters["backend_lookups"]
+        return {
+            **{name: value for name, value in self._counters.items() if name != "backend_lookup_seconds"},
+            "avg_backend_lookup_ms": round(self._counters["backend_lookup_seconds"] / lookups * 1000, 3) if lookups else 0.0,
+            "local_entries": len(self.local),
+            "local_bytes": self.local.size_bytes,
+            "semantic_entries": len(self.semantic_index) if self.semantic_index is not None else 0,
+            "inflight": len(self._inflight)
+        }
+
     async def get_from_collection(self, collection_name: str, query: Dict) -> Optional[Dict]:
         """Get cached response from specified collection"""
         try:
-            collection = await MongoDB.get_collection(collection_name)
+            collection = get_mongo_db()[collection_name]
             result = await collection.find_one(query)
             return result
         except Exception as e:
-            print(f"Cache get error: {e}")
+            logger.warning(f"Cache get error: {e}")
             return None
 
     async def cache_to_collection(self, collection_name: str, query: Dict, data: Dict) -> None:
         """Cache response to specified collection"""
         try:
-            collection = await MongoDB.get_collection(collection_name)
+            collection = get_mongo_db()[collection_name]
             await collection.update_one(
                 query,
                 {"$set": data},
                 upsert=True
             )
         except Exception as e:
-            print(f"Cache set error: {e}")
+            logger.warning(f"Cache set error: {e}")
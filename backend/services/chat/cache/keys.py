@@ -0,0 +1,54 @@
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Optional
+
+from config.settings import get_settings
+
+settings = get_settings()
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_message(message: str) -> str:
+    """Normalize a message so trivially different spellings share a cache entry"""
+    text = unicodedata.normalize("NFKC", message).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+def build_cache_key(
+    message: str,
+    module: Optional[str] = None,
+    agent_id: Optional[int] = None,
+    version: Optional[int] = None
+) -> str:
+    """
+    Build a fixed-length response cache key
+
+    The key is a SHA-256 of the normalized message and its context, prefixed
+    with the cache namespace version. Bumping RESPONSE_CACHE_VERSION (e.g.
+    after a prompt change) makes every existing entry unreachable at once.
+    """
+    version = settings.RESPONSE_CACHE_VERSION if version is None else version
+    material = json.dumps(
+        [normalize_message(message), module, agent_id],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+    return f"v{version}:{digest}"
+
+def build_cache_namespace(
+    module: Optional[str] = None,
+    agent_id: Optional[int] = None,
+    version: Optional[int] = None,
+    user_id: Optional[str] = None
+) -> str:
+    """
+    Context a semantic cache match must share with the cached question
+
+    Includes the user, so a near-duplicate question is only ever answered
+    with a response generated for the same user.
+    """
+    version = settings.RESPONSE_CACHE_VERSION if version is None else version
+    return f"v{version}|{module}|{agent_id}|{user_id}"
@@ -0,0 +1,75 @@
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+class LRUCache:
+    """
+    In-process LRU cache bounded by entry count and approximate size in bytes.
+
+    Sizes are estimated from the JSON encoding of each value. Entries also carry
+    an expiry time; callers copying an entry from the shared store pass its
+    remaining TTL so the local copy never outlives the shared one.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, _, expires_at = entry
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store value for ttl seconds (at most the cache's own ttl)"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.delete(key)
+            return
+
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            # Never worth evicting everything else for a single oversized entry
+            self.delete(key)
+            return
+
+        self.delete(key)
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        return len(json.dumps(value, default=str))
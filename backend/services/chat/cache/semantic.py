@@ -0,0 +1,239 @@
+
+import fcntl
+import logging
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import get_settings
+from .keys import normalize_message
+
+settings = get_settings()
+
+_TOKEN = re.compile(r"\w+")
+
+class Embedder(ABC):
+    """Turns texts into L2-normalized float32 vectors of a fixed dimension"""
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+class HashingEmbedder(Embedder):
+    """
+    Offline embedder using the hashing trick over words and character trigrams
+
+    Character trigrams let inflections and small typos ("levels" / "level")
+    land close together. CRC32 is used instead of hash() so vectors are stable
+    across processes and restarts, which persistence relies on.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                vectors[row, digest % self.dim] += sign * weight
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _features(text: str):
+        for word in _TOKEN.findall(normalize_message(text)):
+            yield f"w:{word}", 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield f"c:{padded[i:i + 3]}", 0.5
+
+def create_embedder(name: Optional[str] = None) -> Embedder:
+    """Build the embedder selected by SEMANTIC_CACHE_EMBEDDER"""
+    name = (name or settings.SEMANTIC_CACHE_EMBEDDER).lower()
+    if name == "hashing":
+        return HashingEmbedder(settings.SEMANTIC_CACHE_DIM)
+    raise ValueError(f"Unknown semantic cache embedder: {name}")
+
+class SemanticIndex:
+    """
+    Bounded in-memory vector index of cached questions
+
+    Vectors live in one preallocated matrix. Each row is tagged with a
+    namespace (module, agent, cache version and user); a lookup
+    selects the rows of the query's namespace and scores them with a single
+    matrix-vector product.
+    When full, the oldest row is overwritten. Rows point at exact cache keys,
+    so the response itself stays in the regular cache and expires with it.
+    """
+
+    def __init__(self, embedder: Embedder, max_entries: int, threshold: float):
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._vectors = np.zeros((max_entries, embedder.dim), dtype=np.float32)
+        self._namespace_ids = np.full(max_entries, -1, dtype=np.int32)
+        self._keys: List[Optional[str]] = [None] * max_entries
+        self._slots: Dict[str, int] = {}
+        self._namespaces: Dict[str, int] = {}
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, message: str, namespace: str, cache_key: str):
+        """Index a question whose response is cached under cache_key"""
+        if cache_key in self._slots:
+            return
+
+        slot = self._next
+        evicted = self._keys[slot]
+        if evicted is not None:
+            del self._slots[evicted]
+
+        self._vectors[slot] = self.embedder.embed([message])[0]
+        self._namespace_ids[slot] = self._namespace_id(namespace)
+        self._keys[slot] = cache_key
+        self._slots[cache_key] = slot
+
+        self._next = (slot + 1) % self.max_entries
+        self._count = min(self._count + 1, self.max_entries)
+
+    def search(self, message: str, namespace: str) -> Optional[str]:
+        """Return the cache key of the most similar question above the threshold"""
+        namespace_id = self._namespaces.get(namespace)
+        if namespace_id is None or self._count == 0:
+            return None
+
+        # Only score the namespace's own rows rather than the whole matrix
+        rows = np.flatnonzero(self._namespace_ids[:self._count] == namespace_id)
+        if len(rows) == 0:
+            return None
+
+        query = self.embedder.embed([message])[0]
+        if len(rows) * 2 > self._count:
+            # Copying most of the matrix costs more than scoring all of it
+            scores = (self._vectors[:self._count] @ query)[rows]
+        else:
+            scores = self._vectors[rows] @ query
+
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return self._keys[rows[best]]
+
+    def save(self, path: str):
+        """
+        Persist the index to an .npz file shared by every worker
+
+        Each worker process builds its own index, so the file is merged into
+        rather than overwritten: under an exclusive lock the rows saved by
+        the other workers are read back and combined with this worker's,
+        newest last and at most max_entries of them, before the file is
+        replaced atomically.
+        """
+        with open(f"{path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                vectors, namespaces, keys = self._rows()
+                saved = self._read(path)
+                if saved is not None:
+                    vectors = np.concatenate([saved[0], vectors])
+                    namespaces = np.concatenate([saved[1], namespaces])
+                    keys = np.concatenate([saved[2], keys])
+
+                # Keep the newest row of every key, then the newest max_entries rows
+                _, last = np.unique(keys[::-1], return_index=True)
+                keep = np.sort(len(keys) - 1 - last)[-self.max_entries:]
+                names, namespace_ids = np.unique(namespaces[keep], return_inverse=True)
+
+                tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+                np.savez(
+                    tmp_path,
+                    vectors=vectors[keep],
+                    namespace_ids=namespace_ids.astype(np.int32),
+                    keys=keys[keep],
+                    namespaces=names,
+                    # Rows are saved oldest first
+                    next=np.array([0])
+                )
+                os.replace(tmp_path, path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def load(self, path: str) -> bool:
+        """Load an index saved by save, ignoring files of a different shape"""
+        saved = self._read(path)
+        if saved is None:
+            return False
+
+        vectors, namespaces, keys = (rows[-self.max_entries:] for rows in saved)
+        count = len(vectors)
+        names, namespace_ids = np.unique(namespaces, return_inverse=True)
+        self._namespaces = {str(name): index for index, name in enumerate(names)}
+        self._vectors[:count] = vectors
+        self._namespace_ids[:count] = namespace_ids
+        self._keys = [str(key) for key in keys] + [None] * (self.max_entries - count)
+        self._slots = {key: slot for slot, key in enumerate(self._keys) if key}
+        self._count = count
+        self._next = count % self.max_entries
+        return True
+
+    def _rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectors, namespace names and cache keys of the indexed rows, oldest first"""
+        order = np.roll(np.arange(self._count), -self._next if self._count == self.max_entries else 0)
+        names = np.array(sorted(self._namespaces, key=self._namespaces.get), dtype=str)
+        return (
+            self._vectors[order],
+            names[self._namespace_ids[order]],
+            np.array([self._keys[slot] for slot in order], dtype=str)
+        )
+
+    def _read(self, path: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Rows of a saved index as returned by _rows, or None if there is no usable file"""
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            if vectors.ndim != 2 or vectors.shape[1] != self.embedder.dim:
+                logging.warning(f"Ignoring semantic cache index {path} with mismatched dimension")
+                return None
+            if len(vectors) == 0:
+                return None
+
+            # Files written before rows were saved oldest first are in ring order
+            order = np.roll(np.arange(len(vectors)), -(int(data["next"][0]) % len(vectors)))
+            namespaces = data["namespaces"][data["namespace_ids"]]
+            return vectors[order], namespaces[order], data["keys"][order]
+
+    def _namespace_id(self, namespace: str) -> int:
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = len(self._namespaces)
+        return self._namespaces[namespace]
+
+def create_semantic_index() -> Optional[SemanticIndex]:
+    """Build (and load, if persisted) the semantic index when it is enabled"""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    index = SemanticIndex(
+        create_embedder(),
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD
+    )
+    if settings.SEMANTIC_CACHE_PATH:
+        try:
+            index.load(settings.SEMANTIC_CACHE_PATH)
+        except Exception as e:
+            logging.error(f"Could not load semantic cache index: {e}")
+    return index
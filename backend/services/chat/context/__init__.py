@@ -0,0 +1,11 @@
+
+from .context_builder import (
+    ContextBuilder,
+    ConversationContext,
+    ExtractiveSummarizer,
+    LLMSummarizer,
+    Summarizer,
+    TokenCounter
+)
+
+__all__ = ['ContextBuilder', 'ConversationContext', 'ExtractiveSummarizer', 'LLMSummarizer', 'Summarizer', 'TokenCounter']
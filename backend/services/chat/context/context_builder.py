@@ -0,0 +1,229 @@
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config.settings import get_settings
+from services.ai.azure_openai import get_completion_from_azure
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Per-message overhead of the chat completion format (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+class TokenCounter:
+    """
+    Counts prompt tokens for a deployment
+
+    Uses tiktoken when it is installed and its encodings are available;
+    otherwise falls back to an estimate of four characters per token, which
+    is close for English text and errs on the long side for code.
+    """
+
+    def __init__(self):
+        self._encodings: Dict[str, Any] = {}
+
+    def _encoding(self, deployment: str):
+        if deployment not in self._encodings:
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(deployment)
+                except KeyError:
+                    # Azure deployment names are arbitrary; current chat models share this encoding
+                    encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+                encoding = None
+            self._encodings[deployment] = encoding
+        return self._encodings[deployment]
+
+    def count(self, text: str, deployment: Optional[str] = None) -> int:
+        encoding = self._encoding(deployment or settings.AZURE_DEPLOYMENT_NAME)
+        if encoding is None:
+            return (len(text) + 3) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_message(self, text: str, deployment: Optional[str] = None) -> int:
+        return self.count(text, deployment) + MESSAGE_OVERHEAD_TOKENS
+
+class Summarizer(ABC):
+    """Folds older conversation turns into a running summary"""
+
+    @abstractmethod
+    async def summarize(self, previous: str, messages: List[Dict[str, Any]], max_tokens: int) -> str:
+        ...
+
+class ExtractiveSummarizer(Summarizer):
+    """
+    Summarizes without a model call by keeping the opening of every turn
+
+    The newest lines are kept when the summary outgrows its budget, so the
+    summary drifts forward with the conversation.
+    """
+
+    def __init__(self, counter: TokenCounter, chars_per_turn: int = 200):
+        self.counter = counter
+        self.chars_per_turn = chars_per_turn
+
+    async def summarize(self, previous: str, messages: List[Dict[str, Any]], max_tokens: int) -> str:
+        lines = previous.splitlines() if previous else []
+        for msg in messages:
+            text = " ".join(msg.get("text", "").split())
+            if len(text) > self.chars_per_turn:
+                text = text[:self.chars_per_turn].rsplit(" ", 1)[0] + "..."
+            lines.append(f"{'User' if msg.get('isUser') else 'Assistant'}: {text}")
+
+        while len(lines) > 1 and self.counter.count("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+class LLMSummarizer(Summarizer):
+    """Asks the chat deployment to update the summary, falling back to extraction on failure"""
+
+    def __init__(self, fallback: Summarizer):
+        self.fallback = fallback
+
+    async def summarize(self, previous: str, messages: List[Dict[str, Any]], max_tokens: int) -> str:
+        transcript = "\n".join(
+            f"{'User' if msg.get('isUser') else 'Assistant'}: {msg.get('text', '')}" for msg in messages
+        )
+        prompt = [
+            {
+                "role": "system",
+                "content": "You maintain a running summary of a conversation between a user and a steel "
+                           "operations assistant. Update the summary with the new turns. Keep facts, figures, "
+                           "decisions and open questions; drop pleasantries. Reply with the summary only."
+            },
+            {"role": "user", "content": f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"}
+        ]
+        try:
+            return await get_completion_from_azure(prompt, temperature=0.2, max_tokens=max_tokens)
+        except Exception as e:
+            logger.warning(f"Summary generation failed, using extractive summary: {e}")
+            return await self.fallback.summarize(previous, messages, max_tokens)
+
+class ConversationContext(BaseModel):
+    """Recent turns to send verbatim plus the summary of everything before them"""
+    messages: List[Dict[str, Any]]
+    summary: Optional[Dict[str, Any]] = None
+    summary_updated: bool = False  # The summary changed and should be saved on the session
+
+    @property
+    def summary_text(self) -> Optional[str]:
+        return self.summary.get("text") if self.summary else None
+
+class ContextBuilder:
+    """
+    Keeps LLM prompts within a per-deployment token budget
+
+    The system prompt, the running summary and the current message are always
+    sent; the remaining budget is filled with the most recent turns. Turns
+    that no longer fit are folded into the summary, which is cached on the
+    session as ``{"text", "through", "updated_at"}`` where ``through`` is the
+    timestamp of the newest summarized message, so each turn is summarized
+    only once.
+
+    Callers load ``history_window()`` messages: at most
+    CHAT_CONTEXT_MESSAGES are kept verbatim, so the oldest loaded turn is
+    always summarized before it drops out of the window.
+    """
+
+    def __init__(self, counter: Optional[TokenCounter] = None, summarizer: Optional[Summarizer] = None):
+        self.counter = counter or TokenCounter()
+        if summarizer is None:
+            summarizer = ExtractiveSummarizer(self.counter)
+            if settings.CHAT_SUMMARY_MODE == "llm":
+                summarizer = LLMSummarizer(fallback=summarizer)
+        self.summarizer = summarizer
+
+    @staticmethod
+    def history_window() -> int:
+        """Number of recent messages callers should load for prepare()"""
+        return settings.CHAT_CONTEXT_MESSAGES + 2
+
+    @staticmethod
+    def token_budget(deployment: Optional[str] = None) -> int:
+        """Prompt token budget for a deployment"""
+        deployment = deployment or settings.AZURE_DEPLOYMENT_NAME
+        return settings.CHAT_CONTEXT_TOKEN_BUDGETS.get(deployment, settings.CHAT_CONTEXT_TOKEN_BUDGET)
+
+    def _split(
+        self,
+        history: List[Dict[str, Any]],
+        budget: int,
+        deployment: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split history into (older, recent) where recent is the newest run of turns within budget"""
+        used = 0
+        start = len(history)
+        while start > 0 and len(history) - start < settings.CHAT_CONTEXT_MESSAGES:
+            cost = self.counter.count_message(history[start - 1].get("text", ""), deployment)
+            if used + cost > budget:
+                break
+            used += cost
+            start -= 1
+        return history[:start], history[start:]
+
+    async def prepare(
+        self,
+        history: List[Dict[str, Any]],
+        summary: Optional[Dict[str, Any]] = None,
+        deployment: Optional[str] = None
+    ) -> ConversationContext:
+        """
+        Select the turns to send and bring the cached summary up to date
+
+        ``summary_updated`` is set on the result only when new turns were
+        summarized, so callers can skip persisting an unchanged summary.
+        """
+        # Room for a summary is reserved whenever one exists or is about to, so the
+        # number of verbatim turns does not shift as the summary grows
+        history_budget = self.token_budget(deployment) - settings.CHAT_CONTEXT_RESERVED_TOKENS
+        summary_budget = history_budget - settings.CHAT_SUMMARY_MAX_TOKENS - MESSAGE_OVERHEAD_TOKENS
+        older, recent = self._split(history, max(0, summary_budget if summary else history_budget), deployment)
+        if older and not summary:
+            older, recent = self._split(history, max(0, summary_budget), deployment)
+
+        through = summary.get("through") if summary else None
+        updated = False
+        pending = [msg for msg in older if through is None or msg.get("timestamp", through) > through]
+        if pending:
+            text = await self.summarizer.summarize(
+                summary.get("text", "") if summary else "",
+                pending,
+                settings.CHAT_SUMMARY_MAX_TOKENS
+            )
+            summary = {
+                "text": text,
+                "through": pending[-1].get("timestamp"),
+                "updated_at": datetime.now()
+            }
+            updated = True
+
+        return ConversationContext(messages=recent, summary=summary, summary_updated=updated)
+
+    def fit(
+        self,
+        system_prompt: str,
+        history: List[Dict[str, Any]],
+        message: str,
+        summary: Optional[str] = None,
+        deployment: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build chat completion messages, dropping the oldest turns that exceed the budget"""
+        prompt = [{"role": "system", "content": system_prompt}]
+        if summary:
+            prompt.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+
+        fixed = sum(self.counter.count_message(item["content"], deployment) for item in prompt)
+        fixed += self.counter.count_message(message, deployment)
+        _, recent = self._split(history, max(0, self.token_budget(deployment) - fixed), deployment)
+
+        for msg in recent:
+            prompt.append({"role": "user" if msg.get("isUser") else "assistant", "content": msg.get("text", "")})
+        prompt.append({"role": "user", "content": message})
+        return prompt
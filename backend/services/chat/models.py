@@ -19,7 +19,12 @@ class ChatSession(BaseModel):
     username: Optional[str] = None  # For anonymous sessions
     module: Optional[str] = None   # Which module this chat belongs to
     agent_id: Optional[int] = None  # Which AI agent is involved
-    messages: List[ChatMessage] = []
+    messages: List[ChatMessage] = []  # Only populated for "embedded" message storage
+    message_storage: str = "embedded"  # "embedded" or "collection", see services.chat.storage
+    message_count: int = 0
+    preview: List[ChatMessage] = []  # Last CHAT_PREVIEW_MESSAGES messages, kept at write time
+    last_message_at: Optional[datetime] = None
+    context_summary: Optional[Dict] = None  # Running summary of turns outside the prompt, see services.chat.context
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     metadata: Dict = Field(default_factory=dict)
@@ -1,4 +1,5 @@
 
 from .message_processor import MessageProcessor
+from .worker_pool import WorkerPool
 
-__all__ = ['MessageProcessor']
+__all__ = ['MessageProcessor', 'WorkerPool']
@@ -1,101 +1,106 @@
-import asyncio
 import logging
-import os
 import time
-from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List, Union
 
-from ..utils.logger import SessionLogger
+from core.metrics import time_stage
+from core.tracing import span
+from services.ai.azure_openai import get_completion_from_azure, is_azure_configured
+from utils.logger import SessionLogger
 from ..utils.prompt_generator import PromptQuestion
 from ..utils.serializers import TableDataSerializer
 from ..session.session_manager import SessionManager
 from ..response.response_formatter import ResponseFormatter
+from .worker_pool import WorkerPool
 
 class MessageProcessor:
-    _processing_pools = {}
-    
-    def __init__(self, session_manager, cache_service):
+    def __init__(self, session_manager, cache_service, worker_pool: Optional[WorkerPool] = None):
         self.session_manager = session_manager
         self.cache_service = cache_service
+        self.worker_pool = worker_pool or WorkerPool.get_instance()
         self.logger = logging.getLogger(__name__)
         self.response_formatter = ResponseFormatter()
     
-    async def process_request(self, user_id: str, session_id: str, message: str, current_user: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a single request with proper error handling"""
+    async def process_request(self, user_id: str, session_id: str, message: str, current_user: Dict[str, Any],
+                              cache_key: Optional[str] = None,
+                              prompt: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Process a single request
+
+        The caller is expected to have checked the cache already; successful
+        responses are stored under cache_key unless it is None.
+        When a prompt is given and Azure OpenAI is configured, the answer is
+        generated from that prompt instead of the local pipeline. Failures are
+        logged and re-raised so the queue and admission control see them; the
+        caller turns them into a fallback answer.
+        """
+        # In a real implementation, we'd have a GetContext class
+        # For now, we'll just use a simple context string
+        context_str = f"User: {user_id}, Session: {session_id}"
+        
+        # Extract persona from current_user
+        persona = current_user.get("persona", "default") if isinstance(current_user, dict) else "default"
+        
         try:
-            # In a real implementation, we'd have a GetContext class
-            # For now, we'll just use a simple context string
-            context_str = f"User: {user_id}, Session: {session_id}"
-            
-            # Extract persona from current_user
-            persona = current_user.get("persona", "default") if isinstance(current_user, dict) else "default"
-            
             response = await self._process_message_with_cache(
                 message,
                 context_str,
                 persona,
-                session_id
+                session_id,
+                cache_key,
+                prompt
             )
-            
-            # Make sure response is properly formatted
-            formatted_response = self.response_formatter.ensure_valid_response(response)
-            
-            # Log the response for debugging
-            self.logger.info(f"Processed response: {formatted_response}")
-            
-            return formatted_response
-            
         except Exception as e:
             self.logger.error(f"Error processing request: {e}")
-            return self.response_formatter.ensure_valid_response({
-                "text": f"An error occurred while processing your request: {str(e)}",
-                "content": f"An error occurred while processing your request: {str(e)}",
-                "next_question": self._get_default_questions()
-            })
+            raise
+        
+        # Make sure response is properly formatted
+        formatted_response = self.response_formatter.ensure_valid_response(response)
+        
+        # Log the response for debugging
+        self.logger.info(f"Processed response: {formatted_response}")
+        
+        return formatted_response
 
-    async def _process_message_with_cache(self, message: str, context_str: str, persona: str, session_id: str) -> Dict[str, Any]:
+    async def _process_message_with_cache(self, message: str, context_str: str, persona: str, session_id: str,
+                                          cache_key: Optional[str],
+                                          prompt: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """Process message with improved concurrency and instance management"""
         semaphore = None
         try:
             # Get session-specific interpreter
             session = await self.session_manager.get_session_interpreter(session_id)
-            
-            # Check cache first
-            cached_response = await self.cache_service.get_cached_response(message)
-            if cached_response:
-                return cached_response
-
-            # Create processing pool for this session if doesn't exist
-            if session_id not in self.__class__._processing_pools:
-                max_workers = min(26, (os.cpu_count() or 4) * 5)
-                self.__class__._processing_pools[session_id] = ThreadPoolExecutor(max_workers=max_workers)
 
             # Properly acquire semaphore
-            semaphore = await self.session_manager.acquire_semaphore(session_id)
+            with time_stage("semaphore_wait"):
+                semaphore = await self.session_manager.acquire_semaphore(session_id)
             
-            loop = asyncio.get_running_loop()
             try:
-                # Process with session-specific executor
-                response = await loop.run_in_executor(
-                    self.__class__._processing_pools[session_id],
-                    self._process_user_message_sync,
-                    message,
-                    context_str,
-                    persona,
-                    session_id,
-                    session.get('interpreter')
-                )
+                if prompt and is_azure_configured():
+                    response = await self._process_with_azure(message, prompt, persona, session_id)
+                else:
+                    # Process on the shared worker pool
+                    response = await self.worker_pool.run(
+                        session_id,
+                        self._process_user_message_sync,
+                        message,
+                        context_str,
+                        persona,
+                        session_id,
+                        session.get('interpreter')
+                    )
 
                 # Cache successful responses
-                if response:
-                    await self.cache_service.set_cached_response(message, response)
+                if response and cache_key:
+                    with time_stage("cache_store"):
+                        await self.cache_service.set_cached_response(cache_key, response)
                 
                 return response
 
             finally:
-                # Always release semaphore
+                # Always release semaphore, exactly once
                 if semaphore:
                     await self.session_manager.release_semaphore(session_id)
+                    semaphore = None
 
         except Exception as e:
             self.logger.error(f"Processing error for session {session_id}: {e}")
@@ -104,6 +109,18 @@ class MessageProcessor:
                 await self.session_manager.release_semaphore(session_id)
             raise
 
+    async def _process_with_azure(self, message: str, prompt: List[Dict[str, str]], persona: str,
+                                  session_id: str) -> Dict[str, Any]:
+        """Generate the answer from the budgeted conversation prompt with Azure OpenAI"""
+        SessionLogger.log(session_id, 'process', f'Requesting completion for {len(prompt)} prompt messages')
+        with time_stage("llm", prompt_messages=len(prompt)):
+            content = await get_completion_from_azure(prompt)
+        return {
+            'text': content,
+            'content': content,
+            'next_question': PromptQuestion.get_similar_question(message, persona)
+        }
+
     def _process_user_message_sync(self, message: str, context_str: str, persona: str, 
                                  session_id: str, interpreter_instance) -> Dict[str, Any]:
         """Process message with session-specific interpreter instance"""
@@ -115,12 +132,13 @@ class MessageProcessor:
             data_keywords = ['inventory', 'stock', 'supply', 'materials', 'production', 'data', 'metrics', 'stats', 'statistics', 'numbers']
             is_data_request = any(keyword in message.lower() for keyword in data_keywords)
             
-            if is_data_request:
-                # Simulate data processing for demonstration
-                return self._process_data_request(message, session_id, next_question, context_str)
-            else:
-                # Process text-only response
-                return self._process_text_request(message, session_id, next_question, context_str)
+            with span("message_processor.generate", request_type="data" if is_data_request else "text"):
+                if is_data_request:
+                    # Simulate data processing for demonstration
+                    return self._process_data_request(message, session_id, next_question, context_str)
+                else:
+                    # Process text-only response
+                    return self._process_text_request(message, session_id, next_question, context_str)
                 
         except Exception as e:
             self.logger.error(f"Message processing error: {e}")
@@ -242,14 +260,8 @@ class MessageProcessor:
     async def cleanup_session(self, session_id: str):
         """Clean up session resources with proper error handling"""
         try:
-            if session_id in self.__class__._processing_pools:
-                # Shutdown the thread pool
-                self.__class__._processing_pools[session_id].shutdown(wait=False)
-                del self.__class__._processing_pools[session_id]
-            
-            # Clean up semaphores
-            if session_id in self.session_manager.session_semaphores:
-                del self.session_manager.session_semaphores[session_id]
+            # Drop session state, temp directory and semaphore unless a request is in flight
+            await self.session_manager.evict_session(session_id)
                 
         except Exception as e:
             self.logger.error(f"Error cleaning up session resources: {e}")
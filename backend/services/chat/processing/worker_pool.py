@@ -0,0 +1,129 @@
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+
+from config.settings import get_settings
+from core.metrics import observe_stage, time_stage
+
+settings = get_settings()
+
+class WorkerPool:
+    """
+    Process-wide bounded thread pool for synchronous message processing.
+
+    Work is admitted to the executor round-robin across sessions, so a session
+    with a burst of requests cannot starve the others. Per-session ordering and
+    the one-in-flight-per-session rule stay with SessionManager's semaphores.
+    """
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, max_workers: int = 0):
+        self.max_workers = max_workers or settings.CHAT_WORKER_POOL_SIZE or min(32, (os.cpu_count() or 4) * 5)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chat-worker")
+        # Waiting callers per session, and the round-robin order of sessions with waiters
+        self._waiting: Dict[str, Deque[asyncio.Future]] = {}
+        self._ready: Deque[str] = deque()
+        self._active = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def run(self, session_id: str, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) on the shared executor once a worker slot is granted"""
+        loop = asyncio.get_running_loop()
+        grant = loop.create_future()
+        enqueued_at = time.perf_counter()
+
+        if session_id not in self._waiting:
+            self._waiting[session_id] = deque()
+            self._ready.append(session_id)
+        self._waiting[session_id].append(grant)
+        self._dispatch()
+
+        try:
+            await grant
+        except asyncio.CancelledError:
+            if grant.done() and not grant.cancelled():
+                # The slot was granted just before cancellation; hand it back
+                self._release()
+            else:
+                self._discard(session_id, grant)
+            raise
+
+        wait = time.perf_counter() - enqueued_at
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        observe_stage("executor_wait", wait)
+
+        try:
+            with time_stage("processing"):
+                # Run under a copy of the caller's context so tracing spans follow into the thread
+                context = contextvars.copy_context()
+                job = loop.run_in_executor(self._executor, context.run, func, *args)
+                try:
+                    return await asyncio.shield(job)
+                except asyncio.CancelledError:
+                    # A running thread cannot be stopped; its slot stays taken until it returns
+                    await asyncio.wait([job])
+                    raise
+        finally:
+            self._completed += 1
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool occupancy and admission wait times"""
+        return {
+            "max_workers": self.max_workers,
+            "active_workers": self._active,
+            "queue_depth": sum(len(waiters) for waiters in self._waiting.values()),
+            "waiting_sessions": len(self._waiting),
+            "completed": self._completed,
+            "avg_wait_ms": round(self._total_wait / self._completed * 1000, 3) if self._completed else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 3)
+        }
+
+    def shutdown(self):
+        """Stop the executor without waiting for running work"""
+        self._executor.shutdown(wait=False)
+
+    def _dispatch(self):
+        """Grant free worker slots to waiting sessions in round-robin order"""
+        while self._active < self.max_workers and self._ready:
+            session_id = self._ready.popleft()
+            waiters = self._waiting[session_id]
+            grant = waiters.popleft()
+
+            if waiters:
+                self._ready.append(session_id)
+            else:
+                del self._waiting[session_id]
+
+            if grant.done():
+                continue
+            self._active += 1
+            grant.set_result(None)
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _discard(self, session_id: str, grant: asyncio.Future):
+        """Forget a caller that was cancelled while waiting for a slot"""
+        waiters = self._waiting.get(session_id)
+        if waiters is None or grant not in waiters:
+            return
+        waiters.remove(grant)
+        if not waiters:
+            del self._waiting[session_id]
+            self._ready.remove(session_id)
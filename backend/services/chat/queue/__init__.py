@@ -1,4 +1,4 @@
+from .request_queue import RequestQueue, QueueFullError
+from .admission import AdmissionController, AdmissionRejectedError, admission_lane
 
-from .request_queue import RequestQueue
-
-__all__ = ['RequestQueue']
+__all__ = ['RequestQueue', 'QueueFullError', 'AdmissionController', 'AdmissionRejectedError', 'admission_lane']
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from config.settings import get_settings
+from core.metrics import CHAT_ADMISSION_REJECTIONS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Lanes in priority order; admins may use the share of the limit reserved from users
+LANES = ("admin", "user")
+
+class AdmissionRejectedError(Exception):
+    """Raised when the LLM concurrency limit is reached for the request's lane"""
+
+    def __init__(self, lane: str, limit: int, retry_after: int):
+        super().__init__(f"Chat generation is at capacity ({limit} in flight, lane {lane})")
+        self.lane = lane
+        self.limit = limit
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Adaptive limit on concurrent LLM generations in this worker
+
+    The limit follows the gradient between the long-term and the recent
+    generation latency: while recent latency stays within
+    ADMISSION_LATENCY_TOLERANCE of the long-term average the limit grows by
+    about its square root, and when Azure slows down it shrinks in
+    proportion. Failed generations cut it by ADMISSION_BACKOFF. Requests
+    beyond the limit are rejected at once instead of queueing for minutes,
+    so a slow model cannot tie up the worker. The "user" lane may only use
+    the limit minus ADMISSION_ADMIN_RESERVE of it, which keeps room for
+    admins; cache hits and all non-chat routes never pass through here.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, initial_limit: int = 0, min_limit: int = 0, max_limit: int = 0):
+        self.enabled = settings.ADMISSION_ENABLED
+        self.min_limit = min_limit or settings.ADMISSION_MIN_LIMIT
+        self.max_limit = max_limit or settings.ADMISSION_MAX_LIMIT
+        self.limit = float(initial_limit or settings.ADMISSION_INITIAL_LIMIT)
+        self.tolerance = settings.ADMISSION_LATENCY_TOLERANCE
+        self.inflight = 0
+        # Exponentially weighted latencies; the long one is the baseline the recent one is judged against
+        self._short_rtt = 0.0
+        self._long_rtt = 0.0
+        self._long_alpha = 1.0 / settings.ADMISSION_LONG_WINDOW
+        self._admitted = {lane: 0 for lane in LANES}
+        self._rejected = {lane: 0 for lane in LANES}
+        self._failures = 0
+
+    def lane_limit(self, lane: str) -> int:
+        """Concurrent generations a request in this lane may join"""
+        limit = int(self.limit)
+        if lane == "admin":
+            return limit
+        return max(1, limit - math.ceil(limit * settings.ADMISSION_ADMIN_RESERVE))
+
+    def ensure_capacity(self, lane: str = "user"):
+        """Raise AdmissionRejectedError if a generation in this lane would be rejected now"""
+        if self.enabled and self.inflight >= self.lane_limit(lane):
+            self._rejected[lane] += 1
+            CHAT_ADMISSION_REJECTIONS.labels(lane).inc()
+            raise AdmissionRejectedError(lane, self.lane_limit(lane), self._retry_after())
+
+    @asynccontextmanager
+    async def admit(self, lane: str = "user"):
+        """Hold a generation slot for the enclosed block and learn from how long it took"""
+        if not self.enabled:
+            yield
+            return
+
+        self.ensure_capacity(lane)
+        self.inflight += 1
+        self._admitted[lane] += 1
+        inflight = self.inflight
+        started_at = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # The caller went away; says nothing about the model's latency
+            raise
+        except Exception:
+            self._on_failure()
+            raise
+        else:
+            self._on_success(time.perf_counter() - started_at, inflight)
+        finally:
+            self.inflight -= 1
+
+    def _on_success(self, rtt: float, inflight: int):
+        rtt = max(rtt, 1e-6)
+        if not self._long_rtt:
+            self._short_rtt = self._long_rtt = rtt
+        self._short_rtt += (rtt - self._short_rtt) * 0.1
+        self._long_rtt += (rtt - self._long_rtt) * self._long_alpha
+        # After a sustained slowdown the baseline has drifted up; let it come back down
+        if self._long_rtt / self._short_rtt > 2:
+            self._long_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / self._short_rtt))
+        target = self.limit * gradient
+        # Only grow when the limit is actually being used; shrink whenever latency degrades
+        if inflight >= self.limit / 2:
+            target += math.sqrt(self.limit)
+        elif gradient == 1.0:
+            return
+        self._set_limit(self.limit * 0.8 + target * 0.2)
+
+    def _on_failure(self):
+        self._failures += 1
+        self._set_limit(self.limit * settings.ADMISSION_BACKOFF)
+
+    def _set_limit(self, limit: float):
+        previous = int(self.limit)
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+        if int(self.limit) != previous:
+            logger.debug(f"Chat admission limit {previous} -> {int(self.limit)}")
+
+    def _retry_after(self) -> int:
+        # Roughly when a slot frees up: one recent generation time
+        return max(1, min(settings.ADMISSION_MAX_RETRY_AFTER, math.ceil(self._short_rtt)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "limit": int(self.limit),
+            "lane_limits": {lane: self.lane_limit(lane) for lane in LANES},
+            "inflight": self.inflight,
+            "recent_latency_ms": round(self._short_rtt * 1000, 1),
+            "baseline_latency_ms": round(self._long_rtt * 1000, 1),
+            "admitted": dict(self._admitted),
+            "rejected": dict(self._rejected),
+            "failures": self._failures
+        }
+
+def admission_lane(current_user: Optional[Any]) -> str:
+    """Lane for a chat request: admins get the reserved share of the limit"""
+    if current_user is None:
+        return "user"
+    role = current_user.get("role", "user") if isinstance(current_user, dict) else getattr(current_user, "role", "user")
+    return "admin" if role == "admin" else "user"
@@ -3,62 +3,103 @@ import asyncio
 import logging
 import time
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from config.settings import get_settings
+from core.metrics import observe_stage
+
+settings = get_settings()
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of pending requests"""
+
+    def __init__(self, depth: int, retry_after: int):
+        super().__init__(f"Request queue is full ({depth} pending requests)")
+        self.depth = depth
+        self.retry_after = retry_after
 
 class RequestQueue:
-    def __init__(self):
-        self.pending_requests = {}
-        self.results = {}
-        self.lock = asyncio.Lock()
+    def __init__(self, max_pending: Optional[int] = None, result_ttl: Optional[float] = None):
+        self.pending_requests: Dict[str, Dict[str, Any]] = {}
+        # One future per request, completed by process_request and awaited by get_result
+        self._futures: Dict[str, asyncio.Future] = {}
+        self.max_pending = max_pending or settings.CHAT_QUEUE_MAX_DEPTH
+        self.result_ttl = result_ttl if result_ttl is not None else settings.CHAT_QUEUE_RESULT_TTL
+
+    @property
+    def depth(self) -> int:
+        """Number of requests enqueued but not yet processed"""
+        return len(self.pending_requests)
+
+    def is_full(self) -> bool:
+        """Whether a new request would be rejected"""
+        return self.depth >= self.max_pending
+
+    def ensure_capacity(self) -> None:
+        """Raise QueueFullError if the queue cannot accept another request"""
+        if self.is_full():
+            raise QueueFullError(self.depth, settings.CHAT_QUEUE_RETRY_AFTER)
 
     async def enqueue_request(self, session_id: str, user_id: str, message: str) -> str:
         """Add a request to the queue and return its key"""
+        self.ensure_capacity()
+
         request_key = str(uuid.uuid4())
-        async with self.lock:
-            self.pending_requests[request_key] = {
-                'session_id': session_id,
-                'user_id': user_id,
-                'message': message,
-                'status': 'pending',
-                'timestamp': time.time()
-            }
+        self.pending_requests[request_key] = {
+            'session_id': session_id,
+            'user_id': user_id,
+            'message': message,
+            'status': 'pending',
+            'timestamp': time.time()
+        }
+        self._futures[request_key] = asyncio.get_running_loop().create_future()
         return request_key
 
     async def process_request(self, request_key: str, processor_func, *args, **kwargs):
-        """Process a request and store its result"""
+        """Process a request and complete its future"""
+        request = self.pending_requests.get(request_key)
+        if request is not None:
+            observe_stage("queue_wait", time.time() - request['timestamp'])
         try:
             result = await processor_func(*args, **kwargs)
-            async with self.lock:
-                self.results[request_key] = {
-                    'status': 'completed',
-                    'result': result,
-                    'timestamp': time.time()
-                }
-                if request_key in self.pending_requests:
-                    del self.pending_requests[request_key]
+            self._complete(request_key, result=result)
         except Exception as e:
             logging.error(f"Error processing request {request_key}: {str(e)}")
-            async with self.lock:
-                self.results[request_key] = {
-                    'status': 'error',
-                    'error': str(e),
-                    'timestamp': time.time()
-                }
-                if request_key in self.pending_requests:
-                    del self.pending_requests[request_key]
+            self._complete(request_key, error=Exception(f"Request processing failed: {str(e)}"))
+        finally:
+            self.pending_requests.pop(request_key, None)
 
     async def get_result(self, request_key: str, timeout: float = 60.0) -> Dict:
         """Wait for and return the result of a request"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            async with self.lock:
-                if request_key in self.results:
-                    result = self.results[request_key]
-                    # Clean up after retrieving
-                    del self.results[request_key]
-                    if result['status'] == 'completed':
-                        return result['result']
-                    elif result['status'] == 'error':
-                        raise Exception(f"Request processing failed: {result.get('error', 'Unknown error')}")
-            await asyncio.sleep(0.1)
-        raise TimeoutError(f"Request {request_key} timed out after {timeout} seconds")
+        future = self._futures.get(request_key)
+        if future is None:
+            raise KeyError(f"Unknown or expired request {request_key}")
+
+        try:
+            # Shield so a timed out waiter leaves the future for process_request to complete
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Request {request_key} timed out after {timeout} seconds")
+        finally:
+            self._futures.pop(request_key, None)
+
+    def _complete(self, request_key: str, result: Any = None, error: Optional[Exception] = None):
+        """Resolve the future of a request and schedule eviction if nobody collects it"""
+        future = self._futures.get(request_key)
+        if future is None or future.done():
+            # The waiter already gave up; drop the result
+            return
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+        asyncio.get_running_loop().call_later(self.result_ttl, self._evict, request_key)
+
+    def _evict(self, request_key: str):
+        """Drop a completed result that was never retrieved"""
+        future = self._futures.pop(request_key, None)
+        if future is not None and future.done() and not future.cancelled():
+            # Mark any exception as retrieved so asyncio does not warn about it
+            future.exception()
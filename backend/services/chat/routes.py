@@ -1,30 +1,38 @@
 
+import json
 import uuid
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, Optional, Any
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import BaseModel
 
-from core.database.mongodb import get_mongo_db
-from core.security.auth import get_current_active_user
+from core.database.mongodb import get_mongo_db, get_mongo_stats
+from core.database.mssql import AsyncSessionLocal
+from core.security.auth import get_admin_user, get_current_active_user, get_current_user
+from core.security.rate_limit import RateLimitedError, RateLimiter, limit_llm_requests
+from core.tracing import SPAN_KIND_SERVER, TraceExporter, start_trace
 from services.auth.models import User
 from services.chat.models import ChatMessage, ChatSession
 from services.chat.schemas import (
     ChatMessageRequest, 
     ChatMessageResponse,
+    ChatMessagePage,
+    ChatSessionListResponse,
     ChatSessionResponse,
     CreateSessionRequest
 )
-from services.chat.ai_service import get_ai_response
-
-# Create a simple logger class
-class SessionLogger:
-    @staticmethod
-    def log(user_id: str, log_type: str, message: str, level: str = "info"):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [{level.upper()}] [User: {user_id}] [{log_type}] {message}")
+from services.ai.azure_client import get_azure_client
+from services.chat.ai_service import get_ai_response, get_ai_service, stream_ai_response
+from services.chat.context import ContextBuilder, ConversationContext
+from services.chat.processing import WorkerPool
+from services.chat.queue import AdmissionController, AdmissionRejectedError, QueueFullError, admission_lane
+from services.chat.session import SessionManager
+from services.chat.storage import MessageStore
+from services.chat.utils.serializers import SessionCursorSerializer
+from utils.logger import UserLogger
 
 router = APIRouter()
 
@@ -38,7 +46,7 @@ async def create_chat_session(
     Create a new chat session
     """
     user_id = str(current_user.id) if current_user else "anonymous"
-    SessionLogger.log(user_id, "route", "🆕 Creating new chat session")
+    UserLogger.log(user_id, "route", "🆕 Creating new chat session")
     
     session_id = str(uuid.uuid4())
     
@@ -49,20 +57,23 @@ async def create_chat_session(
     )
     
     # Create session
+    message_storage = MessageStore.default_storage()
     session = ChatSession(
         _id=session_id,
         user_id=current_user.id if current_user else None,
         username=current_user.username if current_user else None,
         module=request.module,
         agent_id=request.agent_id,
-        messages=[welcome_message],
+        message_storage=message_storage,
         metadata=request.metadata
     )
     
     # Store in MongoDB
-    await db[settings.MONGODB_CHAT_COLLECTION].insert_one(session.dict(by_alias=True))
+    session_doc = session.dict(by_alias=True)
+    await db[settings.MONGODB_CHAT_COLLECTION].insert_one(session_doc)
+    await MessageStore(db).append_messages(session_doc, [welcome_message])
     
-    SessionLogger.log(user_id, "success", f"✨ Session created: {session_id[:8]}...", "success")
+    UserLogger.log(user_id, "success", f"✨ Session created: {session_id[:8]}...", "success")
     
     return ChatSessionResponse(
         session_id=session_id,
@@ -79,44 +90,84 @@ async def create_chat_session(
         updated_at=session.updated_at
     )
 
-@router.get("/sessions", response_model=List[ChatSessionResponse])
+@router.get("/sessions", response_model=ChatSessionListResponse)
 async def get_user_chat_sessions(
     db: AsyncIOMotorDatabase = Depends(get_mongo_db),
     current_user: User = Depends(get_current_active_user),
-    module: Optional[str] = Query(None, description="Filter sessions by module")
+    module: Optional[str] = Query(None, description="Filter sessions by module"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of sessions to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """
-    Get all chat sessions for the current user with optional module filtering
+    Get the current user's chat sessions, most recently updated first
+    
+    Sessions are listed from their denormalized preview and counters, so the
+    message history is never loaded. Pass next_cursor back to get older sessions.
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", "📋 Fetching user sessions")
+    UserLogger.log(user_id, "route", "📋 Fetching user sessions")
     
     # Build query with optional module filter
     query = {"user_id": current_user.id}
     if module:
         query["module"] = module
     
-    cursor = db[settings.MONGODB_CHAT_COLLECTION].find(query).sort("updated_at", -1)
-    sessions = []
+    if cursor:
+        try:
+            last_updated_at, last_session_id = SessionCursorSerializer.decode(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query["$or"] = [
+            {"updated_at": {"$lt": last_updated_at}},
+            {"updated_at": last_updated_at, "_id": {"$lt": last_session_id}}
+        ]
+    
+    # Served without an in-memory sort by the (user_id, [module,] updated_at, _id) indexes
+    results = await db[settings.MONGODB_CHAT_COLLECTION].find(
+        query, MessageStore.summary_projection()
+    ).sort([("updated_at", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+    
+    has_more = len(results) > limit
+    results = results[:limit]
     
-    async for session in cursor:
-        sessions.append(ChatSessionResponse(
+    sessions = [
+        ChatSessionResponse(
             session_id=session["_id"],
-            messages=[
-                ChatMessageResponse(
-                    text=msg["text"],
-                    isUser=msg["isUser"],
-                    timestamp=msg["timestamp"]
-                ) for msg in session["messages"][-5:]  # Return only last 5 messages for preview
-            ],
+            messages=MessageStore.preview_of(session),
             module=session.get("module"),
             agent_id=session.get("agent_id"),
+            message_count=session.get("message_count"),
+            last_message_at=session.get("last_message_at"),
             created_at=session["created_at"],
             updated_at=session["updated_at"]
-        ))
+        ) for session in results
+    ]
     
-    SessionLogger.log(user_id, "success", f"📚 Retrieved {len(sessions)} sessions", "success")
-    return sessions
+    next_cursor = None
+    if has_more and results:
+        next_cursor = SessionCursorSerializer.encode(results[-1]["updated_at"], results[-1]["_id"])
+    
+    UserLogger.log(user_id, "success", f"📚 Retrieved {len(sessions)} sessions", "success")
+    return ChatSessionListResponse(sessions=sessions, next_cursor=next_cursor)
+
+@router.get("/stats")
+async def get_chat_stats(current_user: User = Depends(get_admin_user)):
+    """
+    Get chat processing statistics for this worker process (admin only)
+    """
+    return {
+        "worker_pool": WorkerPool.get_instance().stats(),
+        "sessions": SessionManager.get_instance().stats(),
+        "response_cache": get_ai_service().cache_service.stats(),
+        "azure_openai": get_azure_client().stats(),
+        "mongodb": get_mongo_stats(),
+        "tracing": TraceExporter.get_instance().stats(),
+        "rate_limit": RateLimiter.get_instance().stats(),
+        "admission": AdmissionController.get_instance().stats()
+    }
 
 @router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
 async def get_chat_session(
@@ -128,7 +179,7 @@ async def get_chat_session(
     Get a chat session by ID
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", f"📥 Fetching session {session_id[:8]}...")
+    UserLogger.log(user_id, "route", f"📥 Fetching session {session_id[:8]}...")
     
     session = await db[settings.MONGODB_CHAT_COLLECTION].find_one({
         "_id": session_id,
@@ -136,13 +187,15 @@ async def get_chat_session(
     })
     
     if not session:
-        SessionLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found", "error")
+        UserLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found", "error")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat session not found or you don't have access"
         )
     
-    SessionLogger.log(user_id, "success", f"📁 Session {session_id[:8]}... retrieved", "success")
+    UserLogger.log(user_id, "success", f"📁 Session {session_id[:8]}... retrieved", "success")
+    
+    messages = await MessageStore(db).get_recent_messages(session)
     
     return ChatSessionResponse(
         session_id=session["_id"],
@@ -151,7 +204,7 @@ async def get_chat_session(
                 text=msg["text"],
                 isUser=msg["isUser"],
                 timestamp=msg["timestamp"]
-            ) for msg in session["messages"]
+            ) for msg in messages
         ],
         module=session.get("module"),
         agent_id=session.get("agent_id"),
@@ -159,7 +212,7 @@ async def get_chat_session(
         updated_at=session["updated_at"]
     )
 
-@router.post("/{session_id}/send", response_model=ChatMessageResponse)
+@router.post("/{session_id}/send", response_model=ChatMessageResponse, dependencies=[Depends(limit_llm_requests)])
 async def add_message_to_session(
     message: ChatMessageRequest,
     session_id: str = Path(..., description="The ID of the chat session"),
@@ -170,59 +223,58 @@ async def add_message_to_session(
     Add a message to a chat session and get AI response
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", f"💬 New message in session {session_id[:8]}...")
-    SessionLogger.log(user_id, "message", f"📝 Message: {message.text[:50]}...")
+    UserLogger.log(user_id, "route", f"💬 New message in session {session_id[:8]}...")
+    UserLogger.log(user_id, "message", f"📝 Message: {message.text[:50]}...")
     
-    # Find the session and verify ownership
-    session = await db[settings.MONGODB_CHAT_COLLECTION].find_one({
-        "_id": session_id,
-        "user_id": current_user.id
-    })
+    # Find the session and verify ownership, loading only the recent history
+    session = await db[settings.MONGODB_CHAT_COLLECTION].find_one(
+        {"_id": session_id, "user_id": current_user.id},
+        MessageStore.session_projection(recent=ContextBuilder.history_window())
+    )
     
     if not session:
-        SessionLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
+        UserLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat session not found or you don't have access"
         )
     
+    # Reject before storing anything when the worker is saturated (429 or 503)
+    priority = admission_lane(current_user)
+    get_ai_service().ensure_capacity(priority)
+    
+    message_store = MessageStore(db)
+    context = await _load_context(message_store, session)
+    
     # Add user message to session
     user_message = ChatMessage(
         text=message.text,
         isUser=True
     )
     
-    await db[settings.MONGODB_CHAT_COLLECTION].update_one(
-        {"_id": session_id},
-        {
-            "$push": {"messages": user_message.dict()},
-            "$set": {"updated_at": datetime.now()}
-        }
-    )
+    await message_store.append_messages(session, [user_message])
     
     # Get AI response based on module context
-    ai_response_text = await get_ai_response(
+    ai_response = await get_ai_response(
         message.text, 
-        session["messages"], 
+        context.messages, 
         session.get("module"), 
-        session.get("agent_id")
+        session.get("agent_id"),
+        user_id=user_id,
+        session_id=session["_id"],
+        context_summary=context.summary_text,
+        priority=priority
     )
     
     # Add AI response to session
     ai_message = ChatMessage(
-        text=ai_response_text,
+        text=ai_response["text"],
         isUser=False
     )
     
-    await db[settings.MONGODB_CHAT_COLLECTION].update_one(
-        {"_id": session_id},
-        {
-            "$push": {"messages": ai_message.dict()},
-            "$set": {"updated_at": datetime.now()}
-        }
-    )
+    await message_store.append_messages(session, [ai_message])
     
-    SessionLogger.log(user_id, "success", "✅ Message processed successfully", "success")
+    UserLogger.log(user_id, "success", "✅ Message processed successfully", "success")
     
     return ChatMessageResponse(
         text=ai_message.text,
@@ -230,44 +282,268 @@ async def add_message_to_session(
         timestamp=ai_message.timestamp
     )
 
-@router.get("/{session_id}/messages", response_model=List[ChatMessageResponse])
+async def _load_context(message_store: MessageStore, session: Dict[str, Any]) -> ConversationContext:
+    """Load the recent history of a session and refresh its cached summary if turns fell out of the prompt"""
+    history = await message_store.get_recent_messages(session, limit=ContextBuilder.history_window())
+    context = await get_ai_service().prepare_context(history, session.get("context_summary"))
+    if context.summary_updated:
+        await message_store.save_context_summary(session, context.summary)
+    return context
+
+async def _stream_session_reply(
+    db: AsyncIOMotorDatabase,
+    session: Dict[str, Any],
+    text: str,
+    user_id: str,
+    priority: str = "user"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Store a user message, stream the AI reply and store it once complete
+    
+    If the consumer stops iterating (client disconnect), generation is cancelled
+    and no partial assistant message is stored.
+    """
+    message_store = MessageStore(db)
+    context = await _load_context(message_store, session)
+    
+    await message_store.append_messages(session, [ChatMessage(text=text, isUser=True)])
+    
+    completed = False
+    try:
+        async for event in stream_ai_response(
+            text,
+            context.messages,
+            session.get("module"),
+            session.get("agent_id"),
+            user_id=user_id,
+            session_id=session["_id"],
+            context_summary=context.summary_text,
+            priority=priority
+        ):
+            if event["type"] == "done":
+                ai_message = ChatMessage(text=event["response"]["text"], isUser=False)
+                await message_store.append_messages(session, [ai_message])
+                completed = True
+                yield {
+                    "type": "done",
+                    "message": ChatMessageResponse(
+                        text=ai_message.text,
+                        isUser=ai_message.isUser,
+                        timestamp=ai_message.timestamp
+                    ),
+                    "response": event["response"]
+                }
+            else:
+                yield event
+    finally:
+        if not completed:
+            UserLogger.log(user_id, "info", f"🛑 Stream for session {session['_id'][:8]}... ended early")
+
+def _sse_event(event: Dict[str, Any]) -> str:
+    """Format a stream event as a Server-Sent Events frame"""
+    payload = {key: value for key, value in event.items() if key != "type"}
+    return f"event: {event['type']}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+@router.post("/{session_id}/stream", dependencies=[Depends(limit_llm_requests)])
+async def stream_message_to_session(
+    message: ChatMessageRequest,
+    request: Request,
+    session_id: str = Path(..., description="The ID of the chat session"),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Add a message to a chat session and stream the AI response as Server-Sent Events
+    
+    Emits `delta` events with text pieces as they are generated, then a single
+    `done` event with the stored assistant message, or an `error` event.
+    """
+    user_id = str(current_user.id)
+    UserLogger.log(user_id, "route", f"📡 Streaming message in session {session_id[:8]}...")
+    
+    if not settings.ENABLE_STREAMING:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Streaming is disabled"
+        )
+    
+    session = await db[settings.MONGODB_CHAT_COLLECTION].find_one(
+        {"_id": session_id, "user_id": current_user.id},
+        MessageStore.session_projection(recent=ContextBuilder.history_window())
+    )
+    
+    if not session:
+        UserLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found or you don't have access"
+        )
+    
+    priority = admission_lane(current_user)
+    get_ai_service().ensure_capacity(priority)
+    
+    async def event_stream():
+        events = _stream_session_reply(db, session, message.text, user_id, priority)
+        try:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                yield _sse_event(event)
+        except AdmissionRejectedError as e:
+            yield _sse_event({"type": "error", "detail": "The assistant is busy", "retry_after": e.retry_after})
+        except Exception as e:
+            UserLogger.log(user_id, "error", f"❌ Streaming failed: {str(e)}", "error")
+            yield _sse_event({"type": "error", "detail": "The response could not be completed"})
+        finally:
+            # Closing the generator cancels the upstream model request; shield it
+            # because a disconnect arrives here as a cancellation
+            with anyio.CancelScope(shield=True):
+                await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{session_id}/ws")
+async def stream_session_websocket(
+    websocket: WebSocket,
+    session_id: str = Path(..., description="The ID of the chat session"),
+    token: str = Query(..., description="JWT access token"),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    WebSocket variant of the streaming endpoint
+    
+    Browsers cannot set headers on WebSocket connections, so the access token is
+    passed as a query parameter. Each `{"text": ...}` frame sent by the client
+    produces `delta` frames followed by a `done` (or `error`) frame.
+    """
+    try:
+        # A session only for the lookup; a dependency would hold its pooled connection for the socket's lifetime
+        async with AsyncSessionLocal() as sql_db:
+            current_user = await get_current_user(token=token, db=sql_db, mongo_db=db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    user_id = str(current_user.id)
+    session = await db[settings.MONGODB_CHAT_COLLECTION].find_one(
+        {"_id": session_id, "user_id": current_user.id},
+        {"messages": 0}
+    )
+    if not settings.ENABLE_STREAMING or not session:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    limiter = RateLimiter.get_instance()
+    rate_limit_key = limiter.token_key(token) or f"user:{user_id}"
+    priority = admission_lane(current_user)
+    
+    await websocket.accept()
+    UserLogger.log(user_id, "route", f"🔌 WebSocket opened for session {session_id[:8]}...")
+    
+    try:
+        while True:
+            data = await websocket.receive_json()
+            text = data.get("text") if isinstance(data, dict) else None
+            if not text:
+                await websocket.send_json({"type": "error", "detail": "Message text is required"})
+                continue
+            
+            # Every turn generates an answer, so it is charged like a send request
+            try:
+                await limiter.check(rate_limit_key, "llm")
+            except RateLimitedError as e:
+                await websocket.send_json({"type": "error", "detail": "Too many chat requests", "retry_after": e.retry_after})
+                continue
+            
+            # Reject before storing the message when the worker is saturated, as /send and /stream do
+            try:
+                get_ai_service().ensure_capacity(priority)
+            except (QueueFullError, AdmissionRejectedError) as e:
+                await websocket.send_json({"type": "error", "detail": "The assistant is busy", "retry_after": e.retry_after})
+                continue
+            
+            # Each turn is traced on its own, like an HTTP request
+            with start_trace("WS chat message", kind=SPAN_KIND_SERVER, session_id=session_id):
+                # Reload the recent history for every turn
+                session = await db[settings.MONGODB_CHAT_COLLECTION].find_one(
+                    {"_id": session_id},
+                    MessageStore.session_projection(recent=ContextBuilder.history_window())
+                )
+                events = _stream_session_reply(db, session, text, user_id, priority)
+                try:
+                    async for event in events:
+                        await websocket.send_json(jsonable_encoder(event))
+                except WebSocketDisconnect:
+                    raise
+                except AdmissionRejectedError as e:
+                    await websocket.send_json({"type": "error", "detail": "The assistant is busy", "retry_after": e.retry_after})
+                except Exception as e:
+                    UserLogger.log(user_id, "error", f"❌ Streaming failed: {str(e)}", "error")
+                    await websocket.send_json({"type": "error", "detail": "The response could not be completed"})
+                finally:
+                    await events.aclose()
+    except WebSocketDisconnect:
+        UserLogger.log(user_id, "info", f"🔌 WebSocket closed for session {session_id[:8]}...")
+
+@router.get("/{session_id}/messages", response_model=ChatMessagePage)
 async def get_session_messages(
     session_id: str = Path(..., description="The ID of the chat session"),
-    limit: int = Query(50, description="Maximum number of messages to return"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of messages to return"),
+    before: Optional[int] = Query(None, ge=0, description="Return messages older than this cursor"),
+    after: Optional[int] = Query(None, ge=0, description="Return messages newer than this cursor"),
     db: AsyncIOMotorDatabase = Depends(get_mongo_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get messages for a specific chat session
+    Get a page of messages for a specific chat session
+    
+    Without a cursor the most recent messages are returned. Use the returned
+    next_cursor as `before` to page back through older history, or as `after`
+    to continue forward from a known position.
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", f"📥 Fetching messages for session {session_id[:8]}...")
+    UserLogger.log(user_id, "route", f"📥 Fetching messages for session {session_id[:8]}...")
     
-    # Find the session and verify ownership
-    session = await db[settings.MONGODB_CHAT_COLLECTION].find_one({
-        "_id": session_id,
-        "user_id": current_user.id
-    })
+    if before is not None and after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either 'before' or 'after', not both"
+        )
+    
+    # Find the session and verify ownership, loading only the requested page
+    session = await db[settings.MONGODB_CHAT_COLLECTION].find_one(
+        {"_id": session_id, "user_id": current_user.id},
+        MessageStore.page_projection(before=before, after=after, limit=limit)
+    )
     
     if not session:
-        SessionLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
+        UserLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat session not found or you don't have access"
         )
     
-    # Get messages (with limit)
-    messages = session["messages"][-limit:] if limit > 0 else session["messages"]
+    messages, next_cursor = await MessageStore(db).get_message_page(
+        session, before=before, after=after, limit=limit
+    )
     
-    SessionLogger.log(user_id, "success", f"📨 Retrieved {len(messages)} messages", "success")
+    UserLogger.log(user_id, "success", f"📨 Retrieved {len(messages)} messages", "success")
     
-    return [
-        ChatMessageResponse(
-            text=msg["text"],
-            isUser=msg["isUser"],
-            timestamp=msg["timestamp"]
-        ) for msg in messages
-    ]
+    return ChatMessagePage(
+        messages=[
+            ChatMessageResponse(
+                text=msg["text"],
+                isUser=msg["isUser"],
+                timestamp=msg["timestamp"],
+                seq=msg["seq"]
+            ) for msg in messages
+        ],
+        next_cursor=next_cursor
+    )
 
 @router.delete("/sessions/{session_id}", status_code=204)
 async def delete_session(
@@ -279,7 +555,7 @@ async def delete_session(
     Delete a chat session
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", f"🗑️ Deleting session {session_id[:8]}...")
+    UserLogger.log(user_id, "route", f"🗑️ Deleting session {session_id[:8]}...")
     
     # Delete the session and verify ownership
     result = await db[settings.MONGODB_CHAT_COLLECTION].delete_one({
@@ -288,13 +564,15 @@ async def delete_session(
     })
     
     if result.deleted_count == 0:
-        SessionLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
+        UserLogger.log(user_id, "error", f"❌ Session {session_id[:8]}... not found or not owned", "error")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat session not found or you don't have access"
         )
     
-    SessionLogger.log(user_id, "success", "🧹 Session deleted successfully", "success")
+    await MessageStore(db).delete_messages(session_id)
+    
+    UserLogger.log(user_id, "success", "🧹 Session deleted successfully", "success")
 
 @router.get("/module/{module_name}", response_model=ChatSessionResponse)
 async def get_or_create_module_chat(
@@ -306,7 +584,7 @@ async def get_or_create_module_chat(
     Get or create a module-specific chat session
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", f"🔍 Finding/creating chat for module: {module_name}")
+    UserLogger.log(user_id, "route", f"🔍 Finding/creating chat for module: {module_name}")
     
     # First, try to find an existing session for this module
     session = await db[settings.MONGODB_CHAT_COLLECTION].find_one({
@@ -316,7 +594,7 @@ async def get_or_create_module_chat(
     
     # If no session exists, create a new one
     if not session:
-        SessionLogger.log(user_id, "info", f"🆕 No existing session for module {module_name}, creating new")
+        UserLogger.log(user_id, "info", f"🆕 No existing session for module {module_name}, creating new")
         
         # Create request object for the helper function
         create_request = CreateSessionRequest(module=module_name)
@@ -329,7 +607,9 @@ async def get_or_create_module_chat(
         )
     
     # Return existing session
-    SessionLogger.log(user_id, "success", f"🔄 Using existing session {session['_id'][:8]}...", "success")
+    UserLogger.log(user_id, "success", f"🔄 Using existing session {session['_id'][:8]}...", "success")
+    
+    messages = await MessageStore(db).get_recent_messages(session)
     
     return ChatSessionResponse(
         session_id=session["_id"],
@@ -338,7 +618,7 @@ async def get_or_create_module_chat(
                 text=msg["text"],
                 isUser=msg["isUser"],
                 timestamp=msg["timestamp"]
-            ) for msg in session["messages"]
+            ) for msg in messages
         ],
         module=session.get("module"),
         agent_id=session.get("agent_id"),
@@ -356,7 +636,7 @@ async def get_or_create_agent_chat(
     Get or create an agent-specific chat session
     """
     user_id = str(current_user.id)
-    SessionLogger.log(user_id, "route", f"🔍 Finding/creating chat for agent: {agent_id}")
+    UserLogger.log(user_id, "route", f"🔍 Finding/creating chat for agent: {agent_id}")
     
     # First, try to find an existing session for this agent
     session = await db[settings.MONGODB_CHAT_COLLECTION].find_one({
@@ -366,7 +646,7 @@ async def get_or_create_agent_chat(
     
     # If no session exists, create a new one
     if not session:
-        SessionLogger.log(user_id, "info", f"🆕 No existing session for agent {agent_id}, creating new")
+        UserLogger.log(user_id, "info", f"🆕 No existing session for agent {agent_id}, creating new")
         
         # Create request object for the helper function
         create_request = CreateSessionRequest(agent_id=agent_id)
@@ -379,7 +659,9 @@ async def get_or_create_agent_chat(
         )
     
     # Return existing session
-    SessionLogger.log(user_id, "success", f"🔄 Using existing session {session['_id'][:8]}...", "success")
+    UserLogger.log(user_id, "success", f"🔄 Using existing session {session['_id'][:8]}...", "success")
+    
+    messages = await MessageStore(db).get_recent_messages(session)
     
     return ChatSessionResponse(
         session_id=session["_id"],
@@ -388,7 +670,7 @@ async def get_or_create_agent_chat(
                 text=msg["text"],
                 isUser=msg["isUser"],
                 timestamp=msg["timestamp"]
-            ) for msg in session["messages"]
+            ) for msg in messages
         ],
         module=session.get("module"),
         agent_id=session.get("agent_id"),
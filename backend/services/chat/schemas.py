@@ -12,6 +12,12 @@ class ChatMessageResponse(BaseModel):
     text: str
     isUser: bool
     timestamp: datetime
+    seq: Optional[int] = None  # Position in the session, used as pagination cursor
+
+class ChatMessagePage(BaseModel):
+    """Schema for a page of chat messages"""
+    messages: List[ChatMessageResponse]
+    next_cursor: Optional[int] = None  # Pass as before/after to fetch the next page
 
 class ChatSessionResponse(BaseModel):
     """Schema for chat session responses"""
@@ -19,9 +25,16 @@ class ChatSessionResponse(BaseModel):
     messages: List[ChatMessageResponse]
     module: Optional[str] = None
     agent_id: Optional[int] = None
+    message_count: Optional[int] = None
+    last_message_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
+class ChatSessionListResponse(BaseModel):
+    """Schema for a page of chat sessions"""
+    sessions: List[ChatSessionResponse]
+    next_cursor: Optional[str] = None  # Pass as cursor to fetch older sessions
+
 class CreateSessionRequest(BaseModel):
     """Schema for creating a new chat session"""
     module: Optional[str] = None
@@ -1,9 +1,25 @@
 
 import asyncio
+import logging
 import os
+import shutil
 import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+from config.settings import get_settings
+
+settings = get_settings()
 
 class SessionManager:
+    """
+    Per-process session state: interpreter data, temp directories and semaphores.
+
+    Sessions are kept in least-recently-used order. Idle sessions are reaped
+    after CHAT_SESSION_TTL seconds and the least recently used ones are evicted
+    once more than CHAT_SESSION_MAX are held. A session whose semaphore is held
+    or awaited is never evicted.
+    """
     _instance = None
     
     @classmethod
@@ -12,30 +28,45 @@ class SessionManager:
             cls._instance = cls()
         return cls._instance
     
-    def __init__(self):
-        self._sessions = {}
-        self.session_semaphores = {}
+    def __init__(self, ttl: float = 0, max_sessions: int = 0):
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.session_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.ttl = ttl or settings.CHAT_SESSION_TTL
+        self.max_sessions = max_sessions or settings.CHAT_SESSION_MAX
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.logger = logging.getLogger(__name__)
     
     async def get_session_interpreter(self, session_id: str):
         """Get or create a session-specific interpreter"""
-        if session_id not in self._sessions:
-            # Create temp directory for session
-            temp_dir = f"/tmp/session_{session_id}"
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # Initialize session data
-            self._sessions[session_id] = {
-                'interpreter': None,  # Real implementation would initialize interpreter here
-                'temp_dir': temp_dir,
-                'created_at': time.time()
-            }
+        if session_id in self._sessions:
+            self._touch(session_id)
+            return self._sessions[session_id]
+        
+        # Create temp directory for session
+        temp_dir = f"/tmp/session_{session_id}"
+        os.makedirs(temp_dir, exist_ok=True)
         
-        return self._sessions[session_id]
+        # Initialize session data
+        now = time.time()
+        session = {
+            'interpreter': None,  # Real implementation would initialize interpreter here
+            'temp_dir': temp_dir,
+            'created_at': now,
+            'last_used': now
+        }
+        self._sessions[session_id] = session
+        
+        if len(self._sessions) > self.max_sessions:
+            await self._evict_lru(keep=session_id)
+        
+        return session
     
     async def acquire_semaphore(self, session_id: str):
         """Get a semaphore for a session to control concurrent access"""
         if session_id not in self.session_semaphores:
             self.session_semaphores[session_id] = asyncio.Semaphore(1)
+        self._touch(session_id)
         
         await self.session_semaphores[session_id].acquire()
         return self.session_semaphores[session_id]
@@ -44,3 +75,83 @@ class SessionManager:
         """Release the semaphore for a session"""
         if session_id in self.session_semaphores:
             self.session_semaphores[session_id].release()
+        self._touch(session_id)
+    
+    def is_busy(self, session_id: str) -> bool:
+        """Whether a request of this session holds or is waiting for its semaphore"""
+        semaphore = self.session_semaphores.get(session_id)
+        if semaphore is None:
+            return False
+        return semaphore.locked() or bool(getattr(semaphore, "_waiters", None))
+    
+    async def evict_session(self, session_id: str) -> bool:
+        """Drop a session's state and temp directory unless it is busy"""
+        if self.is_busy(session_id):
+            return False
+        
+        self.session_semaphores.pop(session_id, None)
+        session = self._sessions.pop(session_id, None)
+        if session and session.get('temp_dir'):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, shutil.rmtree, session['temp_dir'], True)
+        return True
+    
+    async def reap_idle_sessions(self) -> int:
+        """Evict sessions that have been idle for longer than the TTL"""
+        cutoff = time.time() - self.ttl
+        idle = [
+            session_id for session_id, session in self._sessions.items()
+            if session['last_used'] < cutoff
+        ]
+        # Semaphores of requests that never created session state
+        idle += [
+            session_id for session_id in self.session_semaphores
+            if session_id not in self._sessions
+        ]
+        
+        reaped = 0
+        for session_id in idle:
+            if await self.evict_session(session_id):
+                reaped += 1
+        self.evicted_idle += reaped
+        return reaped
+    
+    async def run_reaper(self, interval: float = 0):
+        """Periodically reap idle sessions until cancelled"""
+        interval = interval or settings.CHAT_SESSION_REAP_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                reaped = await self.reap_idle_sessions()
+                if reaped:
+                    self.logger.info(f"Reaped {reaped} idle chat sessions, {len(self._sessions)} active")
+            except Exception as e:
+                self.logger.error(f"Session reaper error: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of session counts and evictions"""
+        return {
+            "active_sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "semaphores": len(self.session_semaphores),
+            "busy_sessions": sum(1 for session_id in self.session_semaphores if self.is_busy(session_id)),
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru
+        }
+    
+    def _touch(self, session_id: str):
+        """Mark a session as most recently used"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session['last_used'] = time.time()
+            self._sessions.move_to_end(session_id)
+    
+    async def _evict_lru(self, keep: str = ""):
+        """Evict least recently used sessions other than keep until back under the cap"""
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if session_id == keep:
+                continue
+            if await self.evict_session(session_id):
+                self.evicted_lru += 1
@@ -0,0 +1,4 @@
+
+from .message_store import MessageStore, STORAGE_COLLECTION, STORAGE_EMBEDDED
+
+__all__ = ['MessageStore', 'STORAGE_COLLECTION', 'STORAGE_EMBEDDED']
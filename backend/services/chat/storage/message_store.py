@@ -0,0 +1,269 @@
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from config.settings import get_settings
+from core.metrics import time_stage
+from ..models import ChatMessage
+
+settings = get_settings()
+
+# Messages embedded in the session document's ``messages`` array (legacy layout)
+STORAGE_EMBEDDED = "embedded"
+# Messages stored one document per message in MONGODB_MESSAGE_COLLECTION
+STORAGE_COLLECTION = "collection"
+
+class MessageStore:
+    """
+    Reads and writes chat messages for a session regardless of where they live.
+
+    Each session document records its layout in ``message_storage``. Sessions
+    without the field predate the message collection and are treated as
+    embedded, so both layouts can coexist while the migration runs.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.sessions = db[settings.MONGODB_CHAT_COLLECTION]
+        self.messages = db[settings.MONGODB_MESSAGE_COLLECTION]
+
+    @staticmethod
+    def default_storage() -> str:
+        """Storage layout used for newly created sessions"""
+        if settings.CHAT_MESSAGE_STORAGE == STORAGE_COLLECTION:
+            return STORAGE_COLLECTION
+        return STORAGE_EMBEDDED
+
+    @staticmethod
+    def storage_of(session: Dict[str, Any]) -> str:
+        """Storage layout of an existing session document"""
+        return session.get("message_storage", STORAGE_EMBEDDED)
+
+    @staticmethod
+    def session_projection(recent: int = 0) -> Dict[str, Any]:
+        """
+        Projection for loading a session without its full message history
+
+        Args:
+            recent: Number of trailing embedded messages to keep (0 drops them all)
+        """
+        if recent > 0:
+            return {"messages": {"$slice": -recent}}
+        return {"messages": 0}
+
+    @staticmethod
+    def summary_projection() -> Dict[str, Any]:
+        """Projection for listing sessions from their denormalized summary fields"""
+        return {
+            "module": 1,
+            "agent_id": 1,
+            "created_at": 1,
+            "updated_at": 1,
+            "message_storage": 1,
+            "message_count": 1,
+            "last_message_at": 1,
+            "preview": 1,
+            # Only used by sessions written before the preview existed
+            "messages": {"$slice": -settings.CHAT_PREVIEW_MESSAGES}
+        }
+
+    @staticmethod
+    def preview_of(session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Preview messages of a session loaded with summary_projection"""
+        if "preview" in session:
+            return session["preview"]
+        return session.get("messages", [])[-settings.CHAT_PREVIEW_MESSAGES:]
+
+    @staticmethod
+    def page_projection(before: Optional[int] = None, after: Optional[int] = None, limit: int = 50) -> Dict[str, Any]:
+        """
+        Projection that loads one page of embedded messages for get_message_page
+
+        The slice is computed by the server, so only the requested messages are
+        sent over the wire. Sessions using the message collection have no
+        ``messages`` array and simply get an empty page here.
+        """
+        if after is not None:
+            page = {"$slice": [{"$ifNull": ["$messages", []]}, after + 1, limit]}
+        elif before is not None:
+            start = max(0, before - limit)
+            page = {"$slice": [{"$ifNull": ["$messages", []]}, start, max(1, before - start)]}
+        else:
+            page = {"$slice": [{"$ifNull": ["$messages", []]}, -limit]}
+
+        return {
+            "message_storage": 1,
+            "message_count": 1,
+            "page": page,
+            "page_total": {"$size": {"$ifNull": ["$messages", []]}}
+        }
+
+    async def append_messages(self, session: Dict[str, Any], messages: List[ChatMessage]) -> None:
+        """Append messages to a session and bump its counter and timestamp"""
+        with time_stage("mongo_write"):
+            await self._append_messages(session, messages)
+
+    async def _append_messages(self, session: Dict[str, Any], messages: List[ChatMessage]) -> None:
+        if not messages:
+            return
+
+        now = datetime.now()
+        docs = [message.dict() for message in messages]
+
+        # Summary fields read by the session list instead of the full history
+        preview = {"$each": [dict(doc) for doc in docs], "$slice": -settings.CHAT_PREVIEW_MESSAGES}
+        summary = {"updated_at": now, "last_message_at": docs[-1]["timestamp"]}
+
+        if self.storage_of(session) != STORAGE_COLLECTION:
+            result = await self.sessions.update_one(
+                {"_id": session["_id"], "message_storage": {"$ne": STORAGE_COLLECTION}},
+                {
+                    "$push": {"messages": {"$each": docs}, "preview": preview},
+                    "$inc": {"message_count": len(docs)},
+                    "$set": summary
+                }
+            )
+            if result.matched_count:
+                return
+
+            # migrate_chat_messages.py moved the session after it was read; a push
+            # would land in an array nobody reads any more
+            current = await self.sessions.find_one({"_id": session["_id"]}, {"message_storage": 1})
+            if current is None or self.storage_of(current) != STORAGE_COLLECTION:
+                return
+            # Later appends through the same document go straight to the collection
+            session["message_storage"] = STORAGE_COLLECTION
+
+        # Reserve a contiguous block of sequence numbers on the session document,
+        # then write the messages themselves without touching the session again
+        updated = await self.sessions.find_one_and_update(
+            {"_id": session["_id"]},
+            {
+                "$push": {"preview": preview},
+                "$inc": {"message_count": len(docs)},
+                "$set": summary
+            },
+            projection={"message_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        first_seq = updated["message_count"] - len(docs)
+
+        for offset, doc in enumerate(docs):
+            doc["session_id"] = session["_id"]
+            doc["seq"] = first_seq + offset
+
+        await self.messages.insert_many(docs, ordered=True)
+
+    async def get_recent_messages(self, session: Dict[str, Any], limit: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get the most recent messages of a session in chronological order
+
+        Args:
+            session: Session document (embedded sessions must include ``messages``)
+            limit: Maximum number of messages to return (0 returns all)
+        """
+        if self.storage_of(session) != STORAGE_COLLECTION:
+            messages = session.get("messages", [])
+            return messages[-limit:] if limit > 0 else messages
+
+        cursor = self.messages.find(
+            {"session_id": session["_id"]},
+            projection={"_id": 0, "text": 1, "isUser": 1, "timestamp": 1, "seq": 1}
+        ).sort("seq", -1)
+        if limit > 0:
+            cursor = cursor.limit(limit)
+
+        messages = await cursor.to_list(length=limit or None)
+        messages.reverse()
+        return messages
+
+    async def get_message_page(
+        self,
+        session: Dict[str, Any],
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Get one page of messages using keyset pagination on ``seq``
+
+        Without a cursor the newest ``limit`` messages are returned. ``before``
+        pages towards older messages and ``after`` towards newer ones.
+
+        Args:
+            session: Session document loaded with page_projection
+            before: Return messages with a sequence number lower than this
+            after: Return messages with a sequence number higher than this
+            limit: Maximum number of messages to return
+
+        Returns:
+            Messages in chronological order and the cursor for the next page
+            in the same direction (None when there are no more messages)
+        """
+        if self.storage_of(session) != STORAGE_COLLECTION:
+            return self._embedded_page(session, before, after, limit)
+
+        query: Dict[str, Any] = {"session_id": session["_id"]}
+        if after is not None:
+            query["seq"] = {"$gt": after}
+            direction = 1
+        else:
+            if before is not None:
+                query["seq"] = {"$lt": before}
+            direction = -1
+
+        # Fetch one extra message to learn whether another page exists
+        cursor = self.messages.find(
+            query,
+            projection={"_id": 0, "text": 1, "isUser": 1, "timestamp": 1, "seq": 1}
+        ).sort("seq", direction).limit(limit + 1)
+        messages = await cursor.to_list(length=limit + 1)
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if direction == -1:
+            messages.reverse()
+            next_cursor = messages[0]["seq"] if has_more and messages else None
+        else:
+            next_cursor = messages[-1]["seq"] if has_more and messages else None
+
+        return messages, next_cursor
+
+    @staticmethod
+    def _embedded_page(
+        session: Dict[str, Any],
+        before: Optional[int],
+        after: Optional[int],
+        limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Number the slice loaded by page_projection and compute its cursor"""
+        page = session.get("page") or []
+        total = session.get("page_total", 0)
+
+        if after is not None:
+            start = after + 1
+        elif before is not None:
+            if before <= 0:
+                return [], None
+            start = max(0, before - limit)
+        else:
+            start = total - len(page)
+
+        messages = [dict(msg, seq=start + offset) for offset, msg in enumerate(page)]
+
+        if after is not None:
+            next_cursor = messages[-1]["seq"] if messages and start + len(messages) < total else None
+        else:
+            next_cursor = start if messages and start > 0 else None
+
+        return messages, next_cursor
+
+    async def save_context_summary(self, session: Dict[str, Any], summary: Dict[str, Any]) -> None:
+        """Cache the running conversation summary on the session document"""
+        await self.sessions.update_one({"_id": session["_id"]}, {"$set": {"context_summary": summary}})
+
+    async def delete_messages(self, session_id: str) -> None:
+        """Remove all externally stored messages of a session"""
+        await self.messages.delete_many({"session_id": session_id})
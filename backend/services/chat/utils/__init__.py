@@ -1,6 +1,6 @@
 
-from .logger import SessionLogger
-from .serializers import TableDataSerializer
+from utils.logger import SessionLogger
+from .serializers import TableDataSerializer, SessionCursorSerializer
 from .prompt_generator import PromptQuestion
 
-__all__ = ['SessionLogger', 'TableDataSerializer', 'PromptQuestion']
+__all__ = ['SessionLogger', 'TableDataSerializer', 'SessionCursorSerializer', 'PromptQuestion']
@@ -1,6 +1,28 @@
 
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
 class TableDataSerializer:
     @staticmethod
     def serialize_records(records):
         """Convert and sanitize records for JSON serialization"""
         return records
+
+class SessionCursorSerializer:
+    @staticmethod
+    def encode(updated_at: datetime, session_id: str) -> str:
+        """Encode the sort key of the last listed session as an opaque cursor"""
+        raw = f"{updated_at.isoformat()}|{session_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode(cursor: str) -> Tuple[datetime, str]:
+        """Decode a cursor produced by encode, raising ValueError if malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            updated_at, session_id = raw.split("|", 1)
+            return datetime.fromisoformat(updated_at), session_id
+        except (UnicodeError, binascii.Error) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
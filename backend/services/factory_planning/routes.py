@@ -0,0 +1,77 @@
+
+from fastapi import APIRouter, Depends
+from typing import Dict, Any
+
+from core.security.auth import get_current_active_user
+from services.auth.models import User
+
+router = APIRouter()
+
+@router.get("/schedule")
+async def get_production_schedule(current_user: User = Depends(get_current_active_user)):
+    """
+    Get the production schedule per line
+    """
+    # Mock schedule - in a real implementation, this would come from the MES
+    return {
+        "lines": [
+            {
+                "id": "hsm1",
+                "name": "Hot Strip Mill 1",
+                "campaigns": [
+                    {"product": "Hot Rolled Coil 2mm", "start": "2023-12-04", "end": "2023-12-07", "tons": 4200},
+                    {"product": "Hot Rolled Coil 3mm", "start": "2023-12-07", "end": "2023-12-10", "tons": 3800}
+                ],
+                "utilization": 91.5
+            },
+            {
+                "id": "crm1",
+                "name": "Cold Rolling Mill 1",
+                "campaigns": [
+                    {"product": "Cold Rolled Sheet 1mm", "start": "2023-12-04", "end": "2023-12-08", "tons": 2600},
+                    {"product": "Cold Rolled Sheet 0.7mm", "start": "2023-12-08", "end": "2023-12-11", "tons": 1900}
+                ],
+                "utilization": 84.0
+            },
+            {
+                "id": "gl1",
+                "name": "Galvanizing Line 1",
+                "campaigns": [
+                    {"product": "Galvanized Coil 0.8mm", "start": "2023-12-04", "end": "2023-12-09", "tons": 2100}
+                ],
+                "utilization": 77.5
+            }
+        ],
+        "lastUpdated": "2023-12-01"
+    }
+
+@router.get("/resources")
+async def get_resources(current_user: User = Depends(get_current_active_user)):
+    """
+    Get capacity and availability of production resources
+    """
+    return {
+        "resources": [
+            {"id": "hsm1", "name": "Hot Strip Mill 1", "capacity": 6000, "available": 5500, "nextMaintenance": "2023-12-18"},
+            {"id": "crm1", "name": "Cold Rolling Mill 1", "capacity": 3500, "available": 3200, "nextMaintenance": "2023-12-12"},
+            {"id": "gl1", "name": "Galvanizing Line 1", "capacity": 3000, "available": 2700, "nextMaintenance": "2024-01-08"},
+            {"id": "crew-a", "name": "Shift Crew A", "capacity": 40, "available": 37, "nextMaintenance": None}
+        ],
+        "unit": "tons/week"
+    }
+
+@router.post("/scenarios/create")
+async def create_factory_scenario(
+    scenario_data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create a new factory planning scenario
+    """
+    # In a real implementation, this would save the scenario to the database
+    return {
+        "id": 1,  # New scenario ID
+        "name": scenario_data.get("name"),
+        "description": scenario_data.get("description"),
+        "created": True
+    }
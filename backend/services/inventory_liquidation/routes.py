@@ -0,0 +1,54 @@
+
+from fastapi import APIRouter, Depends
+
+from core.security.auth import get_current_active_user
+from services.auth.models import User
+
+router = APIRouter()
+
+@router.get("/pricing")
+async def get_liquidation_pricing(current_user: User = Depends(get_current_active_user)):
+    """
+    Get suggested markdown prices for slow-moving and excess stock
+    """
+    # Mock pricing - in a real implementation, this would come from a pricing model
+    return {
+        "items": [
+            {"sku": "HR-COIL-5MM", "name": "Hot Rolled Coil 5mm", "tons": 640, "ageDays": 190, "listPrice": 720, "suggestedPrice": 610, "discount": 15.3},
+            {"sku": "CR-SHEET-2MM-OFF", "name": "Cold Rolled Sheet 2mm (off-spec)", "tons": 210, "ageDays": 240, "listPrice": 810, "suggestedPrice": 590, "discount": 27.2},
+            {"sku": "GALV-COIL-1.5MM", "name": "Galvanized Coil 1.5mm", "tons": 330, "ageDays": 120, "listPrice": 930, "suggestedPrice": 860, "discount": 7.5}
+        ],
+        "currency": "USD/ton",
+        "lastUpdated": "2023-12-01"
+    }
+
+@router.get("/recommendations")
+async def get_liquidation_recommendations(current_user: User = Depends(get_current_active_user)):
+    """
+    Get recommended liquidation actions
+    """
+    return {
+        "recommendations": [
+            {
+                "id": 1,
+                "title": "Sell off-spec sheet to secondary market",
+                "description": "Offer the off-spec cold rolled sheet to the two regional service centers",
+                "impact": "High",
+                "expectedRecovery": 123900
+            },
+            {
+                "id": 2,
+                "title": "Bundle 5mm coil with contract orders",
+                "description": "Add aged 5mm coil at a discount to Q1 contract renewals",
+                "impact": "Medium",
+                "expectedRecovery": 390400
+            },
+            {
+                "id": 3,
+                "title": "Reprocess galvanized coil",
+                "description": "Slit the 1.5mm galvanized coil for the construction segment",
+                "impact": "Low",
+                "expectedRecovery": 283800
+            }
+        ]
+    }
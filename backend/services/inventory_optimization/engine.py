@@ -0,0 +1,32 @@
+from math import sqrt
+from statistics import NormalDist
+from typing import Any, Dict
+
+def inventory_policy(
+    weekly_demand: float,
+    demand_std: float,
+    lead_time_weeks: float,
+    service_level: float,
+    order_cost: float,
+    holding_cost: float
+) -> Dict[str, Any]:
+    """
+    Reorder point and order quantity for a continuous-review (s, Q) policy
+
+    Args:
+        weekly_demand: Mean demand per week
+        demand_std: Standard deviation of weekly demand
+        lead_time_weeks: Replenishment lead time
+        service_level: Target cycle service level, e.g. 0.95
+        order_cost: Fixed cost per replenishment order
+        holding_cost: Cost of holding one unit for a year
+    """
+    z = NormalDist().inv_cdf(service_level)
+    safety_stock = z * demand_std * sqrt(lead_time_weeks)
+    reorder_point = weekly_demand * lead_time_weeks + safety_stock
+    order_quantity = sqrt(2 * weekly_demand * 52 * order_cost / holding_cost)
+    return {
+        "safetyStock": round(safety_stock),
+        "reorderPoint": round(reorder_point),
+        "orderQuantity": round(order_quantity)
+    }
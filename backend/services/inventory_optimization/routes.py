@@ -0,0 +1,80 @@
+
+from fastapi import APIRouter, Depends
+from typing import Dict, Any
+
+from core.security.auth import get_current_active_user
+from services.auth.models import User
+
+router = APIRouter()
+
+# Mock demand statistics - in a real implementation, these would come from the demand planning model
+ITEMS = [
+    {"sku": "HR-COIL-2MM", "name": "Hot Rolled Coil 2mm", "onHand": 1200, "weeklyDemand": 950, "demandStd": 180, "leadTimeWeeks": 2, "orderCost": 1500, "holdingCost": 45},
+    {"sku": "CR-SHEET-1MM", "name": "Cold Rolled Sheet 1mm", "onHand": 400, "weeklyDemand": 510, "demandStd": 120, "leadTimeWeeks": 3, "orderCost": 1200, "holdingCost": 60},
+    {"sku": "GALV-COIL-0.8MM", "name": "Galvanized Coil 0.8mm", "onHand": 250, "weeklyDemand": 310, "demandStd": 95, "leadTimeWeeks": 4, "orderCost": 1800, "holdingCost": 75}
+]
+
+@router.get("/levels")
+async def get_inventory_levels(current_user: User = Depends(get_current_active_user)):
+    """
+    Get current inventory levels against target levels
+    """
+    from services.inventory_optimization.engine import inventory_policy
+
+    levels = []
+    for item in ITEMS:
+        policy = inventory_policy(
+            item["weeklyDemand"], item["demandStd"], item["leadTimeWeeks"], 0.95,
+            item["orderCost"], item["holdingCost"]
+        )
+        levels.append({
+            "sku": item["sku"],
+            "name": item["name"],
+            "onHand": item["onHand"],
+            "safetyStock": policy["safetyStock"],
+            "reorderPoint": policy["reorderPoint"],
+            "status": "reorder" if item["onHand"] <= policy["reorderPoint"] else "ok"
+        })
+    return {"levels": levels, "unit": "tons", "lastUpdated": "2023-12-01"}
+
+@router.get("/policies")
+async def get_inventory_policies(
+    service_level: float = 0.95,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get recommended replenishment policies for a target service level
+    """
+    from services.inventory_optimization.engine import inventory_policy
+
+    service_level = min(max(service_level, 0.5), 0.999)
+    return {
+        "serviceLevel": service_level,
+        "policies": [
+            {
+                "sku": item["sku"],
+                "name": item["name"],
+                **inventory_policy(
+                    item["weeklyDemand"], item["demandStd"], item["leadTimeWeeks"], service_level,
+                    item["orderCost"], item["holdingCost"]
+                )
+            }
+            for item in ITEMS
+        ]
+    }
+
+@router.post("/scenarios/create")
+async def create_inventory_scenario(
+    scenario_data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create a new inventory optimization scenario
+    """
+    # In a real implementation, this would save the scenario to the database
+    return {
+        "id": 1,  # New scenario ID
+        "name": scenario_data.get("name"),
+        "description": scenario_data.get("description"),
+        "created": True
+    }
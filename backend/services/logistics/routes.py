@@ -0,0 +1,59 @@
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.security.auth import get_current_active_user
+from services.auth.models import User
+
+router = APIRouter()
+
+# Mock shipments - in a real implementation, these would come from the TMS
+SHIPMENTS = {
+    "SHP-1001": {"status": "in_transit", "carrier": "RailFreight Co", "origin": "Plant A", "destination": "DC 1", "eta": "2023-12-05", "progress": 60},
+    "SHP-1002": {"status": "delivered", "carrier": "Coastal Trucking", "origin": "DC 1", "destination": "Customer Region 1", "eta": "2023-12-01", "progress": 100},
+    "SHP-1003": {"status": "scheduled", "carrier": "Inland Barge Lines", "origin": "Plant B", "destination": "DC 2", "eta": "2023-12-09", "progress": 0}
+}
+
+@router.get("/routing")
+async def get_routing(current_user: User = Depends(get_current_active_user)):
+    """
+    Get planned transport routes
+    """
+    return {
+        "routes": [
+            {"id": "R1", "origin": "Plant A", "destination": "DC 1", "mode": "rail", "distanceKm": 420, "transitDays": 2, "costPerTon": 18.5},
+            {"id": "R2", "origin": "Plant B", "destination": "DC 2", "mode": "barge", "distanceKm": 610, "transitDays": 4, "costPerTon": 11.2},
+            {"id": "R3", "origin": "DC 1", "destination": "Customer Region 1", "mode": "truck", "distanceKm": 160, "transitDays": 1, "costPerTon": 24.0},
+            {"id": "R4", "origin": "DC 2", "destination": "Customer Region 3", "mode": "truck", "distanceKm": 230, "transitDays": 1, "costPerTon": 27.5}
+        ],
+        "lastUpdated": "2023-12-01"
+    }
+
+@router.get("/carriers")
+async def get_carriers(current_user: User = Depends(get_current_active_user)):
+    """
+    Get carrier performance
+    """
+    return {
+        "carriers": [
+            {"id": "c1", "name": "RailFreight Co", "mode": "rail", "onTimeRate": 94.2, "damageRate": 0.3, "capacityTons": 12000},
+            {"id": "c2", "name": "Coastal Trucking", "mode": "truck", "onTimeRate": 89.5, "damageRate": 0.8, "capacityTons": 4000},
+            {"id": "c3", "name": "Inland Barge Lines", "mode": "barge", "onTimeRate": 86.1, "damageRate": 0.2, "capacityTons": 20000}
+        ]
+    }
+
+@router.get("/tracking")
+async def get_tracking(current_user: User = Depends(get_current_active_user)):
+    """
+    Get the status of all open shipments
+    """
+    return {"shipments": [{"id": shipment_id, **shipment} for shipment_id, shipment in SHIPMENTS.items()]}
+
+@router.get("/tracking/{shipment_id}")
+async def get_shipment(shipment_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Get the status of a shipment
+    """
+    shipment = SHIPMENTS.get(shipment_id)
+    if not shipment:
+        raise HTTPException(status_code=404, detail="Shipment not found")
+    return {"id": shipment_id, **shipment}
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+def available_to_promise(on_hand: int, receipts: List[Dict[str, Any]], commitments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Cumulative available-to-promise per period
+
+    Args:
+        on_hand: Quantity in stock at the start of the horizon
+        receipts: Planned receipts as {"period", "quantity"}
+        commitments: Customer orders already promised as {"period", "quantity"}
+    """
+    periods = sorted({r["period"] for r in receipts} | {c["period"] for c in commitments})
+    supply = {p: 0 for p in periods}
+    demand = {p: 0 for p in periods}
+    for receipt in receipts:
+        supply[receipt["period"]] += receipt["quantity"]
+    for commitment in commitments:
+        demand[commitment["period"]] += commitment["quantity"]
+
+    atp = []
+    available = on_hand
+    for period in periods:
+        available += supply[period] - demand[period]
+        atp.append({"period": period, "available": max(available, 0)})
+    # Stock cannot be promised in one period if a later period would go short
+    floor = None
+    for entry in reversed(atp):
+        floor = entry["available"] if floor is None else min(floor, entry["available"])
+        entry["available"] = floor
+    return atp
+
+def promise_date(quantity: int, atp: List[Dict[str, Any]], lead_time_days: int, start: date) -> Dict[str, Any]:
+    """Earliest delivery date at which the requested quantity can be covered"""
+    for offset, entry in enumerate(atp):
+        if entry["available"] >= quantity:
+            ship = start + timedelta(weeks=offset)
+            return {
+                "feasible": True,
+                "period": entry["period"],
+                "shipDate": ship.isoformat(),
+                "deliveryDate": (ship + timedelta(days=lead_time_days)).isoformat()
+            }
+    return {"feasible": False, "period": None, "shipDate": None, "deliveryDate": None}
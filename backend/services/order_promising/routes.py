@@ -0,0 +1,98 @@
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.security.auth import get_current_active_user
+from services.auth.models import User
+from services.order_promising.schemas import DeliveryDateRequest
+
+router = APIRouter()
+
+# Mock supply position - in a real implementation, this would come from the ERP
+SUPPLY_POSITION = {
+    "HR-COIL-2MM": {
+        "name": "Hot Rolled Coil 2mm",
+        "onHand": 1200,
+        "receipts": [
+            {"period": "W01", "quantity": 800},
+            {"period": "W02", "quantity": 1000},
+            {"period": "W03", "quantity": 900},
+            {"period": "W04", "quantity": 1100}
+        ],
+        "commitments": [
+            {"period": "W01", "quantity": 1500},
+            {"period": "W02", "quantity": 700},
+            {"period": "W03", "quantity": 1200},
+            {"period": "W04", "quantity": 600}
+        ]
+    },
+    "CR-SHEET-1MM": {
+        "name": "Cold Rolled Sheet 1mm",
+        "onHand": 400,
+        "receipts": [
+            {"period": "W01", "quantity": 500},
+            {"period": "W02", "quantity": 500},
+            {"period": "W03", "quantity": 600},
+            {"period": "W04", "quantity": 600}
+        ],
+        "commitments": [
+            {"period": "W01", "quantity": 600},
+            {"period": "W02", "quantity": 450},
+            {"period": "W03", "quantity": 300},
+            {"period": "W04", "quantity": 700}
+        ]
+    },
+    "GALV-COIL-0.8MM": {
+        "name": "Galvanized Coil 0.8mm",
+        "onHand": 250,
+        "receipts": [
+            {"period": "W02", "quantity": 700},
+            {"period": "W04", "quantity": 700}
+        ],
+        "commitments": [
+            {"period": "W01", "quantity": 200},
+            {"period": "W02", "quantity": 500},
+            {"period": "W03", "quantity": 150},
+            {"period": "W04", "quantity": 400}
+        ]
+    }
+}
+
+@router.get("/availability")
+async def get_availability(current_user: User = Depends(get_current_active_user)):
+    """
+    Get available-to-promise quantities per product and week
+    """
+    from services.order_promising.engine import available_to_promise
+
+    return {
+        "products": [
+            {
+                "sku": sku,
+                "name": position["name"],
+                "onHand": position["onHand"],
+                "atp": available_to_promise(position["onHand"], position["receipts"], position["commitments"])
+            }
+            for sku, position in SUPPLY_POSITION.items()
+        ],
+        "unit": "tons",
+        "lastUpdated": "2023-12-01"
+    }
+
+@router.post("/delivery-dates")
+async def get_delivery_dates(
+    order: DeliveryDateRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Quote the earliest delivery date for an order
+    """
+    from datetime import date
+    from services.order_promising.engine import available_to_promise, promise_date
+
+    position = SUPPLY_POSITION.get(order.sku)
+    if not position:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    atp = available_to_promise(position["onHand"], position["receipts"], position["commitments"])
+    quote = promise_date(order.quantity, atp, order.leadTimeDays, date.today())
+    return {"sku": order.sku, "quantity": order.quantity, **quote}
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+
+class DeliveryDateRequest(BaseModel):
+    """Order to quote a delivery date for"""
+    sku: str
+    quantity: int = Field(..., gt=0, description="Ordered quantity in tons")
+    leadTimeDays: int = Field(3, ge=0, description="Transit days from shipping to delivery")
@@ -0,0 +1,93 @@
+import importlib
+import logging
+import os
+from typing import Dict, List, Optional, Set
+
+from fastapi import FastAPI
+
+from config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SERVICES_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# Services the application cannot run without; ENABLED_MODULES never turns these off
+CORE_SERVICES = ["auth", "chat", "agents"]
+
+# Routes module, URL segment and OpenAPI tag for services that do not follow the defaults
+# (services.<name>.routes, mounted at /<name-with-dashes>, tagged "<Name With Spaces>")
+OVERRIDES: Dict[str, Dict[str, str]] = {
+    "auth": {"routes": "mongodb_routes", "tag": "Authentication"},
+    "agents": {"tag": "AI Agents"}
+}
+
+class ServiceModule:
+    """A service package that exposes a router"""
+
+    def __init__(self, name: str, routes: str = "routes", prefix: str = "", tag: str = ""):
+        self.name = name
+        self.module_path = f"services.{name}.{routes}"
+        self.prefix = prefix or "/" + name.replace("_", "-")
+        self.tag = tag or name.replace("_", " ").title()
+
+    def load_router(self):
+        """Import the routes module; engines it uses are imported by the handlers themselves"""
+        return importlib.import_module(self.module_path).router
+
+def discover_services() -> List[ServiceModule]:
+    """
+    Find service packages that ship a routes module
+
+    Packages are found on disk without importing them, so a package that
+    is not enabled costs nothing at startup.
+    """
+    modules = []
+    # Service packages are namespace packages, so scan the directory rather than using pkgutil
+    for name in sorted(os.listdir(SERVICES_PATH)):
+        override = OVERRIDES.get(name, {})
+        routes = override.get("routes", "routes")
+        if name.startswith(("_", ".")) or not os.path.isfile(os.path.join(SERVICES_PATH, name, f"{routes}.py")):
+            continue
+        modules.append(ServiceModule(name, **override))
+    return modules
+
+def enabled_modules(enabled: Optional[str] = None) -> Optional[Set[str]]:
+    """Planning modules selected by ENABLED_MODULES, or None when all are enabled"""
+    enabled = settings.ENABLED_MODULES if enabled is None else enabled
+    names = {name.strip().replace("-", "_") for name in enabled.split(",") if name.strip()}
+    return names or None
+
+def include_service_routers(app: FastAPI, enabled: Optional[str] = None) -> List[str]:
+    """
+    Mount the routers of all core services and the enabled planning modules
+
+    Args:
+        app: Application to mount the routers on
+        enabled: Comma-separated module names, defaults to ENABLED_MODULES
+
+    Returns:
+        List[str]: Names of the mounted services
+    """
+    selected = enabled_modules(enabled)
+    services = {module.name: module for module in discover_services()}
+
+    if selected:
+        for name in sorted(selected - services.keys()):
+            logger.warning(f"Enabled module '{name}' has no routes module, skipping")
+
+    # Core services first so their routes take precedence
+    ordered = [services[name] for name in CORE_SERVICES if name in services]
+    ordered += [
+        module for name, module in services.items()
+        if name not in CORE_SERVICES and (selected is None or name in selected)
+    ]
+
+    for module in ordered:
+        app.include_router(
+            module.load_router(),
+            prefix=f"{settings.API_PREFIX}{module.prefix}",
+            tags=[module.tag]
+        )
+    logger.info(f"Mounted services: {', '.join(module.name for module in ordered)}")
+    return [module.name for module in ordered]
@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+# Cold-start measurement of the API: how long a fresh worker takes to import
+# main (building the app and mounting the routers) and which service modules
+# that loads. Every run uses a new interpreter, as a gunicorn worker would.
+#
+#     python startup_time.py                                  # every planning module
+#     python startup_time.py --modules demand_planning        # core services plus one module
+#     python startup_time.py --importtime                     # slowest imports of the last run
+#
+# Planning engines are imported by the first request that needs them, so they
+# should not show up in the loaded modules.
+
+BACKEND_PATH = os.path.dirname(os.path.abspath(__file__))
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": sorted(m for m in sys.modules if m.startswith("services."))}))
+"""
+
+def run_once(modules: str, importtime: bool = False) -> Dict[str, Any]:
+    """Import main in a fresh interpreter with ENABLED_MODULES=modules"""
+    env = dict(os.environ, ENABLED_MODULES=modules, LOG_LEVEL="WARNING")
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _CHILD]
+    result = subprocess.run(command, cwd=BACKEND_PATH, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing main failed:\n{result.stderr}")
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    if importtime:
+        measurement["importtime"] = _slowest_imports(result.stderr)
+    return measurement
+
+def _slowest_imports(report: str, limit: int = 15) -> List[Dict[str, Any]]:
+    """Top-level imports by cumulative time from a -X importtime report"""
+    imports = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Only direct imports of main; nested ones are included in their parent's time
+        if name.startswith("   ") and not name.startswith("    ") and cumulative.strip().isdigit():
+            imports.append({"module": name.strip(), "ms": int(cumulative) / 1000})
+    return sorted(imports, key=lambda entry: entry["ms"], reverse=True)[:limit]
+
+def measure(modules: str = "", runs: int = 5, importtime: bool = False) -> Dict[str, Any]:
+    """Median import time of main over several fresh interpreters, and the service modules loaded"""
+    results = [run_once(modules) for _ in range(runs - 1 if importtime else runs)]
+    if importtime:
+        results.append(run_once(modules, importtime=True))
+    return {
+        "enabled_modules": modules or "all",
+        "median_seconds": statistics.median(result["seconds"] for result in results),
+        "modules": results[-1]["modules"],
+        "importtime": results[-1].get("importtime")
+    }
+
+def report(measurement: Dict[str, Any], verbose: Optional[bool] = False):
+    services = sorted({name.split(".")[1] for name in measurement["modules"]})
+    engines = [name for name in measurement["modules"] if name.endswith(".engine")]
+    print(f"ENABLED_MODULES={measurement['enabled_modules']}: import main took {measurement['median_seconds'] * 1000:.0f}ms (median)")
+    print(f"  services loaded: {', '.join(services)}")
+    print(f"  planning engines loaded: {', '.join(engines) or 'none'}")
+    if verbose:
+        print(f"  service modules: {', '.join(measurement['modules'])}")
+    for entry in measurement["importtime"] or []:
+        print(f"  {entry['ms']:8.1f}ms  {entry['module']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long a fresh API worker takes to start")
+    parser.add_argument("--modules", default="", help="ENABLED_MODULES to measure with; empty mounts every module")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to take the median over")
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports of main")
+    parser.add_argument("--verbose", action="store_true", help="List every service module loaded")
+    args = parser.parse_args()
+    report(measure(args.modules, args.runs, args.importtime), args.verbose)
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Settings are read once at import, so point them at local stand-ins before
+# any application module is loaded
+os.environ.setdefault(
+    "MSSQL_ASYNC_DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'ey_steel_tests.db')}"
+)
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+# Keep bcrypt fast; tests hash "outdated" passwords with even fewer rounds
+os.environ.setdefault("AUTH_BCRYPT_ROUNDS", "6")
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,136 @@
+import asyncio
+import math
+from contextlib import AsyncExitStack
+
+import pytest
+
+from services.chat.queue import AdmissionController, AdmissionRejectedError, admission_lane
+from services.chat.queue import admission
+
+@pytest.fixture(autouse=True)
+def tuning(monkeypatch):
+    monkeypatch.setattr(admission.settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission.settings, "ADMISSION_LATENCY_TOLERANCE", 1.5)
+    monkeypatch.setattr(admission.settings, "ADMISSION_LONG_WINDOW", 100)
+    monkeypatch.setattr(admission.settings, "ADMISSION_BACKOFF", 0.9)
+    monkeypatch.setattr(admission.settings, "ADMISSION_ADMIN_RESERVE", 0.2)
+
+def finish(controller, rtt, inflight):
+    """Report one successful generation that took rtt seconds with inflight generations running"""
+    controller._on_success(rtt, inflight)
+
+def test_limit_grows_by_its_square_root_while_latency_is_steady():
+    controller = AdmissionController(initial_limit=16, min_limit=2, max_limit=200)
+
+    for _ in range(10):
+        previous = controller.limit
+        finish(controller, 1.0, inflight=int(previous))
+        # The target is limit + sqrt(limit), blended in at 20%
+        assert controller.limit == pytest.approx(previous + 0.2 * math.sqrt(previous))
+
+def test_limit_holds_when_it_is_not_being_used():
+    controller = AdmissionController(initial_limit=16, min_limit=2, max_limit=200)
+
+    for _ in range(10):
+        finish(controller, 1.0, inflight=2)
+
+    assert controller.limit == 16
+
+def test_limit_shrinks_with_the_latency_gradient_and_recovers():
+    controller = AdmissionController(initial_limit=20, min_limit=2, max_limit=200)
+    for _ in range(50):
+        finish(controller, 1.0, inflight=1)
+
+    limits = []
+    for _ in range(20):
+        previous = controller.limit
+        finish(controller, 4.0, inflight=1)
+        limits.append(controller.limit)
+        # The gradient is floored at 0.5, so one slow generation costs at most 10%
+        assert controller.limit >= previous * 0.9 - 1e-9
+
+    # The first slow generations stay within ADMISSION_LATENCY_TOLERANCE of the baseline
+    assert limits[0] == 20
+    assert limits == sorted(limits, reverse=True)
+    assert controller.limit < 15
+
+    shrunk = controller.limit
+    for _ in range(50):
+        finish(controller, 1.0, inflight=int(controller.limit))
+
+    assert controller.limit > shrunk
+
+def test_limit_stays_within_its_bounds():
+    controller = AdmissionController(initial_limit=10, min_limit=4, max_limit=12)
+
+    for _ in range(100):
+        finish(controller, 1.0, inflight=int(controller.limit))
+    assert controller.limit == 12
+
+    for _ in range(100):
+        controller._on_failure()
+    assert controller.limit == 4
+
+async def test_failures_back_the_limit_off():
+    controller = AdmissionController(initial_limit=20, min_limit=2, max_limit=200)
+
+    for expected in (18.0, 16.2, 14.58):
+        with pytest.raises(RuntimeError):
+            async with controller.admit():
+                raise RuntimeError("Azure OpenAI API Error: 500")
+        assert controller.limit == pytest.approx(expected)
+
+    assert controller.stats()["failures"] == 3
+    assert controller.inflight == 0
+
+async def test_cancelled_generations_do_not_move_the_limit():
+    controller = AdmissionController(initial_limit=20, min_limit=2, max_limit=200)
+
+    with pytest.raises(asyncio.CancelledError):
+        async with controller.admit():
+            raise asyncio.CancelledError()
+
+    assert controller.limit == 20
+    assert controller.stats()["failures"] == 0
+    assert controller.inflight == 0
+
+async def test_admins_keep_the_reserved_share_of_the_limit():
+    controller = AdmissionController(initial_limit=10, min_limit=2, max_limit=200)
+    assert controller.lane_limit("user") == 8
+    assert controller.lane_limit("admin") == 10
+
+    async with AsyncExitStack() as generations:
+        for _ in range(8):
+            await generations.enter_async_context(controller.admit("user"))
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with controller.admit("user"):
+                pass
+        assert rejected.value.lane == "user" and rejected.value.limit == 8
+
+        for _ in range(2):
+            await generations.enter_async_context(controller.admit("admin"))
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            controller.ensure_capacity("admin")
+        assert rejected.value.lane == "admin"
+
+        assert controller.inflight == 10
+        assert controller.stats()["rejected"] == {"admin": 1, "user": 1}
+
+    assert controller.inflight == 0
+
+def test_retry_after_follows_recent_latency():
+    controller = AdmissionController(initial_limit=1, min_limit=1, max_limit=1)
+    for _ in range(100):
+        finish(controller, 6.0, inflight=1)
+    controller.inflight = 1
+
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        controller.ensure_capacity()
+
+    assert rejected.value.retry_after == 6
+
+def test_lane_follows_the_users_role():
+    assert admission_lane({"role": "admin"}) == "admin"
+    assert admission_lane({"role": "user"}) == "user"
+    assert admission_lane(None) == "user"
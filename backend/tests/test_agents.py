@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+
+import services.auth.models  # noqa: F401
+from core.database.mssql import AsyncSessionLocal, Base, async_engine
+from core.security.auth import get_admin_user, get_current_active_user
+from services.agents.catalog import AgentCatalog
+from services.agents.models import Agent, UserAgent
+from services.agents.routes import router
+
+USER = SimpleNamespace(id=1, role="user", allowed_agents=[1, 2])
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements sent to the database inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture
+async def client(monkeypatch):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            Agent(id=1, name="Demand Sensing", description="", icon="chart", type="analytical",
+                  confidence=90.0, compatibility="high", status="active", last_updated="2024-01-01"),
+            Agent(id=2, name="Scrap Optimizer", description="", icon="recycle", type="operational",
+                  confidence=80.0, compatibility="medium", status="active", last_updated="2024-01-01"),
+            UserAgent(user_id=1, agent_id=1)
+        ])
+        await db.commit()
+
+    monkeypatch.setattr(AgentCatalog, "_instance", AgentCatalog())
+    app = FastAPI()
+    app.include_router(router, prefix="/agents")
+    app.dependency_overrides[get_current_active_user] = lambda: USER
+    app.dependency_overrides[get_admin_user] = lambda: SimpleNamespace(id=1, role="admin", allowed_agents=[])
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+    await async_engine.dispose()
+
+@pytest.mark.parametrize("method, path, status_code", [
+    ("GET", "/agents/deployed", 200),
+    ("GET", "/agents/1/analytics", 200),
+    ("GET", "/agents/1/recommendations", 200),
+    ("GET", "/agents/2/analytics", 403),
+    ("GET", "/agents/9/recommendations", 404),
+    ("POST", "/agents/add?agent_id=1", 400),
+    ("DELETE", "/agents/remove/2", 404)
+])
+async def test_agent_lookups_take_a_single_query(client, method, path, status_code):
+    with count_queries() as statements:
+        response = await client.request(method, path)
+
+    assert response.status_code == status_code
+    assert len(statements) == 1, statements
+
+async def test_adding_an_agent_checks_and_inserts_once(client):
+    with count_queries() as statements:
+        response = await client.post("/agents/add?agent_id=2")
+
+    assert response.status_code == 201
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "INSERT"]
+
+async def test_catalog_is_loaded_once_for_all_catalog_reads(client):
+    with count_queries() as statements:
+        for path in ("/agents/available", "/agents/details/1", "/agents/available", "/agents/details/2"):
+            assert (await client.get(path)).status_code == 200
+
+    assert len(statements) == 1
+
+async def test_unchanged_catalog_answers_304(client):
+    first = await client.get("/agents/available")
+    etag = first.headers["etag"]
+
+    cached = await client.get("/agents/available", headers={"If-None-Match": etag})
+    details = await client.get("/agents/details/1", headers={"If-None-Match": etag})
+
+    assert [agent["id"] for agent in first.json()] == [1, 2]
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert details.status_code == 304
+
+async def test_created_agent_changes_the_etag(client):
+    etag = (await client.get("/agents/available")).headers["etag"]
+
+    created = await client.post("/agents/create", json={
+        "name": "Yield Coach", "description": "", "icon": "spark", "type": "custom"
+    })
+    refreshed = await client.get("/agents/available", headers={"If-None-Match": etag})
+
+    assert created.status_code == 201
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert [agent["name"] for agent in refreshed.json()][-1] == "Yield Coach"
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from services.chat.ai_service import AIService
+from services.chat.cache.cache_service import CacheService
+from services.chat.cache.keys import build_cache_key
+from services.chat.cache.semantic import HashingEmbedder, SemanticIndex
+
+from .test_cache_service import DictBackend
+
+CACHED = {"text": "cached answer", "next_question": []}
+
+@pytest.fixture
+def service():
+    service = AIService()
+    cache = CacheService(backend=DictBackend(), semantic_index=SemanticIndex(HashingEmbedder(), 100, 0.8))
+    service.cache_service = cache
+    service.message_processor.cache_service = cache
+    return service
+
+async def test_first_turn_is_answered_from_cache(service):
+    await service.cache_service.set_cached_response(build_cache_key("What is our stock?"), CACHED)
+
+    response = await service.get_ai_response("What is our stock?", [], session_id="s1")
+
+    assert response["text"] == "cached answer"
+
+async def test_follow_up_turns_bypass_the_cache(service):
+    await service.cache_service.set_cached_response(build_cache_key("And in Delhi?"), CACHED)
+    history = [{"text": "What is our stock in Mumbai?", "isUser": True}]
+
+    response = await service.get_ai_response("And in Delhi?", history, session_id="s1")
+    summarized = await service.get_ai_response("And in Delhi?", [], session_id="s1", context_summary="Asked about Mumbai")
+
+    assert response["text"] != "cached answer"
+    assert summarized["text"] != "cached answer"
+    assert service.cache_service.backend.entries == {build_cache_key("And in Delhi?"): CACHED}
+    assert service.cache_service.stats()["single_flight_joins"] == 0
+
+async def test_similar_questions_are_only_shared_within_one_user(service):
+    first = await service.get_ai_response("Show the inventory levels for Mumbai", [], user_id="alice", session_id="s1")
+
+    same_user = await service.get_ai_response("show inventory level for mumbai", [], user_id="alice", session_id="s1")
+    await service.get_ai_response("show inventory level for mumbai", [], user_id="bob", session_id="s2")
+
+    assert service.cache_service.stats()["semantic_hits"] == 1
+    assert same_user == first
+    assert len(service.cache_service.backend.entries) == 2
+
+async def test_generation_failures_reach_admission_control(service, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("model unavailable")
+    monkeypatch.setattr(service.message_processor, "_process_message_with_cache", fail)
+    failures = service.admission.stats()["failures"]
+
+    response = await service.get_ai_response("What is our stock?", [], session_id="s1")
+
+    assert response["text"].startswith("I'm sorry")
+    assert service.admission.stats()["failures"] == failures + 1
+    assert service.cache_service.backend.entries == {}
+
+FOLLOW_UP = [{"text": "What is our stock in Mumbai?", "isUser": True}]
+
+def hang_generation(service, monkeypatch):
+    """Make generations block until cancelled; returns events for started and cancelled"""
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def hang(*args, **kwargs):
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(service.message_processor, "process_request", hang)
+    return started, cancelled
+
+async def test_cancelled_caller_stops_the_generation_and_frees_its_slot(service, monkeypatch):
+    started, cancelled = hang_generation(service, monkeypatch)
+    caller = asyncio.create_task(service.get_ai_response("And in Delhi?", FOLLOW_UP, session_id="s1"))
+    await started.wait()
+    assert service.admission.inflight == 1
+
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    assert cancelled.is_set()
+    assert service.admission.inflight == 0
+    assert service.request_queue.depth == 0
+
+async def test_timed_out_generation_is_cancelled_before_its_slot_is_freed(service, monkeypatch):
+    started, cancelled = hang_generation(service, monkeypatch)
+    get_result = service.request_queue.get_result
+    monkeypatch.setattr(service.request_queue, "get_result", lambda key, timeout: get_result(key, timeout=0.05))
+    failures = service.admission.stats()["failures"]
+
+    response = await service.get_ai_response("And in Delhi?", FOLLOW_UP, session_id="s1")
+
+    assert response["text"].startswith("I'm sorry")
+    assert cancelled.is_set()
+    assert service.admission.inflight == 0
+    assert service.admission.stats()["failures"] == failures + 1
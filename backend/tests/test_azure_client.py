@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from config.settings import get_settings
+from services.ai.azure_client import AzureOpenAIClient, AzureOpenAIError, _RetryAfterWait, parse_retry_after
+
+settings = get_settings()
+
+COMPLETION = {"choices": [{"message": {"role": "assistant", "content": "Hello"}}]}
+
+def azure_client(responses):
+    """Client whose HTTP layer answers with the given responses in turn, recording each request"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    client = AzureOpenAIClient(httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://azure"))
+    client._retrying["wait"] = wait_none()
+    return client, requests
+
+@pytest.mark.parametrize("status_code", [429, 500, 502, 503, 504])
+async def test_retryable_errors_are_retried(status_code):
+    client, requests = azure_client([
+        httpx.Response(status_code, json={"error": {"message": "busy"}}),
+        httpx.Response(200, json=COMPLETION)
+    ])
+
+    assert await client.chat_completion("gpt-4", {"messages": []}) == COMPLETION
+    assert len(requests) == 2
+
+async def test_client_errors_are_not_retried():
+    client, requests = azure_client([httpx.Response(400, json={"error": {"message": "bad prompt"}})])
+
+    with pytest.raises(AzureOpenAIError) as error:
+        await client.chat_completion("gpt-4", {"messages": []})
+
+    assert error.value.status_code == 400 and error.value.detail == "bad prompt"
+    assert len(requests) == 1
+
+async def test_retries_stop_after_the_configured_attempts():
+    client, requests = azure_client([httpx.Response(503, text="unavailable")])
+
+    with pytest.raises(AzureOpenAIError) as error:
+        await client.chat_completion("gpt-4", {"messages": []})
+
+    assert error.value.status_code == 503
+    assert len(requests) == settings.AZURE_MAX_RETRIES + 1
+
+async def test_stream_is_retried_until_it_opens():
+    client, requests = azure_client([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, content=b"data: [DONE]\n\n")
+    ])
+
+    async with client.stream_chat_completion("gpt-4", {"stream": True}) as response:
+        body = await response.aread()
+
+    assert body == b"data: [DONE]\n\n"
+    assert len(requests) == 2
+
+def test_backoff_follows_retry_after_up_to_the_maximum():
+    wait = _RetryAfterWait(multiplier=0.5, maximum=20.0)
+
+    def state(exc, attempt=1):
+        return SimpleNamespace(outcome=SimpleNamespace(exception=lambda: exc), attempt_number=attempt)
+
+    assert wait(state(AzureOpenAIError(429, "slow down", retry_after=3.0))) == 3.0
+    assert wait(state(AzureOpenAIError(429, "slow down", retry_after=120.0))) == 20.0
+    assert all(0 <= wait(state(AzureOpenAIError(503, "busy"), attempt)) <= 20.0 for attempt in range(1, 10))
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+@pytest.mark.parametrize("response, detail", [
+    (httpx.Response(502, text="<html><body>Bad gateway</body></html>"), "<html><body>Bad gateway</body></html>"),
+    (httpx.Response(400, content=b'["not","an","object"]'), '["not","an","object"]'),
+    (httpx.Response(400, content=b'"quota exceeded"'), '"quota exceeded"'),
+    (httpx.Response(400, content=b'{"error":"content filtered"}'), '{"error":"content filtered"}'),
+    (httpx.Response(400, content=b""), "Unknown error")
+])
+async def test_unexpected_error_bodies_keep_the_status_code(response, detail):
+    client, _ = azure_client([response])
+    client._retrying["stop"] = lambda retry_state: True
+
+    with pytest.raises(AzureOpenAIError) as error:
+        await client.chat_completion("gpt-4", {"messages": []})
+
+    assert error.value.status_code == response.status_code
+    assert error.value.detail == detail
+
+async def test_stats_count_requests_in_flight():
+    seen = []
+
+    async def handler(request):
+        seen.append(client.stats()["in_flight"])
+        return httpx.Response(200, json=COMPLETION)
+
+    client = AzureOpenAIClient(httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://azure"))
+    await client.chat_completion("gpt-4", {"messages": []})
+
+    assert seen == [{"gpt-4": 1}]
+    assert client.stats()["in_flight"] == {"gpt-4": 0}
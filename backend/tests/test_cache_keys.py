@@ -0,0 +1,30 @@
+from services.chat.cache import build_cache_key, build_cache_namespace, normalize_message
+
+def test_messages_are_normalized_before_hashing():
+    assert normalize_message("  What is   our\tSTOCK?\n") == "what is our stock?"
+    # NFKC folds full-width and compatibility characters, casefold handles ß and friends
+    assert normalize_message("ＷＨＡＴ ｉｓ ﬁnished stock") == "what is finished stock"
+    assert normalize_message("Straße") == normalize_message("STRASSE")
+
+    assert build_cache_key("  What is our stock? ") == build_cache_key("what IS our stock?")
+    assert build_cache_key("What is our stock?") != build_cache_key("What is our stock in Delhi?")
+
+def test_keys_are_fixed_length_and_scoped_to_module_and_agent():
+    key = build_cache_key("What is our stock?", version=1)
+
+    assert key.startswith("v1:") and len(key) == len("v1:") + 64
+    assert len(build_cache_key("x" * 10000, version=1)) == len(key)
+    assert build_cache_key("What is our stock?", module="inventory", version=1) != key
+    assert build_cache_key("What is our stock?", agent_id=7, version=1) != key
+
+def test_bumping_the_version_changes_every_key():
+    assert build_cache_key("What is our stock?", version=2) != build_cache_key("What is our stock?", version=1)
+    assert build_cache_key("What is our stock?", version=2).startswith("v2:")
+    assert build_cache_namespace("inventory", version=2, user_id="1") != build_cache_namespace("inventory", version=1, user_id="1")
+
+def test_version_defaults_to_the_setting(monkeypatch):
+    from services.chat.cache import keys
+    monkeypatch.setattr(keys.settings, "RESPONSE_CACHE_VERSION", 5)
+
+    assert build_cache_key("What is our stock?") == build_cache_key("What is our stock?", version=5)
+    assert build_cache_namespace("inventory", user_id="1").startswith("v5|")
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import get_settings
+from services.chat.cache import backends, lru
+from services.chat.cache.backends import CacheBackend, MongoCacheBackend, RedisCacheBackend
+from services.chat.cache.cache_service import CacheService
+
+settings = get_settings()
+
+class DictBackend(CacheBackend):
+    def __init__(self):
+        self.entries = {}
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl):
+        self.entries[key] = value
+
+async def test_single_flight_shares_one_generation():
+    cache = CacheService(backend=DictBackend())
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"text": "answer"}
+
+    results = await asyncio.gather(*(cache.single_flight("key", factory) for _ in range(5)))
+
+    assert calls == 1
+    assert results == [{"text": "answer"}] * 5
+    assert cache.stats()["single_flight_joins"] == 4
+    assert cache.stats()["inflight"] == 0
+
+async def test_cancelled_leader_does_not_cancel_joiners():
+    cache = CacheService(backend=DictBackend())
+    release = asyncio.Event()
+
+    async def factory():
+        await release.wait()
+        return {"text": "answer"}
+
+    leader = asyncio.create_task(cache.single_flight("key", factory))
+    await asyncio.sleep(0)
+    joiner = asyncio.create_task(cache.single_flight("key", factory))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await joiner == {"text": "answer"}
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+async def test_single_flight_shares_exceptions():
+    cache = CacheService(backend=DictBackend())
+
+    async def factory():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model unavailable")
+
+    results = await asyncio.gather(
+        cache.single_flight("key", factory),
+        cache.single_flight("key", factory),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["inflight"] == 0
+
+class ExpiringBackend(DictBackend):
+    """DictBackend whose entries report a fixed remaining lifetime"""
+
+    def __init__(self, remaining):
+        super().__init__()
+        self.remaining = remaining
+
+    async def get_with_ttl(self, key):
+        return await self.get(key), self.remaining
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru.time, "monotonic", lambda: now[0])
+    return now
+
+def test_local_copy_expires_with_the_shared_entry(clock):
+    cache = CacheService(backend=ExpiringBackend(remaining=30.0))
+    cache.backend.entries["key"] = {"text": "answer"}
+
+    assert asyncio.run(cache.get_cached_response("key")) == {"text": "answer"}
+    del cache.backend.entries["key"]
+
+    clock[0] += 29
+    assert cache.local.get("key") == {"text": "answer"}
+    clock[0] += 2
+    assert cache.local.get("key") is None
+
+def test_local_ttl_is_capped_and_expired_entries_are_not_copied(clock):
+    cache = lru.LRUCache(max_entries=10, max_bytes=10000, ttl=60)
+
+    cache.set("long", "value", ttl=3600)
+    cache.set("expired", "value", ttl=-5)
+    clock[0] += 61
+
+    assert cache.get("long") is None
+    assert len(cache) == 0
+
+async def test_redis_backend_reports_the_remaining_ttl():
+    fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis from requirements.txt")
+    backend = RedisCacheBackend(client=fakeredis.aioredis.FakeRedis())
+
+    await backend.set("key", {"text": "answer"}, 120)
+    response, ttl = await backend.get_with_ttl("key")
+
+    assert response == {"text": "answer"}
+    assert 119 < ttl <= 120
+    assert await backend.get_with_ttl("missing") == (None, None)
+
+async def test_mongo_backend_reports_the_remaining_ttl(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor", reason="mongomock-motor stands in for MongoDB in storage tests")
+    db = mongomock_motor.AsyncMongoMockClient()["cache_tests"]
+    monkeypatch.setattr(backends, "get_mongo_db", lambda: db)
+    backend = MongoCacheBackend()
+    created_at = datetime.utcnow() - timedelta(seconds=settings.RESPONSE_CACHE_TTL - 10)
+    await db.chat_cache.insert_one({"key": "key", "response": {"text": "answer"}, "created_at": created_at})
+
+    response, ttl = await backend.get_with_ttl("key")
+
+    assert response == {"text": "answer"}
+    assert 9 < ttl <= 10
@@ -0,0 +1,136 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config.settings import get_settings
+from core.database.mongodb import get_mongo_db
+from core.security.auth import get_current_active_user
+from core.security.rate_limit import RateLimiter
+from services.chat import ai_service
+from services.chat.ai_service import AIService
+from services.chat import routes
+from services.chat.cache.cache_service import CacheService
+from services.chat.routes import router
+
+from .test_cache_service import DictBackend
+
+mongomock_motor = pytest.importorskip("mongomock_motor", reason="mongomock-motor stands in for MongoDB in route tests")
+
+settings = get_settings()
+
+USER = SimpleNamespace(id=1, username="planner", role="user")
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient()["chat_tests"]
+
+@pytest.fixture
+def service(monkeypatch):
+    service = AIService()
+    cache = CacheService(backend=DictBackend())
+    service.cache_service = cache
+    service.message_processor.cache_service = cache
+    monkeypatch.setattr(ai_service, "_ai_service_instance", service)
+    return service
+
+@pytest.fixture
+async def client(db, service, monkeypatch):
+    monkeypatch.setattr(RateLimiter.get_instance(), "enabled", False)
+    app = FastAPI()
+    app.include_router(router, prefix="/chat")
+    app.dependency_overrides[get_mongo_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: USER
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+def count_generations(service, monkeypatch):
+    calls = []
+    process_request = service.message_processor.process_request
+
+    async def counted(*args, **kwargs):
+        calls.append(args)
+        return await process_request(*args, **kwargs)
+
+    monkeypatch.setattr(service.message_processor, "process_request", counted)
+    return calls
+
+async def test_first_question_of_new_sessions_is_generated_once(client, service, monkeypatch):
+    generations = count_generations(service, monkeypatch)
+
+    answers = []
+    for _ in range(2):
+        session = await client.post("/chat/sessions", json={"module": "inventory"})
+        assert session.json()["messages"][0]["isUser"] is False
+        response = await client.post(f"/chat/{session.json()['session_id']}/send", json={"text": "What is our stock?"})
+        assert response.status_code == 200
+        answers.append(response.json()["text"])
+
+    assert len(generations) == 1
+    assert answers[0] == answers[1]
+
+async def test_follow_up_questions_are_generated_every_time(client, service, monkeypatch):
+    session_id = (await client.post("/chat/sessions", json={"module": "inventory"})).json()["session_id"]
+    generations = count_generations(service, monkeypatch)
+
+    for _ in range(2):
+        await client.post(f"/chat/{session_id}/send", json={"text": "What is our stock?"})
+
+    assert len(generations) == 2
+
+async def test_session_pages_do_not_skip_or_repeat_tied_sessions(client, db):
+    updated_at = datetime(2024, 5, 1, 12, 0)
+    await db[settings.MONGODB_CHAT_COLLECTION].insert_many([
+        {"_id": f"s{i}", "user_id": USER.id, "module": "inventory", "created_at": updated_at, "updated_at": updated_at,
+         "preview": []}
+        for i in range(5)
+    ] + [{"_id": "newest", "user_id": USER.id, "created_at": updated_at, "updated_at": datetime(2024, 5, 2), "preview": []}])
+
+    listed, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/chat/sessions", params=params)).json()
+        listed += [session["session_id"] for session in page["sessions"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert listed == ["newest", "s4", "s3", "s2", "s1", "s0"]
+
+def test_websocket_returns_its_sql_session_before_the_first_turn(db, service, monkeypatch):
+    open_sessions = []
+
+    class TrackedSession:
+        async def __aenter__(self):
+            open_sessions.append(self)
+            return self
+
+        async def __aexit__(self, *exc_info):
+            open_sessions.remove(self)
+
+    async def authenticate(token, db, mongo_db):
+        assert open_sessions == [db]
+        return USER
+
+    monkeypatch.setattr(routes, "AsyncSessionLocal", TrackedSession)
+    monkeypatch.setattr(routes, "get_current_user", authenticate)
+    monkeypatch.setattr(RateLimiter.get_instance(), "enabled", False)
+    app = FastAPI()
+    app.include_router(router, prefix="/chat")
+    app.dependency_overrides[get_mongo_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: USER
+
+    with TestClient(app) as client:
+        session_id = client.post("/chat/sessions", json={"module": "inventory"}).json()["session_id"]
+        with client.websocket_connect(f"/chat/{session_id}/ws?token=t") as websocket:
+            websocket.send_json({"text": "What is our stock?"})
+            events = [websocket.receive_json()]
+            while events[-1]["type"] not in ("done", "error"):
+                assert open_sessions == []
+                events.append(websocket.receive_json())
+
+    assert events[-1]["type"] == "done"
+    assert open_sessions == []
@@ -0,0 +1,36 @@
+import pytest
+
+from core.health import Readiness
+
+async def ok(timeout):
+    return None
+
+async def unreachable(timeout):
+    raise ConnectionError("connection refused")
+
+@pytest.fixture
+def readiness():
+    readiness = Readiness()
+    readiness.mark_started()
+    readiness.checks = {"mongodb": ok, "mssql": unreachable}
+    return readiness
+
+async def test_failing_dependency_makes_worker_unready(readiness):
+    result = await readiness.check()
+
+    assert result["ready"] is False
+    assert result["checks"]["mssql"]["error"] == "ConnectionError"
+
+async def test_optional_dependency_is_reported_but_not_required(readiness):
+    readiness.optional = {"mssql"}
+
+    result = await readiness.check()
+
+    assert result["ready"] is True
+    assert result["checks"]["mssql"] == {**result["checks"]["mssql"], "status": "error", "optional": True}
+
+async def test_not_ready_before_startup(readiness):
+    readiness.started = False
+    readiness.optional = {"mssql"}
+
+    assert (await readiness.check())["ready"] is False
@@ -0,0 +1,41 @@
+import pytest
+
+import init_mongodb
+from config.settings import get_settings
+
+mongomock_motor = pytest.importorskip("mongomock_motor", reason="mongomock-motor stands in for MongoDB in route and storage tests")
+
+settings = get_settings()
+
+@pytest.fixture
+def client(monkeypatch):
+    client = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(init_mongodb, "create_mongo_client", lambda: client)
+    return client
+
+async def test_session_list_indexes_replace_the_ones_without_tie_break(client):
+    sessions = client[settings.MONGODB_DATABASE][settings.MONGODB_CHAT_COLLECTION]
+    await sessions.create_index([("user_id", 1), ("updated_at", -1)])
+    await sessions.create_index([("user_id", 1), ("module", 1), ("updated_at", -1)])
+
+    await init_mongodb.init_mongodb()
+    # Running it again on an initialized database is harmless
+    await init_mongodb.init_mongodb()
+
+    keys = [index["key"] for index in (await sessions.index_information()).values()]
+    assert sorted(keys) == sorted([
+        [("_id", 1)],
+        [("user_id", 1), ("updated_at", -1), ("_id", -1)],
+        [("user_id", 1), ("module", 1), ("updated_at", -1), ("_id", -1)],
+        [("user_id", 1), ("agent_id", 1), ("updated_at", -1), ("_id", -1)]
+    ])
+
+@pytest.mark.parametrize("existing", [{}, {"expireAfterSeconds": 3600}])
+async def test_cache_ttl_index_is_replaced_when_its_expiry_differs(client, existing):
+    cache = client[settings.MONGODB_DATABASE].chat_cache
+    await cache.create_index("created_at", **existing)
+
+    await init_mongodb.init_mongodb()
+    await init_mongodb.init_mongodb()
+
+    assert (await cache.index_information())["created_at_1"]["expireAfterSeconds"] == settings.RESPONSE_CACHE_TTL
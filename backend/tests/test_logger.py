@@ -0,0 +1,18 @@
+import logging
+
+from utils.logger import SessionLogger, UserLogger
+
+def test_session_logging_does_not_create_loggers_per_session(caplog):
+    SessionLogger.log("warm-up", "message", "first")
+    registered = len(logging.Logger.manager.loggerDict)
+    caplog.clear()
+
+    with caplog.at_level(logging.INFO, logger="session"):
+        for i in range(200):
+            SessionLogger.log(f"session-{i}", "message", "Processing new request")
+            UserLogger.log(f"user-{i}", "route", "New message")
+
+    assert len(logging.Logger.manager.loggerDict) == registered
+    assert {record.name for record in caplog.records} == {"session"}
+    assert caplog.records[0].session_id == "session-0"
+    assert caplog.records[1].user_id == "user-0"
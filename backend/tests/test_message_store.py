@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import migrate_chat_messages
+from config.settings import get_settings
+from services.chat.models import ChatMessage
+from services.chat.storage import MessageStore
+from services.chat.storage.message_store import STORAGE_COLLECTION, STORAGE_EMBEDDED
+
+mongomock_motor = pytest.importorskip("mongomock_motor", reason="mongomock-motor stands in for MongoDB in route and storage tests")
+
+settings = get_settings()
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient()["chat_tests"]
+
+@pytest.fixture
+async def store(db):
+    await db[settings.MONGODB_MESSAGE_COLLECTION].create_index([("session_id", 1), ("seq", 1)], unique=True)
+    return MessageStore(db)
+
+async def create_session(store, session_id: str, storage: str, texts=()):
+    session = {"_id": session_id, "user_id": 1, "message_storage": storage, "updated_at": datetime.now()}
+    await store.sessions.insert_one(session)
+    await store.append_messages(session, [ChatMessage(text=text, isUser=i % 2 == 1) for i, text in enumerate(texts)])
+    return session
+
+async def load(store, session_id: str):
+    return await store.sessions.find_one({"_id": session_id})
+
+def texts(messages):
+    return [message["text"] for message in messages]
+
+async def test_append_after_migration_reaches_the_message_collection(store):
+    await create_session(store, "s1", STORAGE_EMBEDDED, ["Welcome", "What is our stock?"])
+    stale = await load(store, "s1")
+
+    assert await migrate_chat_messages.migrate_session(store.sessions, store.messages, "s1") == 2
+    await store.append_messages(stale, [ChatMessage(text="2400 tonnes", isUser=False)])
+    await store.append_messages(stale, [ChatMessage(text="Thanks", isUser=True)])
+
+    session = await load(store, "s1")
+    assert "messages" not in session
+    assert session["message_count"] == 4
+    assert texts(await store.get_recent_messages(session)) == ["Welcome", "What is our stock?", "2400 tonnes", "Thanks"]
+    assert [message["seq"] for message in await store.get_recent_messages(session)] == [0, 1, 2, 3]
+
+async def test_concurrent_appends_reserve_distinct_sequence_numbers(store):
+    session = await create_session(store, "s1", STORAGE_COLLECTION, ["Welcome"])
+
+    await asyncio.gather(*(
+        store.append_messages(session, [ChatMessage(text=f"q{i}", isUser=True), ChatMessage(text=f"a{i}", isUser=False)])
+        for i in range(5)
+    ))
+
+    messages = await store.get_recent_messages(session)
+    assert [message["seq"] for message in messages] == list(range(11))
+    # Each append's pair stays together
+    assert all(messages[seq]["text"][1:] == messages[seq + 1]["text"][1:] for seq in range(1, 11, 2))
+    assert (await load(store, "s1"))["message_count"] == 11
+
+def slice_page(session, projection):
+    """Evaluate page_projection the way the server does, which mongomock cannot"""
+    messages = session.get("messages") or []
+    args = projection["page"]["$slice"][1:]
+    if len(args) == 1:
+        page = messages[args[0]:]
+    else:
+        page = messages[args[0]:args[0] + args[1]]
+    return {"_id": session["_id"], "message_storage": session.get("message_storage"), "page": page, "page_total": len(messages)}
+
+async def read_pages(store, session_id: str, limit: int, **cursor):
+    """All pages from a starting cursor, following next_cursor in the same direction"""
+    direction = "after" if "after" in cursor else "before"
+    pages = []
+    while True:
+        session = await load(store, session_id)
+        if MessageStore.storage_of(session) != STORAGE_COLLECTION:
+            session = slice_page(session, MessageStore.page_projection(limit=limit, **cursor))
+        messages, next_cursor = await store.get_message_page(session, limit=limit, **cursor)
+        pages.append([(message["seq"], message["text"]) for message in messages])
+        if next_cursor is None:
+            return pages
+        cursor = {direction: next_cursor}
+
+@pytest.mark.parametrize("storage", [STORAGE_EMBEDDED, STORAGE_COLLECTION])
+async def test_both_layouts_read_and_page_the_same_messages(store, storage):
+    history = [f"m{i}" for i in range(7)]
+    session = await create_session(store, "s1", storage, history)
+    if storage == STORAGE_EMBEDDED:
+        session = await load(store, "s1")
+
+    assert texts(await store.get_recent_messages(session, limit=3)) == ["m4", "m5", "m6"]
+    assert await read_pages(store, "s1", limit=3) == [
+        [(4, "m4"), (5, "m5"), (6, "m6")],
+        [(1, "m1"), (2, "m2"), (3, "m3")],
+        [(0, "m0")]
+    ]
+    assert await read_pages(store, "s1", limit=3, after=1) == [
+        [(2, "m2"), (3, "m3"), (4, "m4")],
+        [(5, "m5"), (6, "m6")]
+    ]
+    assert await read_pages(store, "s1", limit=3, before=0) == [[]]
+
+async def test_migration_keeps_appends_made_while_copying(store, monkeypatch):
+    await create_session(store, "s1", STORAGE_EMBEDDED, ["Welcome", "What is our stock?"])
+    insert_many = store.messages.insert_many
+    appended = []
+
+    async def insert_then_append(docs, **kwargs):
+        # A route appends after the migration read the session but before it switches
+        await insert_many(docs, **kwargs)
+        if not appended:
+            appended.append(True)
+            await store.append_messages(await load(store, "s1"), [ChatMessage(text="2400 tonnes", isUser=False)])
+
+    monkeypatch.setattr(store.messages, "insert_many", insert_then_append)
+
+    assert await migrate_chat_messages.migrate_session(store.sessions, store.messages, "s1") == -1
+    assert MessageStore.storage_of(await load(store, "s1")) == STORAGE_EMBEDDED
+    # The retry copies the new message too; messages copied by the first attempt are skipped
+    assert await migrate_chat_messages.migrate_session(store.sessions, store.messages, "s1") == 3
+
+    session = await load(store, "s1")
+    assert session["message_count"] == 3
+    assert texts(await store.get_recent_messages(session)) == ["Welcome", "What is our stock?", "2400 tonnes"]
+
+@pytest.mark.parametrize("messages", [None, "missing"])
+async def test_migration_switches_sessions_without_a_message_list(store, messages):
+    session = {"_id": "s1", "user_id": 1}
+    if messages != "missing":
+        session["messages"] = messages
+    await store.sessions.insert_one(session)
+
+    assert await migrate_chat_messages.migrate_session(store.sessions, store.messages, "s1") == 0
+
+    session = await load(store, "s1")
+    assert MessageStore.storage_of(session) == STORAGE_COLLECTION
+    assert session["message_count"] == 0
+    await store.append_messages(session, [ChatMessage(text="Hello", isUser=True)])
+    assert [(m["seq"], m["text"]) for m in await store.get_recent_messages(session)] == [(0, "Hello")]
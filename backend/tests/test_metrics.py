@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_multiprocess_directory_is_created_on_import(tmp_path):
+    directory = tmp_path / "prometheus"
+    script = (
+        "from core.metrics import observe_stage, count_cache_lookup, render_metrics\n"
+        "observe_stage('total', 0.2)\n"
+        "count_cache_lookup(True)\n"
+        "assert b'chat_stage_duration_seconds_bucket' in render_metrics()[0]\n"
+    )
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(directory))
+
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert any(name.endswith(".db") for name in os.listdir(directory))
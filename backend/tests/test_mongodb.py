@@ -0,0 +1,71 @@
+import pytest
+from pymongo import ReadPreference
+
+from config.settings import get_settings
+from core.database import mongodb
+from services.chat.cache.backends import MongoCacheBackend
+
+settings = get_settings()
+
+@pytest.fixture
+async def connected(monkeypatch):
+    # Nothing listens here; connecting must not fail start-up or wait long
+    monkeypatch.setattr(settings, "MONGODB_URI", "mongodb://127.0.0.1:1")
+    monkeypatch.setattr(settings, "MONGODB_SERVER_SELECTION_TIMEOUT_MS", 100)
+    monkeypatch.setattr(settings, "READINESS_TIMEOUT", 0.2)
+    monkeypatch.setattr(settings, "MONGODB_COLLECTION_OPTIONS", {"chat_cache": {"read_preference": "secondaryPreferred", "w": "1"}})
+    monkeypatch.setattr(mongodb, "mongo_client", None)
+    monkeypatch.setattr(mongodb, "mongo_db", None)
+    await mongodb.connect_to_mongo()
+    yield mongodb.get_mongo_db()
+    await mongodb.close_mongo_connection()
+
+def test_client_applies_pool_settings_and_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "MONGODB_MAX_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "MONGODB_WRITE_CONCERN", "majority")
+    client = mongodb.create_mongo_client(minPoolSize=2)
+    try:
+        assert client.options.pool_options.max_pool_size == 7
+        assert client.options.pool_options.min_pool_size == 2
+        assert client.write_concern.document == {"w": "majority"}
+        assert mongodb.pool_metrics in client.options.event_listeners
+    finally:
+        client.close()
+
+async def test_callers_share_one_client(connected):
+    assert mongodb.get_mongo_db() is connected
+    assert connected.users.database.client is mongodb.mongo_client
+    # The chat cache goes through the same handle instead of a client of its own
+    collection = connected[MongoCacheBackend().collection_name]
+    assert collection is connected["chat_cache"]
+    assert collection.database.client is mongodb.mongo_client
+
+async def test_collection_options_apply_per_collection(connected):
+    cache = connected["chat_cache"]
+    users = connected.users
+
+    assert cache.read_preference == ReadPreference.SECONDARY_PREFERRED
+    assert cache.write_concern.document == {"w": 1}
+    assert users.read_preference == ReadPreference.PRIMARY
+    assert connected["users"] is users
+
+def test_get_mongo_db_requires_connection(monkeypatch):
+    monkeypatch.setattr(mongodb, "mongo_db", None)
+    with pytest.raises(Exception, match="not initialized"):
+        mongodb.get_mongo_db()
+
+def test_pool_metrics_track_checkout_waits():
+    metrics = mongodb.PoolMetrics()
+    metrics.connection_created(None)
+    metrics.connection_check_out_started(None)
+    metrics.connection_checked_out(None)
+    metrics.connection_check_out_failed(None)
+
+    stats = metrics.stats()
+    assert stats["connections"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["checkout_failures"] == 1
+
+    metrics.connection_checked_in(None)
+    assert metrics.stats()["checked_out"] == 0
@@ -0,0 +1,31 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.security.auth import get_current_active_user
+from services.order_promising.routes import router
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router, prefix="/order-promising")
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": 1, "role": "user"}
+    return TestClient(app)
+
+def test_delivery_date_is_quoted(client):
+    response = client.post("/order-promising/delivery-dates", json={"sku": "HR-COIL-2MM", "quantity": 100})
+
+    assert response.status_code == 200
+    assert response.json()["feasible"] is True
+
+@pytest.mark.parametrize("order", [
+    {"sku": "HR-COIL-2MM", "quantity": "lots"},
+    {"sku": "HR-COIL-2MM", "quantity": 0},
+    {"sku": "HR-COIL-2MM"},
+    {"sku": "HR-COIL-2MM", "quantity": 10, "leadTimeDays": "soon"}
+])
+def test_invalid_orders_are_rejected_with_422(client, order):
+    assert client.post("/order-promising/delivery-dates", json=order).status_code == 422
+
+def test_unknown_product_is_404(client):
+    assert client.post("/order-promising/delivery-dates", json={"sku": "NOPE", "quantity": 1}).status_code == 404
@@ -0,0 +1,92 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from passlib.hash import bcrypt
+from sqlalchemy import select
+
+from config.settings import get_settings
+from core.database.mssql import AsyncSessionLocal, Base, async_engine
+from core.database.mongodb import get_mongo_db
+from core.security.auth import verify_and_update_password
+from core.security.password_pool import PasswordHashPool, PasswordPoolFullError
+from services.auth.models import User
+from services.auth.mongodb_service import MongoDBUserService
+from services.auth.routes import router
+
+settings = get_settings()
+
+def rounds(hashed: str) -> int:
+    return int(hashed.split("$")[2])
+
+OUTDATED = bcrypt.using(rounds=4).hash("s3cret")
+
+async def test_outdated_hash_is_replaced_on_successful_verification():
+    verified, new_hash = await verify_and_update_password("s3cret", OUTDATED)
+
+    assert verified is True
+    assert rounds(new_hash) == settings.AUTH_BCRYPT_ROUNDS
+    assert bcrypt.verify("s3cret", new_hash)
+
+async def test_current_hash_and_wrong_password_are_not_replaced():
+    current = bcrypt.using(rounds=settings.AUTH_BCRYPT_ROUNDS).hash("s3cret")
+
+    assert await verify_and_update_password("s3cret", current) == (True, None)
+    assert await verify_and_update_password("wrong", OUTDATED) == (False, None)
+
+async def test_sql_login_upgrades_the_stored_hash():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        db.add(User(username="planner", email="planner@example.com", hashed_password=OUTDATED, role="user"))
+        await db.commit()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/auth")
+    app.dependency_overrides[get_mongo_db] = lambda: None
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/auth/login", json={"username": "planner", "password": "s3cret"})
+
+    async with AsyncSessionLocal() as db:
+        stored = (await db.execute(select(User.hashed_password).where(User.username == "planner"))).scalar_one()
+    await async_engine.dispose()
+
+    assert response.status_code == 200
+    assert rounds(stored) == settings.AUTH_BCRYPT_ROUNDS
+    assert bcrypt.verify("s3cret", stored)
+
+class UsersCollection:
+    """Just enough of a Motor collection for authenticate_user"""
+
+    def __init__(self, *users):
+        self.users = {user["_id"]: user for user in users}
+
+    async def find_one(self, query):
+        return next((user for user in self.users.values() if user["username"] == query["username"]), None)
+
+    async def update_one(self, query, update):
+        self.users[query["_id"]].update(update["$set"])
+
+async def test_mongo_login_upgrades_the_stored_hash():
+    users = UsersCollection({"_id": 1, "username": "planner", "hashed_password": OUTDATED})
+    service = MongoDBUserService(db=type("Database", (), {"users": users})())
+
+    assert await service.authenticate_user("planner", "wrong") is None
+    assert users.users[1]["hashed_password"] == OUTDATED
+
+    user = await service.authenticate_user("planner", "s3cret")
+
+    assert rounds(user["hashed_password"]) == settings.AUTH_BCRYPT_ROUNDS
+    assert users.users[1]["hashed_password"] == user["hashed_password"]
+
+async def test_logins_are_rejected_when_the_pool_is_saturated():
+    pool = PasswordHashPool(max_workers=1, max_pending=1)
+    pool._pending = 1
+    try:
+        with pytest.raises(PasswordPoolFullError):
+            await pool.run(bcrypt.verify, "s3cret", OUTDATED)
+        # Admin operations queue instead of being rejected
+        pool._pending = 0
+        assert await pool.run(bcrypt.verify, "s3cret", OUTDATED, reject_when_full=False)
+    finally:
+        pool.shutdown()
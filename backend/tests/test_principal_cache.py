@@ -0,0 +1,43 @@
+import pytest
+
+from core.security.principal_cache import PrincipalCache
+from services.auth.mongodb_service import MongoDBUserService
+
+mongomock_motor = pytest.importorskip("mongomock_motor", reason="mongomock-motor stands in for MongoDB in route and storage tests")
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PrincipalCache(ttl=60, max_entries=100)
+    monkeypatch.setattr(PrincipalCache, "_instance", cache)
+    return cache
+
+@pytest.fixture
+async def service(cache):
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    await db.users.insert_many([
+        {"username": "planner", "role": "user", "allowed_modules": ["planning"]},
+        {"username": "buyer", "role": "user", "allowed_modules": ["purchasing"]}
+    ])
+    service = MongoDBUserService(db=db)
+    for username, token in (("planner", "token-a"), ("planner", "token-b"), ("buyer", "token-c")):
+        cache.set(token, username, await service.get_user_by_username(username))
+    return service
+
+async def test_permission_updates_evict_the_users_cached_logins(cache, service):
+    assert await service.update_user_permissions("planner", allowed_modules=["planning", "purchasing"])
+
+    assert cache.get("token-a") is None
+    assert cache.get("token-b") is None
+    assert cache.get("token-c")["username"] == "buyer"
+
+    # The next login resolves the new permissions
+    cache.set("token-a", "planner", await service.get_user_by_username("planner"))
+    assert cache.get("token-a")["allowed_modules"] == ["planning", "purchasing"]
+
+async def test_deleting_a_user_evicts_their_cached_logins(cache, service):
+    assert await service.delete_user("planner")
+
+    assert cache.get("token-a") is None
+    assert cache.get("token-b") is None
+    assert cache.get("token-c")["username"] == "buyer"
+    assert cache.stats()["entries"] == 1
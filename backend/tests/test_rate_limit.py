@@ -0,0 +1,55 @@
+import pytest
+
+from core.security.rate_limit import MemoryBucketStore, RateLimitedError, RateLimiter, RedisBucketStore
+
+async def exhaust(limiters, key, bucket_name):
+    """Alternate checks between limiters until one of them rejects; return the allowed count"""
+    allowed = 0
+    while True:
+        try:
+            await limiters[allowed % len(limiters)].check(key, bucket_name)
+        except RateLimitedError as e:
+            return allowed, e
+        allowed += 1
+
+async def test_limiters_sharing_a_store_share_the_budget():
+    store = MemoryBucketStore()
+    first, second = RateLimiter(store=store), RateLimiter(store=store)
+    capacity = int(first.buckets["llm"].capacity)
+
+    allowed, error = await exhaust([first, second], "user:1", "llm")
+
+    assert allowed == capacity
+    assert error.bucket == "llm" and error.retry_after >= 1
+    # Another user still has a full bucket
+    await second.check("user:2", "llm")
+
+async def test_workers_share_the_budget_through_redis():
+    fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis[lua] from requirements.txt to run the token bucket script")
+    server = fakeredis.FakeServer()
+    workers = [
+        RateLimiter(store=RedisBucketStore(fakeredis.aioredis.FakeRedis(server=server)))
+        for _ in range(2)
+    ]
+    capacity = int(workers[0].buckets["llm"].capacity)
+
+    allowed, _ = await exhaust(workers, "user:1", "llm")
+
+    assert allowed == capacity
+    assert all(worker.stats()["store_healthy"] for worker in workers)
+
+class BrokenStore:
+    name = "redis"
+
+    async def take(self, key, bucket, cost):
+        raise ConnectionError("redis is down")
+
+async def test_store_failure_falls_back_to_worker_buckets():
+    limiter = RateLimiter(store=BrokenStore())
+    capacity = int(limiter.buckets["llm"].capacity)
+
+    allowed, _ = await exhaust([limiter], "user:1", "llm")
+
+    assert allowed == capacity
+    assert limiter.stats()["store_healthy"] is False
+    assert limiter.stats()["store_errors"] == 1
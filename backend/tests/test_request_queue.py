@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from services.chat.queue import QueueFullError, RequestQueue
+
+async def answer(text, delay=0.0):
+    await asyncio.sleep(delay)
+    return {"text": text}
+
+async def test_result_is_returned_when_processing_finishes():
+    queue = RequestQueue()
+    key = await queue.enqueue_request("s1", "u1", "hello")
+    asyncio.create_task(queue.process_request(key, answer, "hi", 0.01))
+
+    assert await queue.get_result(key, timeout=1.0) == {"text": "hi"}
+    assert queue.depth == 0
+
+async def test_processing_errors_reach_the_waiter():
+    async def fail():
+        raise RuntimeError("boom")
+    queue = RequestQueue()
+    key = await queue.enqueue_request("s1", "u1", "hello")
+    asyncio.create_task(queue.process_request(key, fail))
+
+    with pytest.raises(Exception, match="Request processing failed: boom"):
+        await queue.get_result(key, timeout=1.0)
+
+async def test_full_queue_rejects_new_requests():
+    queue = RequestQueue(max_pending=2)
+    await queue.enqueue_request("s1", "u1", "one")
+    await queue.enqueue_request("s2", "u2", "two")
+
+    with pytest.raises(QueueFullError) as rejected:
+        await queue.enqueue_request("s3", "u3", "three")
+
+    assert rejected.value.depth == 2
+    assert rejected.value.retry_after > 0
+
+async def test_full_queue_is_answered_with_429_and_retry_after():
+    from main import queue_full_handler
+
+    response = await queue_full_handler(None, QueueFullError(2, 5))
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "5"
+    assert "retry" in json.loads(response.body)["detail"]
+
+async def test_uncollected_results_are_evicted():
+    queue = RequestQueue(result_ttl=0.01)
+    key = await queue.enqueue_request("s1", "u1", "hello")
+    await queue.process_request(key, answer, "hi")
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(KeyError):
+        await queue.get_result(key)
+
+async def test_timed_out_waiter_leaves_nothing_behind():
+    queue = RequestQueue()
+    key = await queue.enqueue_request("s1", "u1", "hello")
+    task = asyncio.create_task(queue.process_request(key, answer, "late", 0.05))
+
+    with pytest.raises(TimeoutError):
+        await queue.get_result(key, timeout=0.01)
+    await task
+
+    assert queue.depth == 0
+    assert key not in queue._futures
@@ -0,0 +1,72 @@
+from services.chat.cache.semantic import HashingEmbedder, SemanticIndex
+
+def test_search_only_matches_rows_of_the_same_namespace():
+    index = SemanticIndex(HashingEmbedder(), max_entries=10, threshold=0.8)
+    index.add("Show the inventory levels for Mumbai", "alice", "k1")
+    index.add("Show the inventory levels for Mumbai", "bob", "k2")
+    index.add("Open orders for wire rod", "alice", "k3")
+
+    assert index.search("show inventory level for mumbai", "alice") == "k1"
+    assert index.search("show inventory level for mumbai", "bob") == "k2"
+    assert index.search("show inventory level for mumbai", "carol") is None
+    assert index.search("Forecast for TMT bars in Pune", "alice") is None
+
+def test_overwritten_rows_stop_matching():
+    index = SemanticIndex(HashingEmbedder(), max_entries=2, threshold=0.8)
+    index.add("Show the inventory levels for Mumbai", "alice", "k1")
+    index.add("Open orders for wire rod", "alice", "k2")
+    index.add("Forecast for TMT bars in Pune", "alice", "k3")
+
+    assert len(index) == 2
+    assert index.search("show inventory level for mumbai", "alice") is None
+    assert index.search("open orders for wire rods", "alice") == "k2"
+    assert index.search("forecast for TMT bar in Pune", "alice") == "k3"
+
+def worker_index(questions, max_entries=10):
+    index = SemanticIndex(HashingEmbedder(), max_entries=max_entries, threshold=0.8)
+    for message, namespace, key in questions:
+        index.add(message, namespace, key)
+    return index
+
+def test_workers_saving_to_one_file_keep_each_others_rows(tmp_path):
+    path = str(tmp_path / "semantic.npz")
+    worker_index([("Show the inventory levels for Mumbai", "alice", "k1")]).save(path)
+    worker_index([("Open orders for wire rod", "bob", "k2")]).save(path)
+
+    restarted = worker_index([])
+    assert restarted.load(path)
+
+    assert len(restarted) == 2
+    assert restarted.search("show inventory level for mumbai", "alice") == "k1"
+    assert restarted.search("open orders for wire rods", "bob") == "k2"
+
+def test_merged_file_keeps_the_newest_rows(tmp_path):
+    path = str(tmp_path / "semantic.npz")
+    worker_index([("Show the inventory levels for Mumbai", "alice", "k1"),
+                  ("Open orders for wire rod", "alice", "k2")], max_entries=3).save(path)
+    worker_index([("Forecast for TMT bars in Pune", "alice", "k3"),
+                  ("Open orders for wire rod", "alice", "k2"),
+                  ("Dispatch plan for galvanized sheet", "alice", "k4")], max_entries=3).save(path)
+
+    restarted = worker_index([], max_entries=3)
+    restarted.load(path)
+
+    # k2 is saved once; k1 is the oldest row and falls out
+    assert len(restarted) == 3
+    assert restarted.search("show inventory level for mumbai", "alice") is None
+    assert restarted.search("open orders for wire rods", "alice") == "k2"
+
+def test_reloaded_full_index_overwrites_its_oldest_row_next(tmp_path):
+    path = str(tmp_path / "semantic.npz")
+    index = worker_index([("Show the inventory levels for Mumbai", "alice", "k1"),
+                          ("Open orders for wire rod", "alice", "k2"),
+                          ("Forecast for TMT bars in Pune", "alice", "k3")], max_entries=2)
+    index.save(path)
+
+    restarted = worker_index([], max_entries=2)
+    restarted.load(path)
+    restarted.add("Dispatch plan for galvanized sheet", "alice", "k4")
+
+    assert restarted.search("open orders for wire rods", "alice") is None
+    assert restarted.search("forecast for TMT bar in Pune", "alice") == "k3"
+    assert restarted.search("dispatch plan for galvanized sheets", "alice") == "k4"
@@ -0,0 +1,24 @@
+from services.chat.session.session_manager import SessionManager
+
+async def test_new_session_survives_eviction_when_others_are_busy():
+    manager = SessionManager(max_sessions=1)
+    await manager.get_session_interpreter("busy")
+    await manager.acquire_semaphore("busy")
+
+    session = await manager.get_session_interpreter("new")
+
+    assert session["temp_dir"] == "/tmp/session_new"
+    assert "new" in manager._sessions
+    assert "busy" in manager._sessions
+    await manager.release_semaphore("busy")
+
+async def test_least_recently_used_session_is_evicted():
+    manager = SessionManager(max_sessions=2)
+    await manager.get_session_interpreter("a")
+    await manager.get_session_interpreter("b")
+    await manager.get_session_interpreter("a")
+
+    await manager.get_session_interpreter("c")
+
+    assert list(manager._sessions) == ["a", "c"]
+    assert manager.evicted_lru == 1
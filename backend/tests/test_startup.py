@@ -0,0 +1,9 @@
+from startup_time import measure
+
+def test_only_enabled_planning_modules_are_imported_at_startup():
+    result = measure("order_promising", runs=1)
+
+    assert "services.order_promising.routes" in result["modules"]
+    assert "services.demand_planning.routes" not in result["modules"]
+    # Engines are imported by the first request that needs them
+    assert not [name for name in result["modules"] if name.endswith(".engine")]
@@ -0,0 +1,97 @@
+import json
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from config.settings import get_settings
+from core.tracing import TailSampler, TraceExporter, TracingMiddleware, Trace, Span
+
+settings = get_settings()
+
+MS = 1_000_000
+
+def warmed_sampler(rate: float) -> TailSampler:
+    """Sampler whose threshold was computed from 1..100 ms at the 90th percentile"""
+    sampler = TailSampler(percentile=90, window=200, rate=rate)
+    # The first trace sets the initial threshold, the 101st the first recomputed one
+    for duration in list(range(1, 101)) + [100]:
+        sampler.keep(duration * MS, False)
+    return sampler
+
+def test_slow_traces_are_kept_and_fast_ones_dropped():
+    sampler = warmed_sampler(rate=0.0)
+
+    assert sampler._threshold_ns == 91 * MS
+    assert sampler.keep(95 * MS, False)
+    assert not sampler.keep(50 * MS, False)
+
+def test_errors_are_always_kept():
+    sampler = warmed_sampler(rate=0.0)
+
+    assert sampler.keep(1 * MS, True)
+
+def test_fast_traces_are_sampled_at_the_rate():
+    assert warmed_sampler(rate=1.0).keep(1 * MS, False)
+
+def test_threshold_follows_recent_durations():
+    sampler = warmed_sampler(rate=0.0)
+    # The service got slower: 50 ms is now fast, and only recomputed every 100 traces
+    for _ in range(99):
+        sampler.keep(500 * MS, False)
+    assert sampler._threshold_ns == 91 * MS
+    sampler.keep(500 * MS, False)
+
+    assert sampler._threshold_ns == 500 * MS
+    assert not sampler.keep(95 * MS, False)
+
+def test_exporter_writes_only_kept_traces(tmp_path, monkeypatch):
+    sink = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(sink))
+    exporter = TraceExporter()
+    exporter.sampler = warmed_sampler(rate=0.0)
+
+    for name, duration, error in (("slow", 200, False), ("fast", 5, False), ("failed", 5, True)):
+        trace = Trace()
+        Span(trace, name, None, start_ns=1, attributes={}).end(1 + duration * MS)
+        exporter.submit(trace, duration * MS, error)
+    exporter.shutdown()
+
+    exported = [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] for line in sink.read_text().splitlines()]
+    assert exported == ["slow", "failed"]
+    assert exporter.exported == 2
+
+class RecordingExporter(TraceExporter):
+    def __init__(self):
+        super().__init__()
+        self.enabled = True
+        self.traces = []
+
+    def submit(self, trace: Trace, duration_ns: int, error: bool):
+        self.traces.append(trace)
+
+@pytest.mark.parametrize("path, name, route", [
+    ("/api/sessions/6630f1c2/agents/42", "GET /api/sessions/{session_id}/agents/{agent_id}", "/api/sessions/{session_id}/agents/{agent_id}"),
+    ("/api/missing/6630f1c2", "GET", None)
+])
+async def test_request_spans_are_named_after_the_route_template(monkeypatch, path, name, route):
+    exporter = RecordingExporter()
+    monkeypatch.setattr(TraceExporter, "_instance", exporter)
+
+    router = APIRouter(prefix="/api")
+
+    @router.get("/sessions/{session_id}/agents/{agent_id}")
+    async def agent(session_id: str, agent_id: int):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(TracingMiddleware)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        await client.get(path)
+
+    root = exporter.traces[0].spans[-1]
+    assert root.name == name
+    assert root.attributes["http.target"] == path
+    assert root.attributes.get("http.route") == route
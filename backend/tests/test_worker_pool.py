@@ -0,0 +1,110 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+
+import pytest
+
+from services.chat.processing import WorkerPool
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+async def test_cancelled_caller_keeps_the_slot_until_its_thread_returns(pool):
+    release = threading.Event()
+    caller = asyncio.create_task(pool.run("s1", release.wait))
+    while pool.stats()["active_workers"] == 0:
+        await asyncio.sleep(0.01)
+    waiting = asyncio.create_task(pool.run("s2", lambda: "second"))
+
+    caller.cancel()
+    await asyncio.sleep(0.05)
+    assert not caller.done()
+    assert pool.stats()["active_workers"] == 1
+    assert pool.stats()["queue_depth"] == 1
+
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    assert await waiting == "second"
+    assert pool.stats()["active_workers"] == 0
+
+async def wait_until_busy(pool):
+    while pool.stats()["active_workers"] < pool.max_workers:
+        await asyncio.sleep(0.01)
+
+async def test_slots_are_granted_round_robin_across_sessions(pool):
+    release = threading.Event()
+    order = []
+    blocker = asyncio.create_task(pool.run("busy", release.wait))
+    await wait_until_busy(pool)
+
+    # s1 queues a burst before s2 and s3 ask once each
+    jobs = [asyncio.create_task(pool.run(session_id, order.append, name)) for session_id, name in (
+        ("s1", "a1"), ("s1", "a2"), ("s1", "a3"), ("s2", "b1"), ("s3", "c1")
+    )]
+    await asyncio.sleep(0)
+    assert pool.stats()["queue_depth"] == 5
+    assert pool.stats()["waiting_sessions"] == 3
+
+    release.set()
+    await asyncio.gather(blocker, *jobs)
+
+    assert order == ["a1", "b1", "c1", "a2", "a3"]
+
+async def test_jobs_run_in_the_callers_context(pool):
+    request_id = contextvars.ContextVar("request_id", default=None)
+
+    async def call(value):
+        request_id.set(value)
+        return await pool.run(value, request_id.get)
+
+    assert await asyncio.gather(call("r1"), call("r2"), call("r3")) == ["r1", "r2", "r3"]
+    assert request_id.get() is None
+
+async def test_soak_leaves_no_waiters_threads_or_tasks_behind():
+    pool = WorkerPool(max_workers=4)
+    lock = threading.Lock()
+    running, peak, done = [0], [0], []
+
+    def work(name):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(random.random() / 1000)
+        with lock:
+            running[0] -= 1
+        done.append(name)
+        return name
+
+    random.seed(6)
+    jobs = [
+        asyncio.create_task(pool.run(f"s{session}", work, f"s{session}-{turn}"))
+        for turn in range(20) for session in range(50)
+    ]
+    cancelled = set(random.sample(range(len(jobs)), 100))
+    await asyncio.sleep(0)
+    for index in cancelled:
+        jobs[index].cancel()
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+
+    # Every job that was not cancelled ran; cancelled ones ran only if their thread had started
+    assert all(not isinstance(results[index], asyncio.CancelledError) for index in range(len(jobs)) if index not in cancelled)
+    finished = [result for result in results if not isinstance(result, asyncio.CancelledError)]
+    assert set(finished) <= set(done)
+    assert len(set(done)) == len(done)
+    assert peak[0] <= pool.max_workers
+    stats = pool.stats()
+    assert (stats["active_workers"], stats["queue_depth"], stats["waiting_sessions"]) == (0, 0, 0)
+    assert stats["completed"] == len(done)
+
+    threads = list(pool._executor._threads)
+    pool.shutdown()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert asyncio.all_tasks() == {asyncio.current_task()}
@@ -1,39 +1,149 @@
-
+import json
 import logging
-import time
-from typing import Optional
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from config.settings import get_settings
+from core.tracing import current_span
+
+settings = get_settings()
+
+# Attributes every LogRecord has; anything else was passed in ``extra`` and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# SessionLogger levels, "success" being an info record
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR
+}
+
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of high-volume records
+
+    Records whose ``event`` is listed in the sample rates and whose level is
+    below WARNING are kept with the configured probability; warnings and
+    errors are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that keeps extra fields and defers formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve arguments and tracebacks now; they may not survive until the listener runs
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging():
+    """
+    Route all application logging through a background thread
+
+    The root logger only puts records on an in-memory queue; a QueueListener
+    thread formats them (JSON lines, or plain text with LOG_FORMAT=text) and
+    writes them to stdout, so request handlers never block on log I/O.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    # Sample before queueing so dropped records cost nothing downstream
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 class SessionLogger:
-    """Utility class for logging session information"""
-    
-    @staticmethod
-    def log(session_id: str, log_type: str, message: str, level: str = "info"):
+    """
+    Structured log of chat activity
+
+    All records go to the single "session" logger with the session ID and
+    event type as fields, instead of creating a logger per session.
+    """
+
+    logger = logging.getLogger("session")
+    id_field = "session_id"
+
+    @classmethod
+    def log(cls, session_id: str, log_type: str, message: str, level: str = "info"):
         """Log a message with session ID"""
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Use Python's logging module with appropriate level
-        logger = logging.getLogger(f"session.{session_id}")
-        
-        log_message = f"[{timestamp}] [Session: {session_id}] [{log_type}] {message}"
-        
-        if level.lower() == "error":
-            logger.error(log_message)
-        elif level.lower() == "warning":
-            logger.warning(log_message)
-        elif level.lower() == "debug":
-            logger.debug(log_message)
-        else:
-            logger.info(log_message)
-            
-        # Also print to console for development
-        print(log_message)
-    
-    @staticmethod
-    def progress(current: int, total: int, message: str, session_id: str):
+        levelno = _LEVELS.get(level.lower(), logging.INFO)
+        if cls.logger.isEnabledFor(levelno):
+            extra = {cls.id_field: session_id, "event": log_type}
+            # Tie the record to the request's trace, when it is being traced
+            trace = current_span().trace
+            if trace is not None:
+                extra["trace_id"] = trace.trace_id
+            cls.logger.log(levelno, message, extra=extra)
+
+    @classmethod
+    def progress(cls, current: int, total: int, message: str, session_id: str):
         """Log progress of a task"""
         percent = int((current / total) * 100)
-        SessionLogger.log(
-            session_id, 
-            "progress", 
-            f"{percent}% - {message}"
-        )
+        cls.log(session_id, "progress", f"{percent}% - {message}")
+
+class UserLogger(SessionLogger):
+    """SessionLogger for request handlers that identify the caller by user ID"""
+
+    id_field = "user_id"